@@ -10,3 +10,66 @@ SP500_ENDPOINT = "/sp500"
 MASSIVE_API_KEY = os.getenv("MASSIVE_API_KEY")
 MASSIVE_BASE_URL = "https://api.massive.com/v3"
 MASSIVE_All_Tickers_ENDPOINT = "/reference/tickers"
+
+# Massive free tier quota, shared by every exchange crawl
+MASSIVE_REQUESTS_PER_MINUTE = int(
+    os.getenv("MASSIVE_REQUESTS_PER_MINUTE", "5")
+)
+
+# Shared outbound HTTP client pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10")
+)
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+# Per-host timeouts in seconds
+HTTP_HOST_TIMEOUTS = {
+    "api.api-ninjas.com": float(os.getenv("NINJAS_TIMEOUT", "30")),
+    "api.massive.com": float(os.getenv("MASSIVE_TIMEOUT", "30")),
+}
+
+# Market data backend: "live" (yfinance and the list APIs) or "synthetic"
+# (recorded fixtures plus generated data, no network access)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "live")
+MARKET_DATA_FIXTURES = os.getenv("MARKET_DATA_FIXTURES")
+SYNTHETIC_TICKERS = int(os.getenv("SYNTHETIC_TICKERS", "500"))
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "42"))
+
+# Per-request timing: Server-Timing header and profiles of slow requests.
+# Profiling is off unless PROFILE_SLOW_MS is set; PROFILE_SAMPLE_RATE is
+# the fraction of requests that run under the profiler.
+SERVER_TIMING_ENABLED = (
+    os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+)
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Cache snapshots shared by every worker through the database
+SHARED_CACHE_ENABLED = (
+    os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+)
+# How often a worker checks for a snapshot published by another worker
+SHARED_CACHE_CHECK_SECONDS = float(
+    os.getenv("SHARED_CACHE_CHECK_SECONDS", "15")
+)
+
+# Scheduler leader election: Postgres advisory lock, or a lock file when
+# the database is not Postgres
+LEADER_LOCK_ID = int(os.getenv("LEADER_LOCK_ID", "727274"))
+LEADER_LOCK_FILE = os.getenv("LEADER_LOCK_FILE", "/tmp/markviz-scheduler.lock")
+LEADER_ELECTION_SECONDS = int(os.getenv("LEADER_ELECTION_SECONDS", "30"))
+
+# NYSE-calendar-aware refreshes: quotes are refreshed every
+# QUOTE_REFRESH_MINUTES during a session, the caches are warmed
+# PREOPEN_WARM_MINUTES before the open, and market data fetched after the
+# close stays fresh until the next session
+QUOTE_REFRESH_MINUTES = int(os.getenv("QUOTE_REFRESH_MINUTES", "5"))
+PREOPEN_WARM_MINUTES = int(os.getenv("PREOPEN_WARM_MINUTES", "15"))
+
+# Snapshots of the constituents, prices and ticker list written to disk on
+# every refresh and loaded at boot, so a restarted instance starts warm
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
@@ -2,9 +2,24 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from .database import Base, engine
-from .models import User, Holding  # Import models FIRST
+
+# Import models FIRST
+from .models import (
+    User,
+    Holding,
+    PriceSeries,
+    PriceBar,
+    ListedTicker,
+    CrawlState,
+    CacheSnapshot,
+    JobRun,
+    PortfolioSnapshot,
+    HoldingsVersion,
+)
 from contextlib import asynccontextmanager
 from .scheduler import start_scheduler, shutdown_scheduler
+from .services.http_client import init_http_client, close_http_client
+from .middleware import TimingMiddleware
 
 
 logging.basicConfig(level=logging.INFO)
@@ -16,9 +31,15 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     logging.info("✅ Database tables created")
 
+    await init_http_client()
+    # Serve the last snapshots right away, refresh them in the background
+    warm_start = stocks.restore_caches()
     start_scheduler()
     yield
     shutdown_scheduler()
+    if warm_start is not None:
+        warm_start.cancel()
+    await close_http_client()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -32,13 +53,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-from .routes import auth, stocks, portfolio
+# Outermost, so the timings cover every other middleware
+app.add_middleware(TimingMiddleware)
+
+from .routes import auth, stocks, portfolio, metrics
 
 app.include_router(auth.router)
 app.include_router(stocks.router)
 app.include_router(portfolio.router)
+app.include_router(metrics.router)
 
 
 @app.get("/live")
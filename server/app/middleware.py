@@ -0,0 +1,199 @@
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from .config import (
+    PROFILE_DIR,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_SLOW_MS,
+    SERVER_TIMING_ENABLED,
+)
+from .services.metrics import REQUEST_DURATION
+from .services.timing import CURRENT, RequestTimings, current
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def route_path(scope, default: str = None) -> str:
+    """
+    Route template (/stocks/{ticker}) if routing matched, else default
+    (the raw path when no default is given).
+    """
+    route = scope.get("route")
+    return getattr(route, "path", default or scope["path"])
+
+
+def _start_profiler(timings: RequestTimings):
+    """Start a profiler for a sampled request, None if not sampled."""
+    if not timings.profile:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler already runs on this thread
+        return None
+    timings.profiler = profiler
+    return profiler
+
+
+def _stop_handler(timings, profiler, started):
+    if profiler is not None:
+        profiler.disable()
+    timings.add("handler", time.perf_counter() - started)
+    timings.handler_done = time.perf_counter()
+
+
+def timed_endpoint(endpoint):
+    """
+    Wrap a route endpoint to time it and, when sampled, profile it.
+
+    Sync endpoints are profiled on their threadpool worker. Async
+    endpoints are profiled on the event loop, so their profile also
+    contains whatever other tasks ran in the meantime.
+    """
+    # include_router() rebuilds every route with the same route class
+    if getattr(endpoint, "timed", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            timings = current()
+            if timings is None:
+                return await endpoint(*args, **kwargs)
+            profiler = _start_profiler(timings)
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _stop_handler(timings, profiler, started)
+
+        async_wrapper.timed = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        timings = current()
+        if timings is None:
+            return endpoint(*args, **kwargs)
+        profiler = _start_profiler(timings)
+        started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _stop_handler(timings, profiler, started)
+
+    wrapper.timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint records a handler span (see timed_endpoint)."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+
+def save_profile(scope, timings: RequestTimings, total: float) -> str:
+    """Dump a request's profile as a .prof file and return its path."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = UNSAFE_FILENAME.sub("_", scope["path"]).strip("_") or "root"
+    filename = (
+        f"{datetime.now():%Y%m%d-%H%M%S}-{scope['method']}-{name}"
+        f"-{int(total * 1000)}ms.prof"
+    )
+    path = os.path.join(PROFILE_DIR, filename)
+    timings.profiler.dump_stats(path)
+    return path
+
+
+class TimingMiddleware:
+    """
+    Collect per-request spans and report them.
+
+    Every HTTP request gets a RequestTimings in the CURRENT context var.
+    DB queries, upstream provider calls, cache lookups, the route handler
+    and serialization record into it. The spans are sent back in a
+    Server-Timing header and logged as one JSON line per request.
+
+    With PROFILE_SLOW_MS set, a PROFILE_SAMPLE_RATE fraction of requests
+    runs under cProfile, and the profile is written to PROFILE_DIR when
+    the request took longer than PROFILE_SLOW_MS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        timings.profile = (
+            PROFILE_SLOW_MS > 0 and random.random() < PROFILE_SAMPLE_RATE
+        )
+        token = CURRENT.set(timings)
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if timings.handler_done is not None:
+                    timings.add(
+                        "serialize", time.perf_counter() - timings.handler_done
+                    )
+                if SERVER_TIMING_ENABLED:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing", timings.header(timings.elapsed())
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            CURRENT.reset(token)
+            total = timings.elapsed()
+            # Unmatched paths share a label to keep cardinality bounded
+            REQUEST_DURATION.observe(
+                total,
+                method=scope["method"],
+                route=route_path(scope, "unmatched"),
+                status=str(status["code"]),
+            )
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "request",
+                        "method": scope["method"],
+                        "route": route_path(scope),
+                        "status": status["code"],
+                        "total_ms": round(total * 1000, 1),
+                        **timings.as_dict(),
+                    }
+                )
+            )
+
+            slow = total * 1000 >= PROFILE_SLOW_MS
+            if timings.profiler is not None and slow:
+                path = save_profile(scope, timings, total)
+                logger.warning(
+                    f"Slow request {scope['method']} {scope['path']} "
+                    f"({total * 1000:.0f}ms), profile saved to {path}"
+                )
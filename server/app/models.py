@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Numeric,
+    ForeignKey,
+    Float,
+    BigInteger,
+    Boolean,
+    Date,
+    Text,
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -34,3 +46,117 @@ class Holding(Base):
 
     # relationship back to User
     user = relationship("User", back_populates="holdings")
+
+
+class PriceSeries(Base):
+    """One stored price history per (ticker, interval)."""
+
+    __tablename__ = "price_series"
+
+    ticker = Column(String, primary_key=True)
+    interval = Column(String, primary_key=True)
+    # exchange timezone, bars are stored in UTC
+    timezone = Column(String, nullable=False, default="UTC")
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PriceBar(Base):
+    """A single OHLCV bar of a stored price history."""
+
+    __tablename__ = "price_bars"
+
+    ticker = Column(String, primary_key=True)
+    interval = Column(String, primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger)
+
+
+class ListedTicker(Base):
+    """A NYSE or NASDAQ ticker from the Massive reference API."""
+
+    __tablename__ = "listed_tickers"
+
+    ticker = Column(String, primary_key=True)
+    exchange = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    first_seen_at = Column(DateTime(timezone=True), nullable=False)
+    # started_at of the last crawl that returned this ticker
+    last_seen_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class CrawlState(Base):
+    """Pagination cursor of the ticker crawl for one exchange."""
+
+    __tablename__ = "crawl_state"
+
+    exchange = Column(String, primary_key=True)
+    # next page to fetch, None when no crawl is in progress
+    next_url = Column(String, nullable=True)
+    pages = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CacheSnapshot(Base):
+    """A market-data cache snapshot shared by every worker process."""
+
+    __tablename__ = "cache_snapshots"
+
+    key = Column(String, primary_key=True)
+    # bumped on every publish, so readers can skip unchanged snapshots
+    version = Column(Integer, nullable=False, default=1)
+    # JSON encoded cache value
+    payload = Column(Text, nullable=False)
+    # when the data was fetched upstream, not when it was written
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class JobRun(Base):
+    """One run of a scheduled job, written by the scheduler leader."""
+
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job = Column(String, nullable=False, index=True)
+    # hostname:pid of the leader that ran it
+    worker = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration = Column(Float, nullable=True)
+    # running, success or failed
+    status = Column(String, nullable=False, default="running")
+    error = Column(Text, nullable=True)
+
+
+class PortfolioSnapshot(Base):
+    """A user's portfolio valuation at the close of one trading day."""
+
+    __tablename__ = "portfolio_snapshots"
+
+    # (user_id, date) primary key, graphs read date ranges of one user
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    total_value = Column(Float, nullable=False)
+    # buy price times shares of the lots held that day
+    cost_basis = Column(Float, nullable=False)
+    # return on the cost basis, in percent
+    return_pct = Column(Float, nullable=False)
+    # lots held that day
+    holdings = Column(Integer, nullable=False)
+
+
+class HoldingsVersion(Base):
+    """Counter bumped on every change to a user's holdings."""
+
+    __tablename__ = "holdings_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # part of the portfolio result cache keys, a new version misses them
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
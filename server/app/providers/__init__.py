@@ -0,0 +1,45 @@
+from ..config import (
+    MARKET_DATA_FIXTURES,
+    MARKET_DATA_PROVIDER,
+    SYNTHETIC_SEED,
+    SYNTHETIC_TICKERS,
+)
+from .base import MarketDataProvider
+
+# Process-wide provider, created on first use
+PROVIDER = {"provider": None}
+
+
+def create_provider(name: str = None) -> MarketDataProvider:
+    """
+    Build a provider by name (defaults to MARKET_DATA_PROVIDER).
+
+    Raises:
+        ValueError: If the name is not live or synthetic
+    """
+    name = name or MARKET_DATA_PROVIDER
+    if name == "live":
+        from .live import LiveProvider
+
+        return LiveProvider()
+    if name == "synthetic":
+        from .synthetic import SyntheticProvider
+
+        return SyntheticProvider(
+            tickers=SYNTHETIC_TICKERS,
+            seed=SYNTHETIC_SEED,
+            fixtures_dir=MARKET_DATA_FIXTURES,
+        )
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide market data provider."""
+    if PROVIDER["provider"] is None:
+        PROVIDER["provider"] = create_provider()
+    return PROVIDER["provider"]
+
+
+def set_provider(provider: MarketDataProvider):
+    """Swap the process-wide provider (tests, benchmarks)."""
+    PROVIDER["provider"] = provider
@@ -0,0 +1,66 @@
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+
+class MarketDataProvider(ABC):
+    """
+    Everything the app needs from the outside market-data world.
+
+    The live backend talks to yfinance, API Ninjas and Massive. The
+    synthetic backend serves recorded fixtures and generated data so the
+    server can run (and be load tested) without network access.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def info(self, ticker: str) -> dict:
+        """yfinance style .info dict for a ticker (empty if unknown)."""
+
+    @abstractmethod
+    def history(self, ticker: str, **params) -> pd.DataFrame:
+        """
+        OHLCV bars for a ticker, like yf.Ticker.history.
+
+        Args:
+            **params: period or start/end, and interval
+        """
+
+    @abstractmethod
+    def history_many(
+        self, tickers: list[str], **params
+    ) -> dict[str, pd.DataFrame]:
+        """
+        history() for many tickers in one batched request.
+
+        Returns:
+            Dict of ticker -> bars, tickers without data are left out
+        """
+
+    @abstractmethod
+    def download(
+        self, tickers: list[str], period: str, interval: str
+    ) -> pd.DataFrame:
+        """Multi-ticker bars like yf.download (columns: field, ticker)."""
+
+    @abstractmethod
+    def shares_outstanding(self, ticker: str) -> float:
+        """Shares outstanding for a ticker."""
+
+    @abstractmethod
+    async def sp500_constituents(self) -> list[dict]:
+        """Raw constituent list: dicts with ticker, company_name, sector."""
+
+    @abstractmethod
+    async def ticker_page(self, exchange: str, cursor: str | None) -> dict:
+        """
+        One page of an exchange's ticker list.
+
+        Args:
+            exchange: Exchange name (nasdaq or nyse)
+            cursor: None for the first page, else the previous next_url
+
+        Returns:
+            Dict with results (dicts with ticker, name) and next_url
+        """
@@ -0,0 +1,96 @@
+import pandas as pd
+import yfinance as yf
+
+from .base import MarketDataProvider
+from ..config import (
+    API_NINJAS_KEY,
+    NINJAS_BASE_URL,
+    SP500_ENDPOINT,
+    MASSIVE_API_KEY,
+    MASSIVE_BASE_URL,
+    MASSIVE_All_Tickers_ENDPOINT,
+)
+from ..services.http_client import get_http_client, host_timeout
+
+EXCHANGE_CODES = {"nasdaq": "XNAS", "nyse": "XNYS"}
+PAGE_LIMIT = 1000
+
+
+class LiveProvider(MarketDataProvider):
+    """yfinance for market data, API Ninjas and Massive for lists."""
+
+    name = "live"
+
+    def info(self, ticker: str) -> dict:
+        return yf.Ticker(ticker).info
+
+    def history(self, ticker: str, **params):
+        return yf.Ticker(ticker).history(**params)
+
+    def history_many(self, tickers: list[str], **params):
+        # Adjusted like Ticker.history, so stored series stay consistent
+        frame = yf.download(
+            tickers,
+            auto_adjust=True,
+            group_by="ticker",
+            threads=True,
+            progress=False,
+            **params,
+        )
+        if not isinstance(frame.columns, pd.MultiIndex):
+            # Single ticker downloads can come back without a ticker level
+            frame = pd.concat({tickers[0]: frame}, axis=1)
+
+        histories = {}
+        for ticker in tickers:
+            if ticker in frame.columns.get_level_values(0):
+                bars = frame[ticker].dropna(how="all")
+                if not bars.empty:
+                    histories[ticker] = bars
+        return histories
+
+    def download(self, tickers: list[str], period: str, interval: str):
+        return yf.download(
+            tickers,
+            period=period,
+            interval=interval,
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+        )
+
+    def shares_outstanding(self, ticker: str) -> float:
+        return yf.Ticker(ticker).fast_info["shares"]
+
+    async def sp500_constituents(self) -> list[dict]:
+        url = NINJAS_BASE_URL + SP500_ENDPOINT
+        headers = {"X-Api-Key": API_NINJAS_KEY}
+
+        client = get_http_client()
+        response = await client.get(
+            url, headers=headers, timeout=host_timeout(url)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def ticker_page(self, exchange: str, cursor: str | None) -> dict:
+        params = {"apiKey": MASSIVE_API_KEY}
+        if cursor is None:
+            url = MASSIVE_BASE_URL + MASSIVE_All_Tickers_ENDPOINT
+            params.update(
+                {
+                    "market": "stocks",
+                    "exchange": EXCHANGE_CODES[exchange],
+                    "limit": PAGE_LIMIT,
+                }
+            )
+        else:
+            # next_url already carries the query, only the key is added
+            url = cursor
+
+        client = get_http_client()
+        response = await client.get(
+            url, params=params, timeout=host_timeout(url)
+        )
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,369 @@
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+from string import ascii_uppercase
+
+import numpy as np
+import pandas as pd
+
+from .base import MarketDataProvider
+
+EXCHANGE_TZ = "America/New_York"
+HISTORY_START = "2000-01-03"
+SP500_SIZE = 500
+PAGE_SIZE = 1000
+INTRADAY_SESSIONS = 60
+# Generated daily histories kept per provider, dropped when the day rolls
+DAILY_CACHE_SIZE = 1024
+BARS_PER_SESSION = {"5m": 78, "30m": 13}
+EXCHANGES = ["nyse", "nasdaq"]
+SECTORS = [
+    "Information Technology",
+    "Health Care",
+    "Financials",
+    "Consumer Discretionary",
+    "Communication Services",
+    "Industrials",
+    "Consumer Staples",
+    "Energy",
+    "Utilities",
+    "Real Estate",
+    "Materials",
+]
+PERIODS = {
+    "1d": pd.DateOffset(days=5),
+    "5d": pd.DateOffset(days=7),
+    "1wk": pd.DateOffset(weeks=1),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "60d": pd.DateOffset(days=60),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+RESAMPLE_RULES = {"1wk": "W-MON", "1mo": "MS"}
+
+
+def make_symbols(count: int) -> list[str]:
+    """Deterministic 4-letter symbols: AAAA, AAAB, ..."""
+    symbols = []
+    for n in range(count):
+        letters = []
+        for _ in range(4):
+            n, r = divmod(n, 26)
+            letters.append(ascii_uppercase[r])
+        symbols.append("".join(reversed(letters)))
+    return symbols
+
+
+def market_today() -> pd.Timestamp:
+    """Today's date in exchange time, as a naive midnight Timestamp."""
+    return pd.Timestamp.now(tz=EXCHANGE_TZ).normalize().tz_localize(None)
+
+
+@lru_cache(maxsize=2)
+def trading_days(today: pd.Timestamp) -> pd.DatetimeIndex:
+    """Weekdays from HISTORY_START to today, shared by every ticker."""
+    return pd.bdate_range(HISTORY_START, today, tz=EXCHANGE_TZ)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Offline market data: recorded fixtures first, generated data otherwise.
+
+    Every ticker gets a deterministic geometric random walk seeded from
+    (seed, ticker), so the same request always returns the same bars.
+    Any symbol works, the universe only decides which tickers appear in
+    the constituent and exchange lists.
+
+    Fixtures (all optional) live under fixtures_dir:
+        sp500.json, tickers_<exchange>.json, info/<TICKER>.json,
+        history/<TICKER>_<interval>.csv
+
+    Args:
+        tickers: Size of the ticker universe
+        seed: Base seed of every random walk
+        fixtures_dir: Directory of recorded fixtures
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self, tickers: int = 500, seed: int = 42, fixtures_dir: str = None
+    ):
+        self.symbols = make_symbols(tickers)
+        self.seed = seed
+        self.fixtures_dir = fixtures_dir
+        # Daily histories of the day in self._daily_day, by ticker
+        self._daily_cache = {}
+        self._daily_day = None
+
+    # Fixtures
+
+    def _fixture_path(self, *parts):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, *parts)
+        return path if os.path.exists(path) else None
+
+    def _load_json(self, *parts):
+        path = self._fixture_path(*parts)
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _load_history(self, ticker, interval):
+        path = self._fixture_path("history", f"{ticker}_{interval}.csv")
+        if path is None:
+            return None
+        frame = pd.read_csv(path, index_col=0)
+        frame.index = pd.to_datetime(frame.index, utc=True).tz_convert(
+            EXCHANGE_TZ
+        )
+        return frame
+
+    # Generated data
+
+    def _rng(self, *parts):
+        key = zlib.crc32(":".join(parts).encode())
+        return np.random.default_rng([self.seed, key])
+
+    def _daily(self, ticker: str) -> pd.DataFrame:
+        """
+        Full daily OHLCV history up to today.
+
+        Histories are cached for the day they were built on, so a
+        long-running provider extends them once the date changes.
+        """
+        today = market_today()
+        if self._daily_day != today:
+            self._daily_cache = {}
+            self._daily_day = today
+
+        daily = self._daily_cache.get(ticker)
+        if daily is None:
+            if len(self._daily_cache) >= DAILY_CACHE_SIZE:
+                # Evict the oldest entry
+                self._daily_cache.pop(next(iter(self._daily_cache)), None)
+            daily = self._build_daily(ticker, today)
+            self._daily_cache[ticker] = daily
+        return daily
+
+    def _build_daily(self, ticker: str, today: pd.Timestamp) -> pd.DataFrame:
+        """Daily OHLCV history up to today, recorded or generated."""
+        recorded = self._load_history(ticker, "1d")
+        if recorded is not None:
+            return recorded
+
+        dates = trading_days(today)
+        rng = self._rng(ticker, "1d")
+
+        start_price = rng.uniform(10, 300)
+        returns = rng.normal(0.0003, 0.02, len(dates))
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = close * np.exp(rng.normal(0, 0.005, len(dates)))
+        spread = np.abs(rng.normal(0, 0.01, len(dates)))
+
+        return pd.DataFrame(
+            {
+                "Open": open_,
+                "High": np.maximum(open_, close) * (1 + spread),
+                "Low": np.minimum(open_, close) * (1 - spread),
+                "Close": close,
+                "Volume": rng.integers(100_000, 50_000_000, len(dates)),
+            },
+            index=dates,
+        )
+
+    def _intraday(self, ticker: str, interval: str) -> pd.DataFrame:
+        """Intraday bars for the last INTRADAY_SESSIONS sessions."""
+        recorded = self._load_history(ticker, interval)
+        if recorded is not None:
+            return recorded
+
+        first = -(INTRADAY_SESSIONS + 1)
+        daily = self._daily(ticker).iloc[first:]
+        sessions = daily.index[1:]
+        bars = BARS_PER_SESSION[interval]
+        step = timedelta(minutes=390 // bars)
+
+        # Each session walks from the previous close, all in one pass
+        rng = self._rng(ticker, interval)
+        steps = rng.normal(0, 0.02 / np.sqrt(bars), (len(sessions), bars))
+        prev_close = daily["Close"].to_numpy()[:-1, None]
+        close = (prev_close * np.exp(np.cumsum(steps, axis=1))).ravel()
+
+        opens = sessions + timedelta(hours=9, minutes=30)
+        index = pd.DatetimeIndex(
+            [o + step * i for o in opens for i in range(bars)]
+        )
+        frame = pd.DataFrame(
+            {
+                "Open": close,
+                "High": close,
+                "Low": close,
+                "Close": close,
+                "Volume": rng.integers(1_000, 500_000, len(close)),
+            },
+            index=index,
+        )
+        return frame[frame.index <= pd.Timestamp.now(tz=EXCHANGE_TZ)]
+
+    def history(self, ticker: str, **params) -> pd.DataFrame:
+        interval = params.get("interval", "1d")
+        symbol = ticker.upper()
+
+        if interval in BARS_PER_SESSION:
+            frame = self._intraday(symbol, interval)
+        else:
+            frame = self._daily(symbol)
+            if interval in RESAMPLE_RULES:
+                frame = (
+                    frame.resample(RESAMPLE_RULES[interval])
+                    .agg(
+                        {
+                            "Open": "first",
+                            "High": "max",
+                            "Low": "min",
+                            "Close": "last",
+                            "Volume": "sum",
+                        }
+                    )
+                    .dropna()
+                )
+
+        period = params.get("period")
+        if period and period != "max" and not frame.empty:
+            if period == "ytd":
+                start = frame.index[-1].replace(month=1, day=1)
+            else:
+                start = frame.index[-1] - PERIODS[period]
+            frame = frame[frame.index >= start]
+
+        if params.get("start") is not None:
+            frame = frame[frame.index >= pd.Timestamp(params["start"])]
+        if params.get("end") is not None:
+            frame = frame[frame.index <= pd.Timestamp(params["end"])]
+        return frame.copy()
+
+    def history_many(self, tickers: list[str], **params):
+        histories = {t: self.history(t, **params) for t in tickers}
+        return {t: bars for t, bars in histories.items() if not bars.empty}
+
+    def download(self, tickers: list[str], period: str, interval: str):
+        frames = {
+            t: self.history(t, period=period, interval=interval)
+            for t in tickers
+        }
+        combined = pd.concat(frames, axis=1)
+        return combined.swaplevel(axis=1).sort_index(axis=1)
+
+    def info(self, ticker: str) -> dict:
+        symbol = ticker.upper()
+        recorded = self._load_json("info", f"{symbol}.json")
+        if recorded is not None:
+            return recorded
+
+        daily = self._daily(symbol)
+        close = daily["Close"]
+        last, previous = float(close.iloc[-1]), float(close.iloc[-2])
+        year = close.iloc[-252:]
+        rng = self._rng(symbol, "info")
+        shares = float(rng.uniform(1e8, 1e10))
+        eps = float(last / rng.uniform(10, 40))
+        name = f"{symbol} Synthetic Corp"
+
+        return {
+            "symbol": symbol,
+            "shortName": name,
+            "longName": name,
+            "fullExchangeName": "NasdaqGS",
+            "sector": SECTORS[zlib.crc32(symbol.encode()) % len(SECTORS)],
+            "longBusinessSummary": f"{name} is a generated company.",
+            "companyOfficers": [{"title": "CEO", "name": "Jane Doe"}],
+            "city": "New York",
+            "state": "NY",
+            "country": "United States",
+            "fullTimeEmployees": int(rng.integers(100, 200_000)),
+            "website": f"https://{symbol.lower()}.example.com",
+            "currentPrice": round(last, 2),
+            "previousClose": round(previous, 2),
+            "regularMarketChangePercent": (last / previous - 1) * 100,
+            "marketCap": int(last * shares),
+            "sharesOutstanding": int(shares),
+            "floatShares": int(shares * 0.9),
+            "trailingEps": eps,
+            "trailingPE": last / eps,
+            "forwardPE": last / (eps * 1.1),
+            "priceToSalesTrailing12Months": float(rng.uniform(1, 15)),
+            "priceToBook": float(rng.uniform(1, 20)),
+            "fiftyTwoWeekHigh": float(year.max()),
+            "fiftyTwoWeekLow": float(year.min()),
+            "52WeekChange": float(last / year.iloc[0] - 1),
+            "debtToEquity": float(rng.uniform(0, 200)),
+            "currentRatio": float(rng.uniform(0.5, 3)),
+            "profitMargins": float(rng.uniform(-0.1, 0.4)),
+            "returnOnEquity": float(rng.uniform(-0.1, 0.5)),
+            "volume": int(daily["Volume"].iloc[-1]),
+            "averageVolume": int(daily["Volume"].iloc[-63:].mean()),
+            "beta": float(rng.uniform(0.5, 2)),
+            "bid": round(last * 0.999, 2),
+            "ask": round(last * 1.001, 2),
+            "dayHigh": float(daily["High"].iloc[-1]),
+            "dayLow": float(daily["Low"].iloc[-1]),
+            "earningsTimestamp": int(
+                (datetime.now() + timedelta(days=30)).timestamp()
+            ),
+            "marketState": "CLOSED",
+        }
+
+    def shares_outstanding(self, ticker: str) -> float:
+        return self.info(ticker)["sharesOutstanding"]
+
+    async def sp500_constituents(self) -> list[dict]:
+        recorded = self._load_json("sp500.json")
+        if recorded is not None:
+            return recorded
+
+        return [
+            {
+                "ticker": symbol,
+                "company_name": f"{symbol} Synthetic Corp",
+                "sector": SECTORS[zlib.crc32(symbol.encode()) % len(SECTORS)],
+            }
+            for symbol in self.symbols[:SP500_SIZE]
+        ]
+
+    async def ticker_page(self, exchange: str, cursor: str | None) -> dict:
+        recorded = self._load_json(f"tickers_{exchange}.json")
+        if recorded is not None:
+            return {"results": recorded, "next_url": None}
+
+        # Alternate the universe between the exchanges
+        offset = EXCHANGES.index(exchange)
+        symbols = [
+            s
+            for i, s in enumerate(self.symbols)
+            if i % len(EXCHANGES) == offset
+        ]
+        page = int(cursor.rsplit("=", 1)[1]) if cursor else 0
+
+        start = page * PAGE_SIZE
+        results = [
+            {"ticker": s, "name": f"{s} Synthetic Corp"}
+            for s in symbols[start:][:PAGE_SIZE]
+        ]
+        next_page = page + 1
+        has_more = next_page * PAGE_SIZE < len(symbols)
+        return {
+            "results": results,
+            "next_url": (
+                f"synthetic://tickers/{exchange}?page={next_page}"
+                if has_more
+                else None
+            ),
+        }
@@ -10,6 +10,7 @@ import logging
 from ..database import get_db
 from ..models import User
 from ..schemas import UserCreate, UserLogin
+from ..middleware import TimedRoute
 from ..utils import (
     hash_password,
     verify_password,
@@ -18,7 +19,7 @@ from ..utils import (
 )
 
 load_dotenv()
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
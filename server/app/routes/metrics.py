@@ -0,0 +1,229 @@
+from fastapi import APIRouter, Response
+from anyio import to_thread
+from datetime import datetime
+import logging
+
+from ..database import engine
+from ..middleware import TimedRoute
+from ..scheduler import LAST_RUN, LEADER
+from ..services import portfolio_cache, ranges, stocks_services
+from ..services.governor import GOVERNORS
+from ..services.http_client import pool_stats
+from ..services.metrics import CACHE_REQUESTS, metric_lines, render
+from .stocks import CACHE_ALLTICKERS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"], route_class=TimedRoute)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BREAKER_STATES = ["closed", "open", "half_open"]
+
+
+def _age(timestamp, now):
+    return (now - timestamp).total_seconds() if timestamp else None
+
+
+def cache_lines() -> list[str]:
+    """Entries, ages and hit ratios of the snapshot and TTL caches."""
+    now = datetime.now()
+    snapshots = {
+        "sp500": (
+            stocks_services.CACHE["static_list"],
+            stocks_services.CACHE["static_timestamp"],
+        ),
+        "prices": (
+            stocks_services.CACHE["price_data"],
+            stocks_services.CACHE["price_timestamp"],
+        ),
+        "all_tickers": (
+            CACHE_ALLTICKERS["list"],
+            CACHE_ALLTICKERS["timestamp"],
+        ),
+    }
+    ttl_caches = {
+        cache.name: cache.stats()
+        for cache in (
+            stocks_services.INFO_CACHE,
+            stocks_services.QUOTE_CACHE,
+            ranges.DAILY_CACHE,
+            portfolio_cache.RESULT_CACHE,
+        )
+    }
+
+    def snapshot_ratio(name):
+        hits = CACHE_REQUESTS.value(cache=name, result="hit")
+        lookups = hits + sum(
+            CACHE_REQUESTS.value(cache=name, result=result)
+            for result in ("stale", "miss")
+        )
+        return hits / lookups if lookups else None
+
+    entries = [
+        ({"cache": name}, len(data) if data is not None else 0)
+        for name, (data, _) in snapshots.items()
+    ] + [({"cache": name}, s["entries"]) for name, s in ttl_caches.items()]
+    ratios = [
+        ({"cache": name}, snapshot_ratio(name)) for name in snapshots
+    ] + [({"cache": name}, s["hit_ratio"]) for name, s in ttl_caches.items()]
+
+    return (
+        metric_lines(
+            "markviz_cache_entries", "gauge", "Entries per cache", entries
+        )
+        + metric_lines(
+            "markviz_cache_age_seconds",
+            "gauge",
+            "Age of each snapshot cache",
+            [
+                ({"cache": name}, _age(timestamp, now))
+                for name, (_, timestamp) in snapshots.items()
+            ],
+        )
+        + metric_lines(
+            "markviz_cache_hit_ratio",
+            "gauge",
+            "Hits over lookups since startup",
+            ratios,
+        )
+        + metric_lines(
+            "markviz_cache_evictions_total",
+            "counter",
+            "LRU evictions per TTL cache",
+            [
+                ({"cache": name}, s["evictions"])
+                for name, s in ttl_caches.items()
+            ],
+        )
+    )
+
+
+def governor_lines() -> list[str]:
+    """Adaptive limits, in-flight calls and breaker state per provider."""
+    stats = {name: g.stats() for name, g in GOVERNORS.items()}
+
+    def per_provider(key):
+        return [({"provider": name}, s[key]) for name, s in stats.items()]
+
+    return (
+        metric_lines(
+            "markviz_upstream_concurrency_limit",
+            "gauge",
+            "Current AIMD concurrency limit",
+            per_provider("limit"),
+        )
+        + metric_lines(
+            "markviz_upstream_in_flight",
+            "gauge",
+            "Upstream calls in flight",
+            per_provider("in_flight"),
+        )
+        + metric_lines(
+            "markviz_upstream_rejections_total",
+            "counter",
+            "Calls rejected by an open breaker",
+            per_provider("rejections"),
+        )
+        + metric_lines(
+            "markviz_upstream_saturations_total",
+            "counter",
+            "Calls that timed out waiting for a permit under the limit",
+            per_provider("saturations"),
+        )
+        + metric_lines(
+            "markviz_upstream_circuit_state",
+            "gauge",
+            "1 for the breaker's current state",
+            [
+                ({"provider": name, "state": state}, int(s["state"] == state))
+                for name, s in stats.items()
+                for state in BREAKER_STATES
+            ],
+        )
+    )
+
+
+def concurrency_lines() -> list[str]:
+    """HTTP pool, AnyIO threadpool, DB pool and scheduler metrics."""
+    http = pool_stats()
+    limiter = to_thread.current_default_thread_limiter()
+    pool = engine.pool
+
+    def pool_value(method):
+        # Only QueuePool tracks checkouts, SQLite test pools do not
+        fn = getattr(pool, method, None)
+        return fn() if callable(fn) else None
+
+    return (
+        metric_lines(
+            "markviz_http_in_flight_requests",
+            "gauge",
+            "Outbound HTTP requests holding a pooled connection",
+            [({}, http["in_flight"])],
+        )
+        + metric_lines(
+            "markviz_http_pool_max_connections",
+            "gauge",
+            "Outbound HTTP connection limit",
+            [({}, http["max_connections"])],
+        )
+        + metric_lines(
+            "markviz_threadpool_busy_threads",
+            "gauge",
+            "AnyIO worker threads running sync routes and I/O",
+            [({}, limiter.borrowed_tokens)],
+        )
+        + metric_lines(
+            "markviz_threadpool_max_threads",
+            "gauge",
+            "AnyIO worker thread limit",
+            [({}, limiter.total_tokens)],
+        )
+        + metric_lines(
+            "markviz_db_pool_checked_out",
+            "gauge",
+            "DB connections in use",
+            [({}, pool_value("checkedout"))],
+        )
+        + metric_lines(
+            "markviz_db_pool_size",
+            "gauge",
+            "DB pool size",
+            [({}, pool_value("size"))],
+        )
+        + metric_lines(
+            "markviz_db_pool_overflow",
+            "gauge",
+            "DB connections opened beyond the pool size",
+            [({}, pool_value("overflow"))],
+        )
+        + metric_lines(
+            "markviz_scheduler_leader",
+            "gauge",
+            "1 if this process runs the scheduled jobs",
+            [({}, int(LEADER.is_leader))],
+        )
+        + metric_lines(
+            "markviz_scheduler_last_run_duration_seconds",
+            "gauge",
+            "Duration of the last run of each scheduled job",
+            [({"job": job}, run["duration"]) for job, run in LAST_RUN.items()],
+        )
+        + metric_lines(
+            "markviz_scheduler_last_run_success",
+            "gauge",
+            "1 if the last run of each scheduled job succeeded",
+            [
+                ({"job": job}, int(run["success"]))
+                for job, run in LAST_RUN.items()
+            ],
+        )
+    )
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of caches, upstreams and pools."""
+    body = render(cache_lines() + governor_lines() + concurrency_lines())
+    return Response(content=body, media_type=CONTENT_TYPE)
@@ -1,16 +1,32 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-import yfinance as yf
+import pandas as pd
 
 from ..schemas import HoldingCreate
 from ..database import get_db
 from ..models import User, Holding
 from .auth import get_current_user
-
-router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+from ..services import (
+    stocks_services,
+    history_store,
+    portfolio_cache,
+    portfolio_snapshots,
+)
+from ..services.downsample import downsample
+from ..services.history_store import to_utc
+from ..services.portfolio_engine import (
+    holdings_table,
+    lots_frame,
+    portfolio_returns,
+)
+from ..middleware import TimedRoute
+
+router = APIRouter(
+    prefix="/portfolio", tags=["portfolio"], route_class=TimedRoute
+)
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +38,7 @@ def add_holding(  # Changed to sync
 ):
     """Add a new stock holding to the user's portfolio."""
     try:
-        logger.info("Printing the input user: ", holding_in)
+        logger.info(f"Printing the input user: {holding_in}")
         new_holding = Holding(
             user_id=current_user.id,
             ticker=holding_in.ticker.upper(),
@@ -31,9 +47,18 @@ def add_holding(  # Changed to sync
         )
 
         db.add(new_holding)
-        db.commit()
+        db.flush()
         db.refresh(new_holding)
 
+        # Snapshots from the purchase date on are rebuilt on the next read,
+        # cached graphs and tables of the old version are no longer served.
+        # One transaction, the lot is never stored without both.
+        portfolio_snapshots.invalidate_snapshots(
+            db, current_user.id, new_holding.created_at
+        )
+        portfolio_cache.bump_holdings_version(db, current_user.id)
+        db.commit()
+
         logger.info(
             f"User {current_user.id} added holding: {holding_in.ticker}"
         )
@@ -56,95 +81,86 @@ def add_holding(  # Changed to sync
         )
 
 
-def fetch_stock_hist(
-    ticker: str, start_date: datetime, end_date: datetime, timeRange: str
-):
-    """
-    Fetch historical stock data for a given period.
-
-    Args:
-        ticker: Stock symbol
-        start_date: Start of period
-        end_date: End of period
-        timeRange: Time range string (1D, 1W, 1M, 3M, 1Y, ALL)
-
-    Returns:
-        DataFrame with historical prices
-    """
-    intervals = {
-        "1D": "5m",
-        "1W": "30m",
-        "1M": "1d",
-        "3M": "1d",
-        "1Y": "1d",
-        "ALL": "1d",
-    }
-
-    interval = intervals.get(timeRange, "1d")
-
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(start=start_date, end=end_date, interval=interval)
-        return hist
-    except Exception as e:
-        logger.warning(f"Failed to fetch history for {ticker}: {str(e)}")
-        return None
+# Bar interval of each graph range
+INTERVALS = {
+    "1D": "5m",
+    "1W": "30m",
+    "1M": "1d",
+    "3M": "1d",
+    "1Y": "1d",
+    "ALL": "1d",
+}
+# Lookback of the fixed ranges, older holdings are measured from its start
+PERIOD_DAYS = {"1W": 7, "1M": 30, "3M": 90, "1Y": 365}
+# 1D also loads the sessions before the last day, for the previous close
+PREVIOUS_CLOSE_LOOKBACK = timedelta(days=5)
+
+
+def history_window(
+    timeRange: str, now: datetime, holdings: list[Holding]
+) -> datetime:
+    """Earliest bar any holding of the graph needs."""
+    if timeRange == "1D":
+        return now - timedelta(days=1) - PREVIOUS_CLOSE_LOOKBACK
+    if timeRange == "ALL":
+        return min(to_utc(h.created_at) for h in holdings)
+    return now - timedelta(days=PERIOD_DAYS[timeRange])
 
 
 def determine_baseline(
     timeRange: str,
     purchase_date: datetime,
     now: datetime,
-    stock: yf.Ticker,
+    ticker: str,
     purchase_price: float,
-    interval: str,
+    hist: pd.DataFrame,
 ) -> tuple[float, datetime]:
     """
     Determine the baseline price and date based on timeRange.
 
+    The baseline comes from the holding's already loaded history, no
+    extra download.
+
     Returns:
         Tuple of (baseline_price, baseline_date)
     """
     try:
         if timeRange == "1D":
-            hist = stock.history(
-                start=(now - timedelta(days=1)), end=now, interval=interval
-            )
+            day = hist[hist.index >= now - timedelta(days=1)]
 
-            if hist.empty:
+            if day.empty:
                 return purchase_price, purchase_date
 
-            market_open_date = hist.index[0]
+            market_open_date = day.index[0]
 
             if purchase_date > market_open_date:
                 return purchase_price, purchase_date
-            else:
-                previous_close = float(
-                    stock.info.get("previousClose", purchase_price)
-                )
-                return previous_close, market_open_date
+
+            earlier = hist["Close"][hist.index < market_open_date]
+            if not earlier.empty:
+                return round(float(earlier.iloc[-1]), 2), market_open_date
+
+            info = stocks_services.fetch_info(ticker)
+            previous_close = float(info.get("previousClose", purchase_price))
+            return previous_close, market_open_date
 
         elif timeRange == "ALL":
             return purchase_price, purchase_date
 
         else:
             # Handle 1W, 1M, 3M, 1Y
-            period_days = {"1W": 7, "1M": 30, "3M": 90, "1Y": 365}
-            days = period_days.get(timeRange, 7)
-            period_prior_date = now - timedelta(days=days)
+            period_prior_date = now - timedelta(days=PERIOD_DAYS[timeRange])
 
             if purchase_date > period_prior_date:
                 return purchase_price, purchase_date
-            else:
-                hist = stock.history(
-                    start=period_prior_date, end=now, interval=interval
-                )
-                if hist.empty:
-                    return purchase_price, purchase_date
 
-                baseline_price = round(float(hist["Close"].iloc[0]), 2)
-                baseline_date = hist.index[0]
-                return baseline_price, baseline_date
+            window = hist[hist.index >= period_prior_date]
+            if window.empty:
+                return purchase_price, purchase_date
+
+            baseline_price = round(float(window["Close"].iloc[0]), 2)
+            baseline_date = window.index[0]
+            return baseline_price, baseline_date
 
     except Exception as e:
         logger.warning(f"Error determining baseline: {str(e)}")
@@ -152,45 +168,51 @@ def determine_baseline(
 
 
 def calculate_holding_data(
-    holding: Holding, timeRange: str, now: datetime, interval: str
+    holding: Holding,
+    timeRange: str,
+    now: datetime,
+    hist: pd.DataFrame,
 ) -> dict:
     """
     Calculate historical data for a single holding.
 
+    Args:
+        hist: The holding's history over the graph's window
+
     Returns:
-        Dict with ticker, shares, baseline info, prices, and timestamps
+        Dict with ticker, shares, baseline info and the close series,
         or None if data unavailable
     """
     try:
         ticker = holding.ticker
         purchase_price = float(holding.buy_price)
         shares = float(holding.shares)
-        purchase_date = holding.created_at
-
-        stock = yf.Ticker(ticker)
+        purchase_date = to_utc(holding.created_at)
 
         # Determine baseline
         baseline_price, baseline_date = determine_baseline(
-            timeRange, purchase_date, now, stock, purchase_price, interval
+            timeRange,
+            purchase_date,
+            now,
+            ticker,
+            purchase_price,
+            hist,
         )
 
-        # Fetch filtered historical data
-        hist_filtered = fetch_stock_hist(ticker, baseline_date, now, timeRange)
+        hist_filtered = hist[
+            (hist.index >= baseline_date) & (hist.index <= now)
+        ]
 
-        if hist_filtered is None or hist_filtered.empty:
+        if hist_filtered.empty:
             logger.warning(f"No historical data for {ticker}")
             return None
 
-        prices = hist_filtered["Close"].round(2).tolist()
-        position_values = [p * shares for p in prices]
-
         return {
             "ticker": ticker,
             "shares": shares,
             "baseline_price": baseline_price,
             "baseline_value": baseline_price * shares,
-            "position_values": position_values,
-            "timestamps": hist_filtered.index.tolist(),
+            "closes": hist_filtered["Close"].round(2),
         }
 
     except Exception as e:
@@ -200,65 +222,94 @@ def calculate_holding_data(
         return None
 
 
-def calculate_portfolio_returns(
-    all_holdings_data: list[dict], interval: str
-) -> list[dict]:
+def portfolio_graph(
+    db: Session, user_id: int, timeRange: str, maxPoints: int | None
+) -> dict:
     """
-    Calculate weighted average portfolio returns from individual holdings data.
+    Compute the portfolio performance graph of a user.
 
     Returns:
-        List of dicts with date and value (return percentage)
+        Dict with the graph points (data) and holdings_count
     """
-    if not all_holdings_data:
-        return []
-
-    # Use the timestamps from the first holding as reference
-    reference_timestamps = all_holdings_data[0]["timestamps"]
-
-    portfolio_data = []
-
-    for i, timestamp in enumerate(reference_timestamps):
-        total_current_value = 0
-        total_baseline_value = 0
-
-        for holding_data in all_holdings_data:
-            # Check if this holding has data for this timestamp
-            if i < len(holding_data["position_values"]):
-                total_current_value += holding_data["position_values"][i]
-                total_baseline_value += holding_data["baseline_value"]
-
-        # Calculate portfolio return percentage
-        if total_baseline_value > 0:
-            portfolio_return = round(
-                (
-                    (total_current_value - total_baseline_value)
-                    / total_baseline_value
-                )
-                * 100,
-                2,
-            )
-        else:
-            portfolio_return = 0
-
-        portfolio_data.append(
-            {
-                "date": timestamp.strftime(
-                    "%H:%M" if interval == "5m" else "%Y-%m-%d"
-                ),
-                "value": portfolio_return,
-            }
+    # Get all holdings
+    holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
+
+    if not holdings:
+        return {"data": [], "holdings_count": 0}
+
+    now = datetime.now(timezone.utc)
+
+    # Long ranges come from the daily snapshots, no raw price history
+    if timeRange in portfolio_snapshots.SNAPSHOT_RANGES:
+        portfolio_data, holdings_count = portfolio_snapshots.snapshot_graph(
+            db, user_id, holdings, timeRange, now
         )
+        logger.info(
+            f"User {user_id} fetched portfolio graph "
+            f"({timeRange}) from snapshots"
+        )
+        return {
+            "data": downsample(
+                portfolio_data,
+                [point["value"] for point in portfolio_data],
+                maxPoints,
+            ),
+            "holdings_count": holdings_count,
+        }
 
-    return portfolio_data
+    interval = INTERVALS[timeRange]
+
+    # One batched history load for every ticker in the portfolio
+    histories = history_store.get_histories(
+        db,
+        [holding.ticker for holding in holdings],
+        interval,
+        start=history_window(timeRange, now, holdings),
+        end=now,
+    )
+
+    # Calculate data for each holding
+    all_holdings_data = []
+    for holding in holdings:
+        holding_data = calculate_holding_data(
+            holding, timeRange, now, histories[holding.ticker.upper()]
+        )
+        if holding_data:
+            all_holdings_data.append(holding_data)
+
+    if not all_holdings_data:
+        logger.warning(f"No data available for user {user_id}")
+        return {"data": [], "holdings_count": 0}
+
+    # Calculate weighted portfolio returns
+    portfolio_data = portfolio_returns(all_holdings_data, interval)
+    portfolio_data = downsample(
+        portfolio_data,
+        [point["value"] for point in portfolio_data],
+        maxPoints,
+    )
+
+    logger.info(f"User {user_id} fetched portfolio graph ({timeRange})")
+    return {
+        "data": portfolio_data,
+        "holdings_count": len(all_holdings_data),
+    }
 
 
 @router.get("/graph")
 def get_portfolio(  # Changed to sync
     timeRange: str,
+    maxPoints: int | None = Query(default=None, ge=3),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get portfolio performance graph data for a specific time range."""
+    """
+    Get portfolio performance graph data for a specific time range.
+
+    maxPoints optionally caps the number of points with LTTB downsampling.
+    Graphs are cached per user until their holdings change or the range's
+    TTL runs out.
+    """
 
     # Validate timeRange
     valid_ranges = ["1D", "1W", "1M", "3M", "1Y", "ALL"]
@@ -269,53 +320,13 @@ def get_portfolio(  # Changed to sync
         )
 
     try:
-        # Get all holdings
-        holdings = (
-            db.query(Holding).filter(Holding.user_id == current_user.id).all()
-        )
-
-        if not holdings:
-            return {"data": [], "holdings_count": 0}
-
-        # Set timezone-aware now
-        now = datetime.now(holdings[0].created_at.tzinfo)
-
-        # Define interval
-        intervals = {
-            "1D": "5m",
-            "1W": "30m",
-            "1M": "1d",
-            "3M": "1d",
-            "1Y": "1d",
-            "ALL": "1d",
-        }
-        interval = intervals[timeRange]
-
-        # Calculate data for each holding
-        all_holdings_data = []
-        for holding in holdings:
-            holding_data = calculate_holding_data(
-                holding, timeRange, now, interval
-            )
-            if holding_data:
-                all_holdings_data.append(holding_data)
-
-        if not all_holdings_data:
-            logger.warning(f"No data available for user {current_user.id}")
-            return {"data": [], "holdings_count": 0}
-
-        # Calculate weighted portfolio returns
-        portfolio_data = calculate_portfolio_returns(
-            all_holdings_data, interval
-        )
-
-        logger.info(
-            f"User {current_user.id} fetched portfolio graph ({timeRange})"
+        return portfolio_cache.cached_result(
+            db,
+            current_user.id,
+            ("graph", timeRange, maxPoints),
+            portfolio_cache.GRAPH_TTLS[timeRange],
+            lambda: portfolio_graph(db, current_user.id, timeRange, maxPoints),
         )
-        return {
-            "data": portfolio_data,
-            "holdings_count": len(all_holdings_data),
-        }
 
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
@@ -328,80 +339,63 @@ def get_portfolio(  # Changed to sync
         )
 
 
+def portfolio_table(db: Session, user_id: int, by_ticker: bool) -> dict:
+    """
+    Value every holding of a user at current quotes.
+
+    Returns:
+        Dict with the table rows (data)
+    """
+    holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
+
+    if not holdings:
+        return {"data": []}
+
+    lots = lots_frame(holdings)
+    tickers = lots["ticker"].unique().tolist()
+    quotes = stocks_services.fetch_quotes(tickers)
+    names = stocks_services.ticker_names(db, list(quotes))
+
+    # Lots of tickers without a quote are skipped
+    data = holdings_table(
+        lots,
+        {
+            ticker: {**quote, "name": names.get(ticker, "N/A")}
+            for ticker, quote in quotes.items()
+        },
+        by_ticker=by_ticker,
+    )
+
+    logger.info(f"User {user_id} fetched portfolio table")
+    return {"data": data}
+
+
 @router.get("/table")
 def get_portfolio_table(  # Changed to sync
+    byTicker: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Get current portfolio holdings with prices and returns."""
+    """
+    Get current portfolio holdings with prices and returns.
+
+    Lots are grouped by ticker before any market data is fetched, so
+    every symbol is quoted once however many lots it has. Quotes come
+    from the price caches, only tickers missing from them are downloaded
+    (in one batch). byTicker returns one aggregated row per ticker
+    instead of one per lot. Tables are cached per user until their
+    holdings change or the quotes expire.
+    """
 
     try:
-        holdings = (
-            db.query(Holding).filter(Holding.user_id == current_user.id).all()
+        return portfolio_cache.cached_result(
+            db,
+            current_user.id,
+            ("table", byTicker),
+            portfolio_cache.TABLE_TTL,
+            lambda: portfolio_table(db, current_user.id, byTicker),
         )
 
-        if not holdings:
-            return {"data": []}
-
-        data = []
-        for h in holdings:
-            try:
-                stock = yf.Ticker(h.ticker)
-                info = stock.info
-
-                name = info.get("longName", "N/A")
-                current_price = info.get("currentPrice", 0)
-                previous_close = info.get("previousClose", 0)
-
-                # Calculate metrics with safety checks
-                shares = float(h.shares)
-                buy_price = float(h.buy_price)
-
-                total_value = (
-                    round(current_price * shares, 2) if current_price else 0
-                )
-
-                today_change = (
-                    round(((current_price / previous_close) - 1) * 100, 2)
-                    if current_price and previous_close
-                    else 0
-                )
-
-                all_time_return = (
-                    round(((current_price / buy_price) - 1) * 100, 2)
-                    if current_price and buy_price
-                    else 0
-                )
-
-                all_time_return_amount = (
-                    round((current_price - buy_price) * shares, 2)
-                    if current_price and buy_price
-                    else 0
-                )
-
-                data.append(
-                    {
-                        "ticker": h.ticker,
-                        "name": name,
-                        "shares": shares,
-                        "currentPrice": current_price,
-                        "totalValue": total_value,
-                        "todayChangePercent": today_change,
-                        "allTimeReturn": all_time_return,
-                        "allTimeReturnAmount": all_time_return_amount,
-                    }
-                )
-
-            except Exception as e:
-                logger.warning(
-                    f"Failed to fetch data for {h.ticker}: {str(e)}"
-                )
-                # Skip this holding and continue
-                continue
-
-        logger.info(f"User {current_user.id} fetched portfolio table")
-        return {"data": data}
-
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
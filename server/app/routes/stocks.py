@@ -1,33 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import pytz
 import httpx
-import yfinance as yf
 import logging
 import asyncio
-from ..services import stocks_services
+from ..database import get_db
+from ..services import stocks_services, ranges, ticker_crawler
+from ..services.downsample import lttb_indices
+from ..services.search import TICKER_INDEX
+from ..services.metrics import CACHE_REQUESTS
+from ..services.disk_snapshot import DiskSnapshot
+from ..services.shared_cache import SharedSnapshot
+from ..middleware import TimedRoute
 
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/stocks", tags=["stocks"])
+router = APIRouter(prefix="/stocks", tags=["stocks"], route_class=TimedRoute)
 
 
 @router.get("/sp500")
-async def get_sp500():
+async def get_sp500(response: Response):
     """
     Return S&P 500 stocks with current prices and market data.
 
+    The Age and X-Cache-Status headers report how old the price snapshot
+    is and whether it is being refreshed in the background.
+
     Returns:
         JSON with list of stocks including ticker, name, sector, price, change%, market cap
     """
     # Fetch static list if needed (cached for 1 day)
     stocks = await stocks_services.fetch_sp500_constituents()
 
-    # Fetch price data if needed (cached for 20 minutes)
+    # Fetch price data (stale-while-revalidate, NYSE-session TTL)
     price_data = await stocks_services.fetch_price_data()
 
+    age = stocks_services.price_data_age()
+    if age is not None:
+        response.headers["Age"] = str(age)
+        response.headers["X-Cache-Status"] = (
+            "STALE" if stocks_services.is_price_data_stale() else "FRESH"
+        )
+
     # Combine static and price data
     result = []
     for stock in stocks:
@@ -38,51 +55,68 @@ async def get_sp500():
     return {"data": result}
 
 
+@router.get("/search")
+async def search_tickers(
+    q: str = Query(min_length=1, max_length=50),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    """
+    Search NYSE and NASDAQ tickers by symbol or company name.
+
+    Args:
+        q: Search text (e.g. "AA", "apple")
+        limit: Maximum number of results
+
+    Returns:
+        Ranked list of dicts with ticker, name, exchange
+    """
+    if not len(TICKER_INDEX):
+        TICKER_INDEX.update(await load_all_tickers())
+
+    return {"data": TICKER_INDEX.search(q, limit)}
+
+
 @router.get("/{ticker}")
-def get_stock_info(ticker: str, timeRange: str):
-    """Get historical price data and current info for a stock."""
+def get_stock_info(
+    ticker: str,
+    timeRange: str,
+    maxPoints: int | None = Query(default=None, ge=3),
+    db: Session = Depends(get_db),
+):
+    """
+    Get historical price data and current info for a stock.
+
+    1D and 1W come from stored intraday bars. Every other range is cut
+    from one stored daily series, so switching ranges costs no upstream
+    call once that series is warm.
+
+    maxPoints optionally caps the number of chart points (LTTB
+    downsampling keeps the visual shape of the chart).
+    """
     try:
-        stock = yf.Ticker(ticker)
-        config = {
-            "1D": ("1d", "5m"),
-            "1W": ("1wk", "30m"),
-            "1M": ("1mo", "1d"),
-            "3M": ("3mo", "1d"),
-            "6M": ("6mo", "1d"),
-            "YTD": ("ytd", "1d"),
-            "1Y": ("2y", "1d"),
-            "5Y": ("5y", "1wk"),
-            "MAX": ("max", "1mo"),
-        }
-        if timeRange not in config:
+        if timeRange not in ranges.TIME_RANGES:
             logger.error("Invalid time range")
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid time range. Must be one of: {list(config.keys())}",
+                detail=f"Invalid time range. Must be one of: {ranges.TIME_RANGES}",
             )
 
-        period, interval = config.get(timeRange)
-        hist = stock.history(period=period, interval=interval)
+        closes = ranges.build_range(db, ticker, timeRange)
 
-        if hist.empty:
+        if closes.empty:
             logger.error("Was not able to fetch data")
             raise HTTPException(
                 status_code=404, detail="No data available for this ticker"
             )
-        # Format labels
-        if timeRange == "1D":
-            labels = hist.index.strftime("%H:%M").tolist()
-        elif interval == "1mo":
-            labels = hist.index.strftime("%Y").tolist()
-        elif interval == "1wk":
-            labels = hist.index.strftime("%b %Y").tolist()
-        else:
-            labels = hist.index.strftime("%b %d").tolist()
-
-        prices = hist["Close"].round(2).tolist()
-
-        # Fetch stock info once
-        info = stock.info
+
+        if maxPoints:
+            closes = closes.iloc[lttb_indices(closes.to_numpy(), maxPoints)]
+
+        labels = ranges.format_labels(closes.index, timeRange)
+        prices = closes.round(2).tolist()
+
+        # Fetch stock info once (shared per-ticker cache)
+        info = stocks_services.fetch_info(ticker)
         name = info.get("shortName", "N/A")
         exchange = info.get("fullExchangeName", "N/A")
         current_price = info.get("currentPrice", 0)
@@ -108,6 +142,9 @@ def get_stock_info(ticker: str, timeRange: str):
         )
         return {"data": data, "stockDetail": detail}
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Failed to fetch {ticker}: {str(e)}")
         raise HTTPException(
@@ -270,6 +307,7 @@ def get_summary(ticker: str):
             ),
             "bid_ask": f"{stocks_services.get(ticker, 'bid', 0)} / {stocks_services.get(ticker, 'ask', 0)}",
             "day_high": stocks_services.get(
+                ticker,
                 "dayHigh",
                 stocks_services.get(ticker, "regularMarketDayHigh", "N/A"),
             ),
@@ -300,47 +338,96 @@ CACHE_ALLTICKERS = {
     "timestamp": None,
 }
 CACHE_ALLTICKERS_DURATION = timedelta(days=1)
+SHARED_ALLTICKERS = SharedSnapshot("all_tickers")
+DISK_ALLTICKERS = DiskSnapshot("all_tickers")
 
+# Background refresh of the snapshots restored at boot
+WARM_START = {"task": None}
 
-@router.get("/all/tickers")
-async def get_all_tickers():
+
+async def adopt_shared_tickers(force: bool = False) -> bool:
+    """Swap in a newer ticker list published by another worker."""
+    shared = await SHARED_ALLTICKERS.poll_async(force=force)
+    if shared is None:
+        return False
+
+    tickers, timestamp = shared
+    if (
+        CACHE_ALLTICKERS["timestamp"] is not None
+        and timestamp <= CACHE_ALLTICKERS["timestamp"]
+    ):
+        return False
+
+    CACHE_ALLTICKERS["list"] = tickers
+    CACHE_ALLTICKERS["timestamp"] = timestamp
+    TICKER_INDEX.update(tickers)
+    return True
+
+
+async def load_all_tickers(force: bool = False):
     """
-    Get all stock tickers from NYSE and NASDAQ exchanges.
+    Return all NYSE and NASDAQ tickers, refreshing the cache once a day.
 
-    Returns cached data if less than 1 day old.
-    Falls back to stale cache if API fails.
+    Every refresh is applied to the search index incrementally, and
+    shared with the other workers.
+    Falls back to stale cache if the API fails.
+
+    Args:
+        force: Re-crawl both exchanges even if the cache and the last
+            crawl are fresh (the daily scheduled refresh)
     """
 
-    async with stocks_services.cache_lock:
+    async with stocks_services.tickers_lock:
         now = datetime.now()
+        await adopt_shared_tickers()
 
         # Return cached if fresh
         if (
-            CACHE_ALLTICKERS["list"] is not None
+            not force
+            and CACHE_ALLTICKERS["list"] is not None
             and (now - CACHE_ALLTICKERS["timestamp"])
             < CACHE_ALLTICKERS_DURATION
         ):
             logger.info("Returning cached ticker data")
-            return {"data": CACHE_ALLTICKERS["list"]}
+            CACHE_REQUESTS.inc(cache="all_tickers", result="hit")
+            return CACHE_ALLTICKERS["list"]
+
+        if (
+            not force
+            and await adopt_shared_tickers(force=True)
+            and now - CACHE_ALLTICKERS["timestamp"] < CACHE_ALLTICKERS_DURATION
+        ):
+            CACHE_REQUESTS.inc(cache="all_tickers", result="hit")
+            return CACHE_ALLTICKERS["list"]
+
+        CACHE_REQUESTS.inc(cache="all_tickers", result="miss")
         try:
             logger.info("Fetching fresh ticker data from NYSE and NASDAQ")
             nyse, nasdaq = await asyncio.gather(
-                stocks_services.fetch_tickers("nyse"),
-                stocks_services.fetch_tickers("nasdaq"),
+                stocks_services.fetch_tickers("nyse", force=force),
+                stocks_services.fetch_tickers("nasdaq", force=force),
             )
             tickers = nyse + nasdaq
 
             CACHE_ALLTICKERS["list"] = tickers
             CACHE_ALLTICKERS["timestamp"] = now
+            await SHARED_ALLTICKERS.publish_async(tickers, now)
+            await asyncio.to_thread(DISK_ALLTICKERS.save, tickers, now)
+
+            # Only re-index when the crawl found added or delisted tickers
+            if not len(TICKER_INDEX) or ticker_crawler.has_changes(
+                ["nyse", "nasdaq"]
+            ):
+                TICKER_INDEX.update(tickers)
 
             logger.info(f"Cached {len(tickers)} tickers")
-            return {"data": CACHE_ALLTICKERS["list"]}
+            return CACHE_ALLTICKERS["list"]
 
         except HTTPException:
             # If API fails, return stale cache if available
             if CACHE_ALLTICKERS["list"] is not None:
                 logger.warning("API failed, returning stale cached data")
-                return {"data": CACHE_ALLTICKERS["list"]}
+                return CACHE_ALLTICKERS["list"]
             raise
 
         except Exception as e:
@@ -348,8 +435,57 @@ async def get_all_tickers():
             # Return stale cache if available
             if CACHE_ALLTICKERS["list"] is not None:
                 logger.warning("Unexpected error, returning stale cached data")
-                return {"data": CACHE_ALLTICKERS["list"]}
+                return CACHE_ALLTICKERS["list"]
 
             raise HTTPException(
                 status_code=500, detail="Failed to fetch ticker data"
             )
+
+
+async def refresh_restored():
+    """Refresh whatever the boot snapshots left stale, in the background."""
+    try:
+        # Each call only goes upstream when its cache expired
+        await stocks_services.fetch_sp500_constituents()
+        await stocks_services.fetch_price_data()
+        await load_all_tickers()
+    except Exception as e:
+        logger.warning(f"Refresh after warm start failed: {str(e)}")
+
+
+def restore_caches():
+    """
+    Serve the disk snapshots right away after a restart.
+
+    Loads the constituents, prices and ticker list written by the last
+    refreshes, then starts a background refresh of the stale ones.
+
+    Returns:
+        The background refresh task, None if nothing was restored
+    """
+    restored = stocks_services.restore_snapshots()
+
+    loaded = DISK_ALLTICKERS.load()
+    if loaded is not None and CACHE_ALLTICKERS["list"] is None:
+        CACHE_ALLTICKERS["list"], CACHE_ALLTICKERS["timestamp"] = loaded
+        TICKER_INDEX.update(CACHE_ALLTICKERS["list"])
+        restored.append("all_tickers")
+
+    if not restored:
+        return None
+
+    logger.info(f"Warm start from disk snapshots: {', '.join(restored)}")
+    WARM_START["task"] = asyncio.create_task(refresh_restored())
+    return WARM_START["task"]
+
+
+@router.get("/all/tickers")
+async def get_all_tickers():
+    """
+    Get all stock tickers from NYSE and NASDAQ exchanges.
+
+    Returns cached data if less than 1 day old.
+    Falls back to stale cache if API fails.
+    Prefer /stocks/search for the search bar.
+    """
+    return {"data": await load_all_tickers()}
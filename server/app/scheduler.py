@@ -1,48 +1,228 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy.exc import SQLAlchemyError
+import asyncio
 import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from .config import (
+    LEADER_ELECTION_SECONDS,
+    LEADER_LOCK_FILE,
+    LEADER_LOCK_ID,
+    PREOPEN_WARM_MINUTES,
+    QUOTE_REFRESH_MINUTES,
+)
+from .database import SessionLocal, engine
+from .models import JobRun
+from .services import market_calendar
+from .services.leader import WORKER_ID, LeaderLock
 
 logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
+# Only the leader runs jobs, the others get the results from the shared
+# cache tier
+LEADER = LeaderLock(engine, LEADER_LOCK_ID, LEADER_LOCK_FILE)
+
+# Outcome of the last run of each job in this process, exported by
+# /metrics: job -> finished_at, duration, success
+LAST_RUN = {}
+
 
 async def refresh_stock_data():
     """
     Background task to refresh s&p 500 data at 5 am daily
     """
+    logger.info(
+        "Starting scheduled S&P 500 and NYSE and Nasdaq ticker data refresh"
+    )
+    from .routes.stocks import load_all_tickers
+    from .services.stocks_services import fetch_sp500_constituents
+
+    await fetch_sp500_constituents()
+    # The previous run's crawl is less than CRAWL_DURATION old here,
+    # forced so it is not skipped every other day. Going through
+    # load_all_tickers updates the search index and the shared and disk
+    # snapshots, so the other workers pick up the changes.
+    await load_all_tickers(force=True)
+    logger.info(
+        "S&P 500 and NYSE and Nasdaq ticker data refreshed successfully"
+    )
+
+
+async def refresh_quotes():
+    """
+    Rebuild the S&P 500 price snapshot.
+    """
+    from .services.stocks_services import (
+        fetch_sp500_constituents,
+        refresh_price_data,
+    )
+
+    await fetch_sp500_constituents()
+    await refresh_price_data()
+
+
+async def refresh_quotes_if_due():
+    """
+    Refresh quotes every tick during a session, otherwise only when the
+    snapshot expired (the first tick after the close, or a cold cache).
+    """
+    from .services.stocks_services import is_price_data_stale
+
+    if market_calendar.is_open() or is_price_data_stale():
+        await run_job("refresh_quotes", refresh_quotes)
+
+
+async def warm_caches():
+    """
+    Load constituents and quotes before the open on trading days.
+    """
+    today = datetime.now(market_calendar.EXCHANGE_TZ).date()
+    if not market_calendar.is_trading_day(today):
+        logger.info(f"No NYSE session on {today}, skipping cache warm-up")
+        return
+    await refresh_quotes()
+
+
+async def refresh_portfolio_snapshots():
+    """
+    Nightly job: store the day's portfolio valuations after the close.
+    """
+    from .services.portfolio_snapshots import update_all_snapshots
+
+    await asyncio.to_thread(update_all_snapshots)
+
+
+def record_job_start(job: str, started_at: datetime) -> int | None:
+    """Insert a running job_runs row, None if the database is unavailable."""
+    db = SessionLocal()
     try:
-        logger.info(
-            "Starting scheduled S&P 500 and NYSE and Nasdaq ticker data refresh"
-        )
-        from .services.stocks_services import (
-            fetch_sp500_constituents,
-            fetch_tickers,
+        run = JobRun(
+            job=job, worker=WORKER_ID, started_at=started_at, status="running"
         )
+        db.add(run)
+        db.commit()
+        return run.id
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record {job} run: {str(e)}")
+        return None
+    finally:
+        db.close()
+
+
+def record_job_end(run_id: int, duration: float, error: str | None):
+    """Complete a job_runs row with its duration and outcome."""
+    db = SessionLocal()
+    try:
+        run = db.get(JobRun, run_id)
+        run.finished_at = datetime.now(timezone.utc)
+        run.duration = duration
+        run.status = "failed" if error else "success"
+        run.error = error
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record job run {run_id}: {str(e)}")
+    finally:
+        db.close()
 
-        await fetch_sp500_constituents()
-        await fetch_tickers()
-        logger.info(
-            "S&P 500 and NYSE and Nasdaq ticker data refreshed successfully"
-        )
 
+async def run_job(name: str, job):
+    """
+    Run a scheduled job on the leader only and record the run.
+
+    Args:
+        name: Job name for job_runs and /metrics
+        job: Coroutine function to run
+    """
+    if not LEADER.is_leader:
+        logger.info(f"Skipping {name}, {WORKER_ID} is not the leader")
+        return
+
+    started = time.perf_counter()
+    run_id = record_job_start(name, datetime.now(timezone.utc))
+    error = None
+    try:
+        await job()
     except Exception as e:
-        logger.error(
-            f"Failed to refresh S&P 500 and NYSE and Nasdaq ticker data: {str(e)}"
-        )
+        error = str(e)
+        logger.error(f"Scheduled job {name} failed: {error}")
+    finally:
+        duration = time.perf_counter() - started
+        LAST_RUN[name] = {
+            "finished_at": datetime.now(),
+            "duration": duration,
+            "success": error is None,
+        }
+        if run_id is not None:
+            record_job_end(run_id, duration, error)
+
+
+def elect_leader():
+    """Periodic election, a follower takes over when the leader dies."""
+    LEADER.elect()
 
 
 def start_scheduler():
     """
     Start the scheduler
     """
+    warm_at = datetime.combine(
+        datetime.today(), market_calendar.OPEN_TIME
+    ) - timedelta(minutes=PREOPEN_WARM_MINUTES)
+
+    elect_leader()
     scheduler.add_job(
-        refresh_stock_data,
+        elect_leader,
+        trigger=IntervalTrigger(seconds=LEADER_ELECTION_SECONDS),
+        id="elect_leader",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        run_job,
         trigger=CronTrigger(hour=5, minute=0),  # 5 am daily
+        args=["refresh_stock", refresh_stock_data],
         id="refresh_stock",
-        replace_exisiting=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        refresh_quotes_if_due,
+        trigger=IntervalTrigger(minutes=QUOTE_REFRESH_MINUTES),
+        id="refresh_quotes",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        run_job,
+        trigger=CronTrigger(
+            day_of_week="mon-fri",
+            hour=warm_at.hour,
+            minute=warm_at.minute,
+            timezone=market_calendar.EXCHANGE_TZ,
+        ),
+        args=["warm_caches", warm_caches],
+        id="warm_caches",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        run_job,
+        trigger=CronTrigger(
+            hour=18, minute=0, timezone=market_calendar.EXCHANGE_TZ
+        ),
+        args=["portfolio_snapshots", refresh_portfolio_snapshots],
+        id="portfolio_snapshots",
+        replace_existing=True,
     )
     scheduler.start()
-    logger.info("Scheduler started - refresh at 5:00 AM daily")
+    logger.info(
+        "Scheduler started - refresh at 5:00 AM daily, quotes every "
+        f"{QUOTE_REFRESH_MINUTES} min during NYSE sessions, warm-up at "
+        f"{warm_at:%H:%M} ET, portfolio snapshots at 18:00 ET"
+        f" ({'leader' if LEADER.is_leader else 'follower'})"
+    )
 
 
 def shutdown_scheduler():
@@ -50,3 +230,4 @@ def shutdown_scheduler():
     if scheduler.running:
         scheduler.shutdown()
         logger.info("Scheduler stopped")
+    LEADER.release()
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from . import market_calendar
+from .coalesce import SingleFlight
+from .timing import record_cache
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with a TTL and LRU eviction.
+
+    get_or_load() is single-flight: when several threads miss on the same
+    key at once, only one of them runs the loader and the others wait for
+    its result (or its exception).
+
+    Args:
+        maxsize: Maximum number of entries before the least recently used
+            one is evicted
+        ttl: How long an entry stays fresh (timedelta)
+        name: Label for per-request timings
+        market_hours: Only apply the TTL during NYSE sessions, entries
+            stored while the market is closed stay fresh until the open
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: timedelta,
+        name: str = "cache",
+        market_hours: bool = False,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl.total_seconds()
+        self.market_hours = market_hours
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        """Return (found, value). Caller must hold the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+
+        # Expired entries stay until evicted so peek() can still serve them
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            return False, None
+
+        self._data.move_to_end(key)
+        return True, value
+
+    def _ttl(self, ttl: timedelta | None = None) -> float:
+        """Seconds a value stored now stays fresh, for ttl or the default."""
+        ttl = ttl.total_seconds() if ttl is not None else self.ttl
+        if not self.market_hours:
+            return ttl
+        now = datetime.now(market_calendar.EXCHANGE_TZ)
+        expires = market_calendar.expires_at(now, timedelta(seconds=ttl))
+        return (expires - now).total_seconds()
+
+    def _store(self, key, value, ttl: timedelta | None = None):
+        """Insert a value and evict LRU entries. Caller must hold the lock."""
+        self._data[key] = (time.monotonic() + self._ttl(ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        """Return a fresh cached value or default."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache(self.name, found)
+        return value if found else default
+
+    def peek(self, key, default=None):
+        """Return a value even if it expired, without touching counters."""
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl: timedelta | None = None):
+        """Store a value, resetting its TTL (or giving it its own)."""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key, loader, ttl: timedelta | None = None):
+        """
+        Return the cached value for key, calling loader() on a miss.
+
+        Exceptions raised by the loader are not cached; they are re-raised
+        in every caller that was waiting on that load.
+
+        Args:
+            ttl: Freshness of the loaded value, the cache's TTL by default
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache(self.name, found)
+        if found:
+            return value
+
+        def load_and_store():
+            value = loader()
+            with self._lock:
+                self._store(key, value, ttl)
+            return value
+
+        return self._flights.do(key, load_and_store)
+
+    def invalidate(self, key):
+        """Drop a single entry."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
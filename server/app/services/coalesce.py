@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+
+class _Call:
+    """An in-flight sync call that other threads can wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical upstream calls into one.
+
+    Callers pass a key such as ("history", "AAPL", "1d") and a function.
+    While a call for that key is in flight, later callers wait for it and
+    share its result (or its exception) instead of starting their own.
+    Nothing is cached once the call completes.
+
+    do() is for sync code running in the threadpool, do_async() for
+    coroutines running on the event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self._tasks = {}  # key -> asyncio.Task
+
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key, fn):
+        """Await fn() once for all concurrent callers with the same key."""
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+
+        # Shield so one cancelled caller does not cancel everyone else
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Upstream calls made vs calls served by another in-flight call."""
+        return {
+            "in_flight": len(self._calls) + len(self._tasks),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+# Shared by every upstream market-data call in the app
+UPSTREAM = SingleFlight()
+
+
+def coalesce(key, fn):
+    """Run a sync upstream call through the shared SingleFlight."""
+    return UPSTREAM.do(key, fn)
+
+
+async def coalesce_async(key, fn):
+    """Await an async upstream call through the shared SingleFlight."""
+    return await UPSTREAM.do_async(key, fn)
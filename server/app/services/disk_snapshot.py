@@ -0,0 +1,88 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+
+from ..config import SNAPSHOT_DIR, SNAPSHOT_ENABLED
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class DiskSnapshot:
+    """
+    One cache value persisted to disk, so a restarted worker starts warm.
+
+    The value is stored as gzipped compact JSON next to the timestamp it
+    was fetched at. Writes go to a temporary file that is renamed over
+    the old snapshot, so a crash mid-write never leaves a torn file.
+
+    Like the shared tier this is best effort: I/O and parse errors are
+    logged and the worker falls back to fetching.
+
+    Args:
+        key: File name (sp500, prices, all_tickers)
+        directory: Snapshot directory
+    """
+
+    def __init__(self, key: str, directory: str = SNAPSHOT_DIR):
+        self.key = key
+        self.directory = directory
+        self.path = os.path.join(directory, f"{key}.json.gz")
+        self.enabled = SNAPSHOT_ENABLED
+
+    def save(self, data, timestamp: datetime) -> bool:
+        """
+        Write a freshly fetched value.
+
+        Returns:
+            True if the snapshot was written
+        """
+        if not self.enabled:
+            return False
+
+        payload = json.dumps(
+            {"timestamp": timestamp.isoformat(), "data": data},
+            separators=(",", ":"),
+        ).encode()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{self.key}-"
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(gzip.compress(payload))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write {self.key} snapshot: {str(e)}")
+            return False
+
+        logger.info(f"Wrote {self.key} snapshot to {self.path}")
+        return True
+
+    def load(self):
+        """
+        Read the last written value.
+
+        Returns:
+            (data, timestamp), None if there is no readable snapshot
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = json.loads(gzip.decompress(f.read()))
+            timestamp = datetime.fromisoformat(snapshot["timestamp"])
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read {self.key} snapshot: {str(e)}")
+            return None
+
+        logger.info(f"Loaded {self.key} snapshot from {timestamp}")
+        return snapshot["data"], timestamp
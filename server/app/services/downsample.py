@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def lttb_indices(y, max_points: int, x=None) -> np.ndarray:
+    """
+    Pick the points to keep with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split into max_points - 2 buckets, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    next bucket's average is kept. This preserves peaks and troughs much
+    better than taking every nth point.
+
+    Args:
+        y: Values to downsample
+        max_points: Number of points to keep (at least 3)
+        x: Optional x positions, defaults to evenly spaced points
+
+    Returns:
+        Sorted array of indices into y
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points < 3 or n <= max_points:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, float)
+
+    # Bucket i covers [edges[i], edges[i + 1]) of the interior points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    buckets = max_points - 2
+
+    # Average point of every bucket in one pass
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < buckets:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[-1], y[-1]
+
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs(
+            (x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample(items: list, values, max_points: int | None) -> list:
+    """
+    Downsample a list of chart points with LTTB.
+
+    Args:
+        items: Chart points (any objects) in time order
+        values: The y value of each item
+        max_points: Maximum number of points, None to keep everything
+
+    Returns:
+        The kept items, still in time order
+    """
+    if not max_points or len(items) <= max_points:
+        return items
+    return [items[i] for i in lttb_indices(values, max_points)]
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import threading
+import time
+
+import httpx
+from yfinance.exceptions import YFRateLimitError
+
+from .metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from .timing import span
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+SUCCESS = "success"
+THROTTLED = "throttled"
+FAILED = "failed"
+# Cancelled by the caller, says nothing about the upstream's health
+CANCELLED = "cancelled"
+
+ASYNC_POLL_INTERVAL = 0.05
+# Permit wait of calls made while a request is waiting, so a slow upstream
+# cannot park the route threadpool. Background jobs use the governor's
+# acquire_timeout.
+REQUEST_ACQUIRE_TIMEOUT = 2.0
+THROTTLE_MARKERS = (
+    "429",
+    "too many requests",
+    "rate limit",
+    "timeout",
+    "timed out",
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class GovernorSaturated(Exception):
+    """Raised when no permit was freed in time, the provider is healthy."""
+
+
+def classify_error(error: Exception) -> str:
+    """THROTTLED for 429s and timeouts, FAILED for anything else."""
+    if isinstance(error, (YFRateLimitError, TimeoutError)):
+        return THROTTLED
+    if isinstance(error, httpx.TimeoutException):
+        return THROTTLED
+    if (
+        isinstance(error, httpx.HTTPStatusError)
+        and error.response.status_code == 429
+    ):
+        return THROTTLED
+
+    # yfinance surfaces curl_cffi / requests errors, match on the text
+    text = f"{type(error).__name__} {error}".lower()
+    if any(marker in text for marker in THROTTLE_MARKERS):
+        return THROTTLED
+    return FAILED
+
+
+class Governor:
+    """
+    Adaptive concurrency limit and circuit breaker for one upstream provider.
+
+    Concurrency is AIMD: every success raises the limit by 1/limit (about
+    +1 per full window), every 429 or timeout halves it. The breaker opens
+    after `failure_threshold` consecutive failures and rejects calls with
+    CircuitOpenError for `reset_timeout` seconds. After that, a single
+    trial call is let through: if it succeeds the breaker closes, if it
+    fails the breaker opens again. Calls that wait longer than their
+    acquire timeout for a permit raise GovernorSaturated instead.
+
+    Callers are expected to fall back to cached data on CircuitOpenError
+    and GovernorSaturated.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        acquire_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self.in_flight = 0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._cond = threading.Condition()
+
+        self.permits = 0
+        self.rejections = 0
+        self.saturations = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttles = 0
+
+    def _check_breaker(self):
+        """
+        Raise while open, return True for the half-open trial call.
+        Caller must hold the lock.
+        """
+        if self.state == CLOSED:
+            return False
+
+        cooled = time.monotonic() - self.opened_at >= self.reset_timeout
+        if self.state == OPEN and cooled:
+            self.state = HALF_OPEN
+            logger.info(f"{self.name} breaker half-open, sending a trial")
+
+        if self.state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+
+        self.rejections += 1
+        raise CircuitOpenError(f"{self.name} circuit breaker is open")
+
+    def _try_acquire(self):
+        """Take a permit if one is free. Caller must hold the lock."""
+        if self.in_flight < max(int(self.limit), 1):
+            self.in_flight += 1
+            self.permits += 1
+            return True
+        return False
+
+    def _saturated(self):
+        """Count a timed out permit wait. Caller must hold the lock."""
+        self.saturations += 1
+        return GovernorSaturated(
+            f"{self.name} concurrency limit wait timed out"
+        )
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Block until a permit is free.
+
+        Args:
+            timeout: Seconds to wait for a permit, acquire_timeout if None
+
+        Returns:
+            True if this call is the half-open trial
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+            GovernorSaturated: If no permit was freed within the timeout
+        """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            trial = self._check_breaker()
+            while not self._try_acquire():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if trial:
+                        self._trial_running = False
+                    raise self._saturated()
+                self._cond.wait(remaining)
+            return trial
+
+    async def acquire_async(self, timeout: float | None = None) -> bool:
+        """acquire() for coroutines, polling instead of blocking the loop."""
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if time.monotonic() >= deadline:
+                    raise self._saturated()
+                trial = self._check_breaker()
+                if self._try_acquire():
+                    return trial
+                if trial:
+                    self._trial_running = False
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+
+    def release(self, outcome: str, trial: bool = False):
+        """Return a permit and adapt the limit and breaker to the outcome."""
+        with self._cond:
+            self.in_flight -= 1
+            if trial:
+                self._trial_running = False
+
+            if outcome == SUCCESS:
+                self.successes += 1
+                self.consecutive_failures = 0
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                if self.state != CLOSED:
+                    logger.info(f"{self.name} breaker closed")
+                    self.state = CLOSED
+            elif outcome != CANCELLED:
+                self.failures += 1
+                self.consecutive_failures += 1
+                if outcome == THROTTLED:
+                    self.throttles += 1
+                    self.limit = max(self.min_limit, self.limit / 2)
+
+                if (
+                    self.state == HALF_OPEN
+                    or self.consecutive_failures >= self.failure_threshold
+                ):
+                    if self.state != OPEN:
+                        logger.warning(f"{self.name} breaker opened")
+                    self.state = OPEN
+                    self.opened_at = time.monotonic()
+
+            self._cond.notify_all()
+
+    def _record(self, outcome: str, started: float):
+        """Export the latency and outcome of one upstream call."""
+        UPSTREAM_DURATION.observe(
+            time.perf_counter() - started, provider=self.name, outcome=outcome
+        )
+        if outcome != SUCCESS:
+            UPSTREAM_ERRORS.inc(provider=self.name, kind=outcome)
+
+    def _finish(self, outcome: str, started: float, trial: bool):
+        """Record the outcome of a call and return its permit."""
+        if outcome != CANCELLED:
+            self._record(outcome, started)
+        self.release(outcome, trial)
+
+    def call(self, fn, *args, acquire_timeout=None, **kwargs):
+        """Run a sync upstream call under this governor."""
+        trial = self.acquire(acquire_timeout)
+        started = time.perf_counter()
+        # Anything that is not an Exception (cancellation, interrupts)
+        # still returns the permit
+        outcome = CANCELLED
+        try:
+            result = fn(*args, **kwargs)
+            outcome = SUCCESS
+            return result
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            self._finish(outcome, started, trial)
+
+    async def call_async(self, fn, *args, acquire_timeout=None, **kwargs):
+        """Await an async upstream call under this governor."""
+        trial = await self.acquire_async(acquire_timeout)
+        started = time.perf_counter()
+        outcome = CANCELLED
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = SUCCESS
+            return result
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            self._finish(outcome, started, trial)
+
+    def stats(self) -> dict:
+        """Permits, rejections and breaker state for monitoring."""
+        return {
+            "state": self.state,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "permits": self.permits,
+            "rejections": self.rejections,
+            "saturations": self.saturations,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttles": self.throttles,
+        }
+
+
+# One governor per upstream provider
+GOVERNORS = {
+    "yfinance": Governor("yfinance", initial_limit=8, max_limit=32),
+    "ninjas": Governor("ninjas", initial_limit=2, max_limit=4),
+    "massive": Governor("massive", initial_limit=2, max_limit=4),
+}
+
+
+def _span_name(provider: str, fn) -> str:
+    """upstream_<call> span name, e.g. upstream_history."""
+    name = getattr(fn, "__name__", "")
+    return f"upstream_{name if name.isidentifier() else provider}"
+
+
+def governed(provider: str, fn, *args, acquire_timeout=None, **kwargs):
+    """Run a sync call through a provider's governor."""
+    with span(_span_name(provider, fn)):
+        return GOVERNORS[provider].call(
+            fn, *args, acquire_timeout=acquire_timeout, **kwargs
+        )
+
+
+async def governed_async(
+    provider: str, fn, *args, acquire_timeout=None, **kwargs
+):
+    """Await an async call through a provider's governor."""
+    with span(_span_name(provider, fn)):
+        return await GOVERNORS[provider].call_async(
+            fn, *args, acquire_timeout=acquire_timeout, **kwargs
+        )
@@ -0,0 +1,508 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from ..models import PriceBar, PriceSeries
+from . import market_calendar
+from .coalesce import coalesce
+from .stocks_services import chunk_list, fetch_history, fetch_history_many
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# How much history to download the first time a series is stored.
+# Yahoo only serves about 60 days of intraday bars.
+BOOTSTRAP_PERIODS = {
+    "5m": "60d",
+    "30m": "60d",
+    "1d": "max",
+    "1wk": "max",
+    "1mo": "max",
+}
+
+# Oldest intraday bar Yahoo serves, top-ups starting earlier come back
+# empty (kept a day inside the 60 day limit). Also the retention of stored
+# intraday bars, nothing older is ever re-downloaded or charted.
+INTRADAY_LIMITS = {
+    "5m": timedelta(days=59),
+    "30m": timedelta(days=59),
+}
+
+# How long a stored series is served during a session before newer bars
+# are appended; series refreshed after the close wait for the next open
+REFRESH_AGES = {
+    "5m": timedelta(minutes=5),
+    "30m": timedelta(minutes=15),
+    "1d": timedelta(hours=1),
+    "1wk": timedelta(hours=6),
+    "1mo": timedelta(hours=12),
+}
+DEFAULT_REFRESH_AGE = timedelta(hours=1)
+
+# Tickers per batched history download
+BATCH_SIZE = 50
+# Stored series whose last bars are further apart are topped up in
+# separate downloads
+BATCH_START_SPREAD = timedelta(days=1)
+
+# Calendar offsets for yfinance style periods
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=5),  # sliced down to the last session
+    "1wk": pd.DateOffset(weeks=1),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+
+
+def to_utc(ts: datetime) -> datetime:
+    """Return ts as an aware UTC datetime (naive values are taken as UTC)."""
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.tz_convert("UTC").to_pydatetime()
+
+
+def refresh_history(
+    db: Session, ticker: str, interval: str, force: bool = False
+) -> int:
+    """
+    Append bars newer than the last stored one for (ticker, interval).
+
+    The first refresh downloads BOOTSTRAP_PERIODS[interval] of history.
+    Later refreshes only download from the last stored bar onwards; that
+    bar is re-written because it may have been a partial (live) bar.
+    A download that returns no bars leaves the series stale, so the next
+    request retries it.
+
+    Returns:
+        Number of bars written
+    """
+    now = datetime.now(timezone.utc)
+    series = db.get(PriceSeries, (ticker, interval))
+
+    if not force and series_is_fresh(series, interval, now):
+        return 0
+
+    last_ts = (
+        db.query(func.max(PriceBar.ts))
+        .filter(PriceBar.ticker == ticker, PriceBar.interval == interval)
+        .scalar()
+    )
+
+    if last_ts is None:
+        logger.info(f"Bootstrapping {interval} history for {ticker}")
+        hist = fetch_history(
+            ticker,
+            period=BOOTSTRAP_PERIODS.get(interval, "max"),
+            interval=interval,
+        )
+    else:
+        hist = fetch_history(
+            ticker,
+            start=download_start(last_ts, interval, now),
+            interval=interval,
+        )
+
+    if series is None:
+        series = PriceSeries(ticker=ticker, interval=interval)
+        db.add(series)
+
+    written = store_bars(db, series, hist)
+    if written:
+        series.refreshed_at = now
+    db.commit()
+    logger.info(f"Stored {written} {interval} bars for {ticker}")
+    return written
+
+
+def download_start(last_ts: datetime, interval: str, now: datetime):
+    """
+    Start of a top-up download: the last stored bar, clamped to the
+    intraday history Yahoo still serves (older gaps cannot be filled).
+    """
+    start = to_utc(last_ts)
+    limit = INTRADAY_LIMITS.get(interval)
+    if limit is not None:
+        start = max(start, now - limit)
+    return start
+
+
+def series_is_fresh(series: PriceSeries | None, interval: str, now: datetime):
+    """True if a stored series was refreshed recently enough to serve."""
+    return (
+        series is not None
+        and series.refreshed_at is not None
+        and market_calendar.is_fresh(
+            to_utc(series.refreshed_at),
+            REFRESH_AGES.get(interval, DEFAULT_REFRESH_AGE),
+            now,
+        )
+    )
+
+
+def refreshed_before(series: PriceSeries, moment: datetime) -> bool:
+    """True if a stored series has not been refreshed since moment."""
+    if series.refreshed_at is None:
+        return True
+    return to_utc(series.refreshed_at) < to_utc(moment)
+
+
+def store_bars(db: Session, series: PriceSeries, hist) -> int:
+    """
+    Replace a series' bars from the first downloaded one onwards.
+
+    Intraday bars older than INTRADAY_LIMITS before the newest downloaded
+    bar are deleted, so the table does not grow forever.
+
+    Returns:
+        Number of bars written (not committed)
+    """
+    ticker, interval = series.ticker, series.interval
+    written = 0
+    if hist is not None and not hist.empty:
+        index = hist.index
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        series.timezone = str(index.tz)
+        index = index.tz_convert("UTC")
+
+        db.execute(
+            delete(PriceBar).where(
+                PriceBar.ticker == ticker,
+                PriceBar.interval == interval,
+                PriceBar.ts >= index[0].to_pydatetime(),
+            )
+        )
+
+        frame = hist.reindex(columns=COLUMNS)
+        rows = [
+            {
+                "ticker": ticker,
+                "interval": interval,
+                "ts": ts.to_pydatetime(),
+                "open": _float(bar[0]),
+                "high": _float(bar[1]),
+                "low": _float(bar[2]),
+                "close": float(bar[3]),
+                "volume": int(bar[4]) if bar[4] == bar[4] else None,
+            }
+            for ts, bar in zip(index, frame.itertuples(index=False))
+            if bar[3] == bar[3]  # skip bars without a close
+        ]
+        if rows:
+            db.execute(insert(PriceBar), rows)
+        written = len(rows)
+
+        retention = INTRADAY_LIMITS.get(interval)
+        if retention is not None:
+            db.execute(
+                delete(PriceBar).where(
+                    PriceBar.ticker == ticker,
+                    PriceBar.interval == interval,
+                    PriceBar.ts < (index[-1] - retention).to_pydatetime(),
+                )
+            )
+    return written
+
+
+def refresh_many(
+    db: Session,
+    tickers: list[str],
+    interval: str,
+    force: bool = False,
+    since: datetime | None = None,
+) -> int:
+    """
+    Top up many series with batched multi-ticker downloads.
+
+    Stale series are split into new ones (downloaded with their bootstrap
+    period) and stored ones (downloaded from the oldest last bar of their
+    batch), so a whole portfolio costs a few requests instead of one or
+    two per holding. Stored series are batched by last bar, so one stale
+    series does not widen the download of up-to-date ones. Series that
+    got no bars stay stale.
+
+    Args:
+        since: Also refresh series last refreshed before this moment
+            (e.g. a session close, so its final bar replaces a live one)
+
+    Returns:
+        Number of bars written
+    """
+    now = datetime.now(timezone.utc)
+    stored = {
+        series.ticker: series
+        for series in db.query(PriceSeries).filter(
+            PriceSeries.ticker.in_(tickers), PriceSeries.interval == interval
+        )
+    }
+    stale = [
+        ticker
+        for ticker in tickers
+        if force
+        or not series_is_fresh(stored.get(ticker), interval, now)
+        or (since is not None and refreshed_before(stored[ticker], since))
+    ]
+    if not stale:
+        return 0
+
+    last_bars = dict(
+        db.query(PriceBar.ticker, func.max(PriceBar.ts))
+        .filter(PriceBar.ticker.in_(stale), PriceBar.interval == interval)
+        .group_by(PriceBar.ticker)
+        .all()
+    )
+    new = [ticker for ticker in stale if ticker not in last_bars]
+    starts = {
+        ticker: download_start(last_bars[ticker], interval, now)
+        for ticker in stale
+        if ticker in last_bars
+    }
+
+    histories = {}
+    for chunk in chunk_list(new, BATCH_SIZE):
+        logger.info(
+            f"Bootstrapping {interval} history for {len(chunk)} tickers"
+        )
+        histories.update(
+            fetch_history_many(
+                chunk,
+                period=BOOTSTRAP_PERIODS.get(interval, "max"),
+                interval=interval,
+            )
+        )
+    for chunk in start_batches(starts):
+        histories.update(
+            fetch_history_many(
+                chunk, start=starts[chunk[0]], interval=interval
+            )
+        )
+
+    written = 0
+    for ticker in stale:
+        series = stored.get(ticker)
+        if series is None:
+            series = PriceSeries(ticker=ticker, interval=interval)
+            db.add(series)
+        bars = store_bars(db, series, histories.get(ticker))
+        if bars:
+            series.refreshed_at = now
+        written += bars
+
+    db.commit()
+    logger.info(f"Stored {written} {interval} bars for {len(stale)} tickers")
+    return written
+
+
+def start_batches(starts: dict) -> list[list[str]]:
+    """
+    Split tickers into download batches of similar start.
+
+    Args:
+        starts: ticker -> first bar to download
+
+    Returns:
+        Batches of at most BATCH_SIZE tickers, each starting at its first
+        ticker's start and spanning at most BATCH_START_SPREAD
+    """
+    batches = []
+    for ticker in sorted(starts, key=starts.get):
+        batch = batches[-1] if batches else None
+        if (
+            batch is None
+            or len(batch) >= BATCH_SIZE
+            or starts[ticker] - starts[batch[0]] > BATCH_START_SPREAD
+        ):
+            batches.append([ticker])
+        else:
+            batch.append(ticker)
+    return batches
+
+
+def _float(value):
+    """Cast to float, mapping NaN to None."""
+    return float(value) if value == value else None
+
+
+def load_history(
+    db: Session,
+    ticker: str,
+    interval: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Read stored bars as a yfinance style DataFrame.
+
+    Returns:
+        DataFrame with Open, High, Low, Close, Volume columns indexed by
+        timestamps in the exchange timezone (empty if nothing is stored)
+    """
+    query = db.query(
+        PriceBar.ts,
+        PriceBar.open,
+        PriceBar.high,
+        PriceBar.low,
+        PriceBar.close,
+        PriceBar.volume,
+    ).filter(PriceBar.ticker == ticker, PriceBar.interval == interval)
+
+    if start is not None:
+        query = query.filter(PriceBar.ts >= to_utc(start))
+    if end is not None:
+        query = query.filter(PriceBar.ts <= to_utc(end))
+
+    rows = query.order_by(PriceBar.ts).all()
+    series = db.get(PriceSeries, (ticker, interval))
+    tz = series.timezone if series is not None else "UTC"
+
+    frame = pd.DataFrame(rows, columns=["ts"] + COLUMNS)
+    index = pd.DatetimeIndex(pd.to_datetime(frame.pop("ts"), utc=True))
+    frame.index = index.tz_convert(tz)
+    return frame
+
+
+def load_histories(
+    db: Session,
+    tickers: list[str],
+    interval: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    load_history() for many tickers in a single query.
+
+    Returns:
+        Dict of ticker -> DataFrame (empty if nothing is stored)
+    """
+    query = db.query(
+        PriceBar.ticker,
+        PriceBar.ts,
+        PriceBar.open,
+        PriceBar.high,
+        PriceBar.low,
+        PriceBar.close,
+        PriceBar.volume,
+    ).filter(PriceBar.ticker.in_(tickers), PriceBar.interval == interval)
+
+    if start is not None:
+        query = query.filter(PriceBar.ts >= to_utc(start))
+    if end is not None:
+        query = query.filter(PriceBar.ts <= to_utc(end))
+
+    rows = query.order_by(PriceBar.ticker, PriceBar.ts).all()
+    timezones = dict(
+        db.query(PriceSeries.ticker, PriceSeries.timezone).filter(
+            PriceSeries.ticker.in_(tickers), PriceSeries.interval == interval
+        )
+    )
+
+    frame = pd.DataFrame(rows, columns=["ticker", "ts"] + COLUMNS)
+    # Parse every timestamp at once, then split per ticker
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("ts"), utc=True))
+    histories = {}
+    for ticker, bars in frame.groupby("ticker", sort=False):
+        bars = bars[COLUMNS]
+        bars.index = bars.index.tz_convert(timezones.get(ticker) or "UTC")
+        histories[ticker] = bars
+
+    empty = pd.DataFrame(
+        columns=COLUMNS, index=pd.DatetimeIndex([], tz="UTC"), dtype=float
+    )
+    return {ticker: histories.get(ticker, empty) for ticker in tickers}
+
+
+def get_histories(
+    db: Session,
+    tickers: list[str],
+    interval: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    since: datetime | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    get_history() for many tickers, topped up with batched downloads.
+
+    Args:
+        since: Also refresh series last refreshed before this moment
+
+    Returns:
+        Dict of upper-cased ticker -> DataFrame
+    """
+    symbols = sorted({ticker.upper() for ticker in tickers})
+    try:
+        coalesce(
+            ("history_store", tuple(symbols), interval, since),
+            lambda: refresh_many(db, symbols, interval, since=since),
+        )
+    except Exception as e:
+        db.rollback()
+        logger.warning(
+            f"Failed to refresh {interval} history for "
+            f"{len(symbols)} tickers: {str(e)}"
+        )
+
+    return load_histories(db, symbols, interval, start, end)
+
+
+def get_history(
+    db: Session,
+    ticker: str,
+    interval: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Return history for a ticker from the local store, topping it up first.
+
+    Concurrent refreshes of one series are coalesced. If the upstream
+    refresh fails, whatever is already stored is returned.
+    """
+    symbol = ticker.upper()
+    try:
+        coalesce(
+            ("history_store", symbol, interval),
+            lambda: refresh_history(db, symbol, interval),
+        )
+    except Exception as e:
+        db.rollback()
+        logger.warning(
+            f"Failed to refresh {interval} history for {symbol}: {str(e)}"
+        )
+
+    return load_history(db, symbol, interval, start, end)
+
+
+def period_start(period: str, now: datetime) -> datetime | None:
+    """Earliest timestamp needed for a yfinance style period."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(now.year, 1, 1, tzinfo=now.tzinfo)
+    return (pd.Timestamp(now) - PERIOD_OFFSETS[period]).to_pydatetime()
+
+
+def get_period(
+    db: Session, ticker: str, period: str, interval: str
+) -> pd.DataFrame:
+    """
+    Return a yfinance style period (1d, 1mo, ytd, max, ...) from the store.
+
+    "1d" is the last stored trading session.
+    """
+    now = datetime.now(timezone.utc)
+    hist = get_history(db, ticker, interval, start=period_start(period, now))
+
+    if period == "1d" and not hist.empty:
+        days = hist.index.normalize()
+        hist = hist[days == days[-1]]
+    return hist
@@ -0,0 +1,161 @@
+import logging
+
+import httpx
+
+from ..config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+    HTTP_DEFAULT_TIMEOUT,
+    HTTP_HOST_TIMEOUTS,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Application-scoped client, opened and closed in main.lifespan
+CLIENT = {"client": None}
+
+HTTP_STATS = {
+    "requests": 0,
+    "error_responses": 0,
+    "in_flight": 0,
+}
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that calls done once, when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, done):
+        self._stream = stream
+        self._done = done
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            done, self._done = self._done, None
+            if done is not None:
+                done()
+
+
+class TrackingTransport(httpx.AsyncBaseTransport):
+    """
+    Count requests in flight through the public transport API.
+
+    A request is in flight from send until its body is closed, which
+    with HTTP/1.1 is how long it holds a pooled connection. httpx has no
+    public view of its pool, so this is what /metrics reports.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    @staticmethod
+    def _finished():
+        HTTP_STATS["in_flight"] -= 1
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        HTTP_STATS["in_flight"] += 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._finished()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._finished),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+async def _on_request(request: httpx.Request):
+    HTTP_STATS["requests"] += 1
+
+
+async def _on_response(response: httpx.Response):
+    if response.status_code >= 400:
+        HTTP_STATS["error_responses"] += 1
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the pooled client from the HTTP_* settings in config."""
+    http2 = HTTP2_ENABLED and http2_available()
+    if HTTP2_ENABLED and not http2:
+        logger.warning("HTTP2_ENABLED is set but h2 is not installed")
+
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+    return httpx.AsyncClient(
+        transport=TrackingTransport(transport),
+        timeout=HTTP_DEFAULT_TIMEOUT,
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+    )
+
+
+async def init_http_client():
+    """Open the shared client (called on startup)."""
+    if CLIENT["client"] is None:
+        CLIENT["client"] = create_http_client()
+        logger.info("HTTP client pool started")
+
+
+async def close_http_client():
+    """Close the shared client and its connections (called on shutdown)."""
+    client = CLIENT["client"]
+    CLIENT["client"] = None
+    if client is not None:
+        await client.aclose()
+        logger.info("HTTP client pool closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it if startup has not run yet
+    (e.g. scripts or the scheduler outside the app).
+    """
+    if CLIENT["client"] is None:
+        CLIENT["client"] = create_http_client()
+    return CLIENT["client"]
+
+
+def host_timeout(url: str) -> float:
+    """Timeout for a request to url, per HTTP_HOST_TIMEOUTS."""
+    host = httpx.URL(url).host
+    return HTTP_HOST_TIMEOUTS.get(host, HTTP_DEFAULT_TIMEOUT)
+
+
+def pool_stats() -> dict:
+    """Requests in flight against the pool limits, and request counters."""
+    return {
+        "open": CLIENT["client"] is not None,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        **HTTP_STATS,
+    }
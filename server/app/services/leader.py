@@ -0,0 +1,139 @@
+import logging
+import os
+import socket
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Identifies this process in logs and job run records
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLock:
+    """
+    Elects one scheduler leader across every worker and replica.
+
+    On Postgres the leader holds a session-level advisory lock on a
+    dedicated connection. On other databases (SQLite in development) it
+    holds an exclusive flock on a lock file, which only covers the
+    workers of one host. Either way the lock dies with the process or
+    its connection, so a follower takes over on its next election.
+
+    Args:
+        engine: Database engine, decides the lock backend
+        lock_id: Advisory lock key
+        lock_path: Lock file for non-Postgres databases
+    """
+
+    def __init__(self, engine: Engine, lock_id: int, lock_path: str):
+        self.engine = engine
+        self.lock_id = lock_id
+        self.lock_path = lock_path
+        self._connection = None  # holds the advisory lock
+        self._file = None  # holds the flock
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None or self._file is not None
+
+    def elect(self) -> bool:
+        """
+        Try to become (or stay) the leader.
+
+        Returns:
+            True if this process is the leader
+        """
+        if self.is_leader:
+            if self._still_held():
+                return True
+            logger.warning(f"{WORKER_ID} lost scheduler leadership")
+            self.release()
+
+        if self.engine.dialect.name == "postgresql":
+            acquired = self._acquire_advisory_lock()
+        else:
+            acquired = self._acquire_file_lock()
+
+        if acquired:
+            logger.info(f"{WORKER_ID} is the scheduler leader")
+        return acquired
+
+    def _acquire_advisory_lock(self) -> bool:
+        connection = None
+        try:
+            connection = self.engine.connect()
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}
+            ).scalar()
+            # End the implicit transaction, the lock is session level
+            connection.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Leader election failed: {str(e)}")
+            acquired = False
+
+        if acquired:
+            self._connection = connection
+        elif connection is not None:
+            connection.close()
+        return bool(acquired)
+
+    def _acquire_file_lock(self) -> bool:
+        if fcntl is None:
+            # No flock, every worker runs the jobs like before
+            self._file = open(os.devnull)
+            return True
+
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(WORKER_ID)
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def _still_held(self) -> bool:
+        """False if the leader's lock connection died."""
+        if self._connection is None:
+            return True
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def release(self):
+        """Give up leadership (shutdown, or a dead lock connection)."""
+        if self._connection is not None:
+            try:
+                self._connection.execute(
+                    text("SELECT pg_advisory_unlock(:id)"),
+                    {"id": self.lock_id},
+                )
+                self._connection.commit()
+            except SQLAlchemyError:
+                pass  # a dead connection released the lock already
+            finally:
+                self._connection.close()
+                self._connection = None
+
+        if self._file is not None:
+            if fcntl is not None and not self._file.closed:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,170 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from dateutil.easter import easter
+
+# NYSE regular session, in exchange time
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+OPEN_TIME = time(9, 30)
+CLOSE_TIME = time(16, 0)
+EARLY_CLOSE_TIME = time(13, 0)
+
+# Closing auction prints keep settling for a while after the bell, data
+# taken this soon after a close still expires on its session TTL
+CLOSE_SETTLE_WINDOW = timedelta(minutes=20)
+
+# Longest run of days without a session (a holiday next to a weekend is
+# 4 days), bounds the search for the next open
+MAX_CLOSED_DAYS = 10
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth (1-based) weekday of a month, n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays close the Friday before, Sunday ones the Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def holidays(year: int) -> frozenset:
+    """
+    NYSE full-day holidays of a year.
+
+    Follows the exchange's standing rules; one-off closures (national days
+    of mourning, weather) are not included.
+    """
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day on a Saturday is not made up on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=64)
+def early_closes(year: int) -> frozenset:
+    """Days the NYSE closes at 1 pm."""
+    candidates = [
+        date(year, 7, 3),  # Independence Day eve
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # Black Friday
+        date(year, 12, 24),  # Christmas Eve
+    ]
+    return frozenset(
+        day
+        for day in candidates
+        if day.weekday() < 5 and day not in holidays(year)
+    )
+
+
+def is_trading_day(day: date) -> bool:
+    """True if the NYSE holds a session on day."""
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> tuple[datetime, datetime] | None:
+    """
+    Open and close of the session on day.
+
+    Returns:
+        (open, close) as aware exchange-time datetimes, None on weekends
+        and holidays
+    """
+    if not is_trading_day(day):
+        return None
+    close_time = (
+        EARLY_CLOSE_TIME if day in early_closes(day.year) else CLOSE_TIME
+    )
+    return (
+        datetime.combine(day, OPEN_TIME, tzinfo=EXCHANGE_TZ),
+        datetime.combine(day, close_time, tzinfo=EXCHANGE_TZ),
+    )
+
+
+def _exchange_time(moment: datetime | None) -> datetime:
+    """Moment in exchange time; naive values are taken as local time."""
+    if moment is None:
+        return datetime.now(EXCHANGE_TZ)
+    return moment.astimezone(EXCHANGE_TZ)
+
+
+def is_open(moment: datetime | None = None) -> bool:
+    """True while a regular session is running (now by default)."""
+    moment = _exchange_time(moment)
+    hours = session(moment.date())
+    return hours is not None and hours[0] <= moment < hours[1]
+
+
+def next_open(moment: datetime | None = None) -> datetime:
+    """The first session open after moment (now by default)."""
+    moment = _exchange_time(moment)
+    for offset in range(MAX_CLOSED_DAYS + 1):
+        hours = session(moment.date() + timedelta(days=offset))
+        if hours is not None and hours[0] > moment:
+            return hours[0]
+    raise ValueError(f"No NYSE session within {MAX_CLOSED_DAYS} days")
+
+
+def last_close(moment: datetime | None = None) -> datetime:
+    """The latest session close at or before moment (now by default)."""
+    moment = _exchange_time(moment)
+    for offset in range(MAX_CLOSED_DAYS + 1):
+        hours = session(moment.date() - timedelta(days=offset))
+        if hours is not None and hours[1] <= moment:
+            return hours[1]
+    raise ValueError(f"No NYSE session within {MAX_CLOSED_DAYS} days")
+
+
+def expires_at(taken: datetime, ttl: timedelta) -> datetime:
+    """
+    When market data taken at a given moment goes stale.
+
+    During a session data expires after its TTL, and so does data taken
+    within CLOSE_SETTLE_WINDOW of a close, which may predate the settled
+    closing prints. Data taken later while the market is closed holds the
+    last close, so it stays fresh until the next open instead of being
+    re-fetched every TTL overnight and over weekends.
+
+    Args:
+        taken: When the data was fetched (naive values are local time)
+        ttl: Freshness during a session
+
+    Returns:
+        Aware exchange-time expiry
+    """
+    taken = _exchange_time(taken)
+    if is_open(taken) or taken < last_close(taken) + CLOSE_SETTLE_WINDOW:
+        return taken + ttl
+    return next_open(taken)
+
+
+def is_fresh(
+    taken: datetime, ttl: timedelta, now: datetime | None = None
+) -> bool:
+    """True if data taken at a given moment has not expired yet."""
+    return _exchange_time(now) < expires_at(taken, ttl)
@@ -0,0 +1,159 @@
+import math
+import threading
+
+# Seconds, from a cache hit to a cold yfinance history crawl
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metric_lines(name: str, kind: str, help: str, samples) -> list[str]:
+    """
+    Prometheus text lines for one metric family.
+
+    Args:
+        samples: Iterable of (labels dict, value); None values are skipped
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return lines
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}  # label items -> count
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def lines(self) -> list[str]:
+        with self._lock:
+            samples = [(dict(k), v) for k, v in self._values.items()]
+        return metric_lines(self.name, "counter", self.help, samples)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}  # label items -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(sorted(labels.items())))
+        return series[2] if series else 0
+
+    def lines(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = [
+                (dict(k), list(c), s, n)
+                for k, (c, s, n) in self._series.items()
+            ]
+        for labels, counts, total, count in series:
+            for bound, bucket in zip(self.buckets, counts):
+                le = _labels({**labels, "le": _number(bound)})
+                lines.append(f"{self.name}_bucket{le} {bucket}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "markviz_request_duration_seconds",
+    "HTTP request latency by route",
+)
+UPSTREAM_DURATION = Histogram(
+    "markviz_upstream_request_duration_seconds",
+    "Upstream market data call latency by provider and outcome",
+)
+UPSTREAM_ERRORS = Counter(
+    "markviz_upstream_errors_total",
+    "Failed upstream calls by provider and kind (throttled or failed)",
+)
+CACHE_REQUESTS = Counter(
+    "markviz_cache_requests_total",
+    "Snapshot cache lookups by cache and result (hit, stale or miss)",
+)
+
+# Recorded into by the app, rendered on every scrape
+REGISTRY = [
+    REQUEST_DURATION,
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+    CACHE_REQUESTS,
+]
+
+
+def render(extra_lines: list[str] = ()) -> str:
+    """The whole registry plus scrape-time lines in text format 0.0.4."""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.lines()
+    lines += extra_lines
+    return "\n".join(lines) + "\n"
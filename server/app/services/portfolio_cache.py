@@ -0,0 +1,94 @@
+import logging
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import HoldingsVersion
+from .cache import TTLCache
+from .stocks_services import PRICE_CACHE_DURATION
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Freshness of a cached graph, following the bars behind each range:
+# intraday ranges move with every bar, the long ones with the daily close
+GRAPH_TTLS = {
+    "1D": timedelta(minutes=5),
+    "1W": timedelta(minutes=15),
+    "1M": timedelta(hours=1),
+    "3M": timedelta(hours=1),
+    "1Y": timedelta(days=1),
+    "ALL": timedelta(days=1),
+}
+# Tables are valued at current quotes
+TABLE_TTL = PRICE_CACHE_DURATION
+
+# Computed /portfolio/graph and /portfolio/table responses of every user,
+# keyed by (user_id, holdings version, view, parameters). Entries of an
+# older version are never read again and age out of the LRU.
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE = TTLCache(
+    maxsize=RESULT_CACHE_SIZE,
+    ttl=TABLE_TTL,
+    name="portfolio",
+    market_hours=True,
+)
+
+
+def holdings_version(db: Session, user_id: int) -> int:
+    """The user's holdings version, 0 before their first change."""
+    version = (
+        db.query(HoldingsVersion.version)
+        .filter(HoldingsVersion.user_id == user_id)
+        .scalar()
+    )
+    return version or 0
+
+
+def bump_holdings_version(db: Session, user_id: int):
+    """
+    Move the user to a new holdings version, so cached results miss.
+
+    Every write to a user's holdings calls this in its transaction; the
+    caller commits. The version lives in the database so every worker
+    sees the bump.
+    """
+    bump = (
+        update(HoldingsVersion)
+        .where(HoldingsVersion.user_id == user_id)
+        .values(version=HoldingsVersion.version + 1)
+    )
+    if db.execute(bump).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.add(HoldingsVersion(user_id=user_id, version=1))
+    except IntegrityError:
+        # Created by a concurrent write, bump that row instead
+        db.execute(bump)
+
+
+def cached_result(
+    db: Session, user_id: int, view: tuple, ttl: timedelta, build
+) -> dict:
+    """
+    A user's computed portfolio response, built once per holdings version.
+
+    Concurrent misses build it once. Responses without data are dropped,
+    a failed market data fetch is retried on the next request.
+
+    Args:
+        view: Endpoint and parameters of the response
+        ttl: Freshness of a new entry
+        build: Function computing the response on a miss
+
+    Returns:
+        The response dict
+    """
+    key = (user_id, holdings_version(db, user_id), *view)
+    result = RESULT_CACHE.get_or_load(key, build, ttl)
+    if not result["data"]:
+        RESULT_CACHE.invalidate(key)
+    return result
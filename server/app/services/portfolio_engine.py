@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+# Graph point labels per bar interval, as character ranges of an ISO
+# timestamp (YYYY-MM-DDTHH:MM): HH:MM for intraday, YYYY-MM-DD otherwise
+LABEL_SLICES = {"5m": slice(11, 16)}
+DEFAULT_LABEL_SLICE = slice(0, 10)
+
+
+def close_matrix(closes: list[pd.Series]) -> pd.DataFrame:
+    """
+    Align per-holding close series on the union of their timestamps.
+
+    Holdings listed on different calendars, or bought at different times,
+    do not share timestamps; each column is forward-filled so a holding
+    keeps its last close where it has no bar. Timestamps before a
+    holding's first bar stay NaN.
+
+    Args:
+        closes: One close series per holding, indexed by timestamp
+
+    Returns:
+        (timestamps x holdings) frame, columns in the order given
+    """
+    columns = {
+        i: (
+            series
+            if series.index.is_unique
+            else series[~series.index.duplicated(keep="last")]
+        )
+        for i, series in enumerate(closes)
+    }
+    return pd.concat(columns, axis=1).sort_index().ffill()
+
+
+def date_labels(index: pd.DatetimeIndex, interval: str) -> list[str]:
+    """Exchange-time labels, formatted in bulk (strftime is per element)."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    stamps = np.datetime_as_string(
+        index.values.astype("datetime64[m]"), unit="m"
+    )
+    cut = LABEL_SLICES.get(interval, DEFAULT_LABEL_SLICE)
+    return [stamp[cut] for stamp in stamps]
+
+
+def portfolio_returns(
+    all_holdings_data: list[dict], interval: str
+) -> list[dict]:
+    """
+    Weighted portfolio return at every timestamp, in one vectorized pass.
+
+    A holding counts towards the portfolio (both its value and its
+    baseline) from its first bar onwards.
+
+    Args:
+        all_holdings_data: Dicts with closes (series), shares and
+            baseline_value per holding
+        interval: Bar interval, picks the date label format
+
+    Returns:
+        List of dicts with date and value (return percentage)
+    """
+    if not all_holdings_data:
+        return []
+
+    matrix = close_matrix([h["closes"] for h in all_holdings_data])
+    shares = np.array([h["shares"] for h in all_holdings_data], dtype=float)
+    baselines = np.array(
+        [h["baseline_value"] for h in all_holdings_data], dtype=float
+    )
+
+    prices = matrix.to_numpy(dtype=float)
+    held = ~np.isnan(prices)
+    current_value = np.where(held, prices * shares, 0.0).sum(axis=1)
+    baseline_value = (held * baselines).sum(axis=1)
+
+    returns = np.zeros(len(matrix))
+    invested = baseline_value > 0
+    returns[invested] = (
+        (current_value[invested] - baseline_value[invested])
+        / baseline_value[invested]
+        * 100
+    )
+
+    dates = date_labels(matrix.index, interval)
+    return [
+        {"date": date, "value": value}
+        for date, value in zip(dates, np.round(returns, 2).tolist())
+    ]
+
+
+def lots_frame(holdings) -> pd.DataFrame:
+    """One row per holding lot: ticker, shares and buy price."""
+    return pd.DataFrame(
+        {
+            "ticker": [h.ticker.upper() for h in holdings],
+            "shares": [float(h.shares) for h in holdings],
+            "buy_price": [float(h.buy_price) for h in holdings],
+        }
+    )
+
+
+def group_lots(lots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate lots per ticker.
+
+    Returns:
+        One row per ticker (in first-bought order) with total shares,
+        share-weighted average buy price and the number of lots
+    """
+    grouped = (
+        lots.assign(cost=lots["shares"] * lots["buy_price"])
+        .groupby("ticker", sort=False)
+        .agg(
+            shares=("shares", "sum"),
+            cost=("cost", "sum"),
+            lots=("shares", "size"),
+        )
+        .reset_index()
+    )
+    shares = grouped["shares"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grouped["buy_price"] = np.where(
+            shares > 0, grouped["cost"].to_numpy() / shares, 0.0
+        )
+    return grouped.drop(columns="cost")
+
+
+def holdings_table(
+    lots: pd.DataFrame, quotes: dict, by_ticker: bool = False
+) -> list[dict]:
+    """
+    Value, daily change and returns of every lot (or ticker) in one pass.
+
+    Args:
+        lots: lots_frame() of the portfolio
+        quotes: Dict of ticker -> name, current_price, change_percent;
+            lots of tickers without a quote are left out
+        by_ticker: Aggregate the lots of each ticker into one row
+
+    Returns:
+        List of table rows, in holding order
+    """
+    lots = lots[lots["ticker"].isin(quotes)]
+    if by_ticker:
+        lots = group_lots(lots)
+    if lots.empty:
+        return []
+
+    tickers = lots["ticker"].tolist()
+    price = np.array([quotes[t]["current_price"] for t in tickers], float)
+    change = np.array([quotes[t]["change_percent"] for t in tickers], float)
+    shares = lots["shares"].to_numpy()
+    buy = lots["buy_price"].to_numpy()
+
+    # Zero prices mean no quote, those metrics are reported as 0
+    priced = price != 0
+    has_cost = priced & (buy != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_value = np.where(priced, np.round(price * shares, 2), 0.0)
+        today_change = np.where(priced, change, 0.0)
+        all_time_return = np.where(
+            has_cost, np.round((price / buy - 1) * 100, 2), 0.0
+        )
+        all_time_amount = np.where(
+            has_cost, np.round((price - buy) * shares, 2), 0.0
+        )
+
+    rows = []
+    for i, ticker in enumerate(tickers):
+        row = {
+            "ticker": ticker,
+            "name": quotes[ticker]["name"],
+            "shares": float(shares[i]),
+            "currentPrice": float(price[i]),
+            "totalValue": float(total_value[i]),
+            "todayChangePercent": float(today_change[i]),
+            "allTimeReturn": float(all_time_return[i]),
+            "allTimeReturnAmount": float(all_time_amount[i]),
+        }
+        if by_ticker:
+            row["lots"] = int(lots["lots"].iloc[i])
+            row["averageCost"] = round(float(buy[i]), 2)
+        rows.append(row)
+    return rows
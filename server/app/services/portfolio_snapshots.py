@@ -0,0 +1,299 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Holding, PortfolioSnapshot
+from . import history_store, market_calendar
+from .history_store import to_utc
+from .portfolio_engine import close_matrix, date_labels, lots_frame
+from .stocks_services import fetch_quotes
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Graph ranges read from the snapshots instead of raw prices
+SNAPSHOT_RANGES = {"1Y", "ALL"}
+RANGE_DAYS = {"1Y": 365}
+
+# Closes loaded before an incremental update, so every lot has a price to
+# forward-fill from (covers weekends and holidays)
+PRICE_LOOKBACK = timedelta(days=10)
+
+
+def valuation(
+    db: Session,
+    holdings: list[Holding],
+    start: datetime,
+    since: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Daily value, cost basis and lot count of a portfolio.
+
+    Lots count from their first daily bar after the purchase, like the
+    live graph, and keep their last close on days without a bar.
+
+    Args:
+        start: First bar to load
+        since: Refresh daily bars downloaded before this moment first
+
+    Returns:
+        Frame indexed by exchange date with total_value, cost_basis and
+        holdings columns, only days where something was held
+    """
+    lots = lots_frame(holdings)
+    histories = history_store.get_histories(
+        db, lots["ticker"].unique().tolist(), "1d", start=start, since=since
+    )
+    matrix = close_matrix([histories[t]["Close"] for t in lots["ticker"]])
+    if matrix.empty:
+        return pd.DataFrame(columns=["total_value", "cost_basis", "holdings"])
+
+    bar_times = matrix.index.tz_convert("UTC").as_unit("ns").asi8
+    purchased = (
+        pd.DatetimeIndex([to_utc(h.created_at) for h in holdings])
+        .as_unit("ns")
+        .asi8
+    )
+    # Cent closes, like the live graph
+    prices = matrix.round(2).to_numpy(dtype=float)
+    held = (bar_times[:, None] >= purchased[None, :]) & ~np.isnan(prices)
+
+    shares = lots["shares"].to_numpy()
+    costs = shares * lots["buy_price"].to_numpy()
+    frame = pd.DataFrame(
+        {
+            "total_value": np.where(held, prices * shares, 0.0).sum(axis=1),
+            "cost_basis": (held * costs).sum(axis=1),
+            "holdings": held.sum(axis=1),
+        },
+        index=matrix.index.tz_convert(market_calendar.EXCHANGE_TZ).date,
+    )
+    return frame[frame["holdings"] > 0]
+
+
+def return_pct(value, baseline):
+    """Percent return on a baseline, 0 where nothing was invested."""
+    value = np.asarray(value, dtype=float)
+    baseline = np.asarray(baseline, dtype=float)
+    returns = np.zeros(len(value))
+    invested = baseline > 0
+    returns[invested] = (
+        (value[invested] - baseline[invested]) / baseline[invested] * 100
+    )
+    return np.round(returns, 2)
+
+
+def update_snapshots(
+    db: Session, user_id: int, now: datetime | None = None
+) -> int:
+    """
+    Add snapshots for the sessions closed since the user's last one.
+
+    The first update backfills from the earliest purchase. Only completed
+    sessions are stored, the running one is valued live. Daily bars
+    downloaded before the last close are refreshed first, so a live bar
+    is never stored as a close, and the last stored session is re-written
+    in case its bars were corrected since.
+
+    Returns:
+        Number of snapshot rows written
+    """
+    now = now or datetime.now(timezone.utc)
+    close = market_calendar.last_close(now)
+    through = close.date()
+    last = (
+        db.query(func.max(PortfolioSnapshot.date))
+        .filter(PortfolioSnapshot.user_id == user_id)
+        .scalar()
+    )
+    if last is not None and last >= through:
+        return 0
+
+    holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
+    if not holdings:
+        return 0
+
+    if last is None:
+        start = min(to_utc(h.created_at) for h in holdings)
+    else:
+        start = datetime.combine(
+            last, datetime.min.time(), tzinfo=timezone.utc
+        )
+        start -= PRICE_LOOKBACK
+
+    frame = valuation(db, holdings, start, since=close)
+    frame = frame[(frame.index <= through)]
+    if last is not None:
+        frame = frame[frame.index >= last]
+    if frame.empty:
+        return 0
+
+    returns = return_pct(frame["total_value"], frame["cost_basis"])
+    rows = [
+        {
+            "user_id": user_id,
+            "date": day,
+            "total_value": float(value),
+            "cost_basis": float(cost),
+            "return_pct": float(ret),
+            "holdings": int(count),
+        }
+        for day, value, cost, count, ret in zip(
+            frame.index,
+            frame["total_value"],
+            frame["cost_basis"],
+            frame["holdings"],
+            returns,
+        )
+    ]
+    try:
+        if last is not None:
+            db.execute(
+                delete(PortfolioSnapshot).where(
+                    PortfolioSnapshot.user_id == user_id,
+                    PortfolioSnapshot.date >= last,
+                )
+            )
+        db.execute(insert(PortfolioSnapshot), rows)
+        db.commit()
+    except IntegrityError:
+        # A concurrent update (another request, worker or the nightly job)
+        # stored these sessions first, readers use its rows
+        db.rollback()
+        logger.info(f"Portfolio snapshots of user {user_id} already stored")
+        return 0
+    logger.info(f"Stored {len(rows)} portfolio snapshots for user {user_id}")
+    return len(rows)
+
+
+def invalidate_snapshots(db: Session, user_id: int, since: datetime):
+    """
+    Drop snapshots a holding change affects, the next read backfills them.
+
+    Args:
+        since: Purchase time of the added lot
+    """
+    day = pd.Timestamp(to_utc(since)).tz_convert(market_calendar.EXCHANGE_TZ)
+    db.execute(
+        delete(PortfolioSnapshot).where(
+            PortfolioSnapshot.user_id == user_id,
+            PortfolioSnapshot.date >= day.date(),
+        )
+    )
+
+
+def live_point(holdings: list[Holding], now: datetime):
+    """
+    Value and cost basis of the portfolio at current quotes.
+
+    Returns:
+        (total_value, cost_basis, holdings), lots without a quote are
+        left out
+    """
+    lots = lots_frame(holdings)
+    quotes = fetch_quotes(lots["ticker"].unique().tolist())
+    price = lots["ticker"].map(
+        lambda t: quotes.get(t, {}).get("current_price", np.nan)
+    )
+    held = price.notna().to_numpy()
+    shares = lots["shares"].to_numpy()
+    value = float(np.where(held, price.to_numpy() * shares, 0.0).sum())
+    cost = float((held * shares * lots["buy_price"].to_numpy()).sum())
+    return value, cost, int(held.sum())
+
+
+def range_start(timeRange: str, now: datetime) -> date | None:
+    """First snapshot date of a range, like the first daily bar after it."""
+    if timeRange not in RANGE_DAYS:
+        return None
+    start = pd.Timestamp(now - timedelta(days=RANGE_DAYS[timeRange]))
+    return start.tz_convert(market_calendar.EXCHANGE_TZ).ceil("D").date()
+
+
+def snapshot_graph(
+    db: Session,
+    user_id: int,
+    holdings: list[Holding],
+    timeRange: str,
+    now: datetime,
+) -> tuple[list[dict], int]:
+    """
+    Portfolio return series of a long range, read from the snapshots.
+
+    Missing snapshots are backfilled first, then the range is a single
+    (user_id, date) range query. While a session is running its point is
+    valued live from the quote caches.
+
+    1Y measures lots bought before the range from their value on its
+    first day, like the live graph: the baseline is the value on that day
+    plus the cost of every lot bought since.
+
+    Returns:
+        (points with date and value, lots held at the last point)
+    """
+    update_snapshots(db, user_id, now)
+
+    query = db.query(
+        PortfolioSnapshot.date,
+        PortfolioSnapshot.total_value,
+        PortfolioSnapshot.cost_basis,
+        PortfolioSnapshot.holdings,
+    ).filter(PortfolioSnapshot.user_id == user_id)
+    start = range_start(timeRange, now)
+    if start is not None:
+        query = query.filter(PortfolioSnapshot.date >= start)
+    rows = query.order_by(PortfolioSnapshot.date).all()
+
+    frame = pd.DataFrame(
+        rows, columns=["date", "total_value", "cost_basis", "holdings"]
+    )
+    if market_calendar.is_open(now):
+        today = pd.Timestamp(now).tz_convert(market_calendar.EXCHANGE_TZ)
+        frame.loc[len(frame)] = [today.date(), *live_point(holdings, now)]
+    if frame.empty:
+        return [], 0
+
+    value = frame["total_value"].to_numpy(dtype=float)
+    cost = frame["cost_basis"].to_numpy(dtype=float)
+    if timeRange == "ALL":
+        baseline = cost
+    else:
+        baseline = value[0] + cost - cost[0]
+
+    dates = date_labels(pd.DatetimeIndex(frame["date"]), "1d")
+    points = [
+        {"date": day, "value": ret}
+        for day, ret in zip(dates, return_pct(value, baseline).tolist())
+    ]
+    return points, int(frame["holdings"].iloc[-1])
+
+
+def update_all_snapshots():
+    """
+    Nightly job: bring every user's snapshots up to the last close.
+    """
+    db = SessionLocal()
+    try:
+        user_ids = [
+            user_id for (user_id,) in db.query(Holding.user_id).distinct()
+        ]
+        written = 0
+        for user_id in user_ids:
+            try:
+                written += update_snapshots(db, user_id)
+            except (SQLAlchemyError, ValueError) as e:
+                db.rollback()
+                logger.error(
+                    f"Snapshot update failed for user {user_id}: {str(e)}"
+                )
+        logger.info(
+            f"Stored {written} portfolio snapshots for {len(user_ids)} users"
+        )
+    finally:
+        db.close()
@@ -0,0 +1,101 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from . import history_store
+from .cache import TTLCache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Intraday ranges need their own bars: timeRange -> (period, interval)
+INTRADAY_RANGES = {
+    "1D": ("1d", "5m"),
+    "1W": ("1wk", "30m"),
+}
+
+# Every other range is cut from one daily series:
+# timeRange -> (period, resample rule or None to keep daily bars)
+DAILY_RANGES = {
+    "1M": ("1mo", None),
+    "3M": ("3mo", None),
+    "6M": ("6mo", None),
+    "YTD": ("ytd", None),
+    "1Y": ("2y", None),
+    "5Y": ("5y", "W-FRI"),
+    "MAX": ("max", "MS"),
+}
+
+TIME_RANGES = list(INTRADAY_RANGES) + list(DAILY_RANGES)
+
+LABEL_FORMATS = {
+    "1D": "%H:%M",
+    "5Y": "%b %Y",
+    "MAX": "%Y",
+}
+DEFAULT_LABEL_FORMAT = "%b %d"
+
+# Warm daily close series, so switching ranges skips the store entirely
+DAILY_CACHE_SIZE = 256
+DAILY_CACHE_DURATION = timedelta(minutes=5)
+DAILY_CACHE = TTLCache(
+    maxsize=DAILY_CACHE_SIZE,
+    ttl=DAILY_CACHE_DURATION,
+    name="daily",
+    market_hours=True,
+)
+
+
+def get_daily_closes(db: Session, ticker: str) -> pd.Series:
+    """
+    Full daily close series for a ticker, cached in memory.
+
+    Empty series (a failed bootstrap download) are not kept, the next
+    request retries instead of a 404 until the next open.
+    """
+    symbol = ticker.upper()
+    closes = DAILY_CACHE.get_or_load(
+        symbol, lambda: history_store.get_history(db, symbol, "1d")["Close"]
+    )
+    if closes.empty:
+        DAILY_CACHE.invalidate(symbol)
+    return closes
+
+
+def slice_range(closes: pd.Series, timeRange: str) -> pd.Series:
+    """
+    Cut a daily range out of the full daily close series.
+
+    5Y is resampled to weekly closes and MAX to monthly closes.
+    """
+    period, rule = DAILY_RANGES[timeRange]
+
+    start = history_store.period_start(period, datetime.now(timezone.utc))
+    if start is not None:
+        closes = closes[closes.index >= start]
+
+    if rule is not None:
+        closes = closes.resample(rule).last().dropna()
+    return closes
+
+
+def build_range(db: Session, ticker: str, timeRange: str) -> pd.Series:
+    """
+    Return the close prices to chart for a ticker and timeRange.
+
+    Raises:
+        KeyError: If timeRange is not one of TIME_RANGES
+    """
+    if timeRange in INTRADAY_RANGES:
+        period, interval = INTRADAY_RANGES[timeRange]
+        return history_store.get_period(db, ticker, period, interval)["Close"]
+
+    return slice_range(get_daily_closes(db, ticker), timeRange)
+
+
+def format_labels(index: pd.DatetimeIndex, timeRange: str) -> list:
+    """Chart labels for a range, formatted in one vectorized pass."""
+    fmt = LABEL_FORMATS.get(timeRange, DEFAULT_LABEL_FORMAT)
+    return index.strftime(fmt).tolist()
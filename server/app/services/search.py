@@ -0,0 +1,177 @@
+import bisect
+import logging
+import re
+import threading
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+# Ranks, lower is better
+EXACT_SYMBOL = 0
+SYMBOL_PREFIX = 1
+NAME_PREFIX = 2
+NAME_SUBSTRING = 3
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a company name into upper-case word tokens."""
+    return TOKEN_PATTERN.findall((text or "").upper())
+
+
+def trigrams(text: str) -> set[str]:
+    """All 3-character substrings of text."""
+    return {a + b + c for a, b, c in zip(text, text[1:], text[2:])}
+
+
+class TickerIndex:
+    """
+    In-memory search index over the NYSE + NASDAQ ticker list.
+
+    - symbols: sorted array, prefix lookups with bisect
+    - name tokens: sorted array of word tokens, prefix lookups with bisect
+    - name trigrams: substring matches anywhere in the company name
+
+    update() only re-indexes tickers that were added, removed or renamed
+    since the last ticker list, so a daily refresh does not rebuild the
+    whole index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # symbol -> ticker dict
+        self._symbols = []  # sorted symbols
+        self._tokens = []  # sorted name tokens
+        self._token_symbols = {}  # token -> set of symbols
+        self._trigram_symbols = {}  # trigram -> set of symbols
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add(self, symbol: str, entry: dict):
+        """Index one ticker. Caller must hold the lock."""
+        self._entries[symbol] = entry
+        name = (entry.get("name") or "").upper()
+
+        for token in set(tokenize(name)):
+            self._token_symbols.setdefault(token, set()).add(symbol)
+
+        for gram in trigrams(name):
+            self._trigram_symbols.setdefault(gram, set()).add(symbol)
+
+    def _remove(self, symbol: str):
+        """Drop one ticker from the index. Caller must hold the lock."""
+        entry = self._entries.pop(symbol)
+        name = (entry.get("name") or "").upper()
+
+        for token in set(tokenize(name)):
+            symbols = self._token_symbols[token]
+            symbols.discard(symbol)
+            if not symbols:
+                del self._token_symbols[token]
+
+        for gram in trigrams(name):
+            symbols = self._trigram_symbols[gram]
+            symbols.discard(symbol)
+            if not symbols:
+                del self._trigram_symbols[gram]
+
+    def update(self, tickers: list[dict]) -> tuple[int, int]:
+        """
+        Bring the index in line with a new ticker list.
+
+        Args:
+            tickers: List of dicts with ticker, name, exchange
+
+        Returns:
+            Tuple of (added, removed) counts
+        """
+        incoming = {t["ticker"].upper(): t for t in tickers if t.get("ticker")}
+
+        with self._lock:
+            current = self._entries
+            removed = [
+                s
+                for s in current
+                if s not in incoming or current[s] != incoming[s]
+            ]
+            added = [
+                s
+                for s in incoming
+                if s not in current or current[s] != incoming[s]
+            ]
+
+            for symbol in removed:
+                self._remove(symbol)
+            for symbol in added:
+                self._add(symbol, incoming[symbol])
+
+            # Re-sorting the key arrays is cheap next to re-tokenizing
+            if added or removed:
+                self._symbols = sorted(self._entries)
+                self._tokens = sorted(self._token_symbols)
+
+        logger.info(
+            f"Ticker index updated: +{len(added)} -{len(removed)}, "
+            f"{len(self._entries)} tickers"
+        )
+        return len(added), len(removed)
+
+    def _prefix(self, sorted_keys: list[str], prefix: str) -> list[str]:
+        """All keys in a sorted list that start with prefix."""
+        start = bisect.bisect_left(sorted_keys, prefix)
+        end = bisect.bisect_left(sorted_keys, prefix + "\uffff")
+        return sorted_keys[start:end]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Return the top matches for a query, best first.
+
+        Symbols matching exactly rank first, then symbol prefixes, then
+        company-name word prefixes, then substrings of company names.
+        Ties are broken by symbol length, then alphabetically.
+        """
+        q = (query or "").strip().upper()
+        if not q:
+            return []
+
+        with self._lock:
+            ranks = {}
+
+            def rank(symbol, value):
+                if value < ranks.get(symbol, NAME_SUBSTRING + 1):
+                    ranks[symbol] = value
+
+            for symbol in self._prefix(self._symbols, q):
+                rank(symbol, EXACT_SYMBOL if symbol == q else SYMBOL_PREFIX)
+
+            # Every query word must prefix-match a word of the name
+            words = tokenize(q)
+            if words:
+                matches = None
+                for word in words:
+                    symbols = set()
+                    for token in self._prefix(self._tokens, word):
+                        symbols |= self._token_symbols[token]
+                    matches = symbols if matches is None else matches & symbols
+                for symbol in matches:
+                    rank(symbol, NAME_PREFIX)
+
+            # Fall back to substrings when there are too few matches
+            if len(ranks) < limit and len(q) >= 3:
+                grams = trigrams(q)
+                candidates = set.intersection(
+                    *(self._trigram_symbols.get(g, set()) for g in grams)
+                )
+                for symbol in candidates:
+                    name = (self._entries[symbol].get("name") or "").upper()
+                    if q in name:
+                        rank(symbol, NAME_SUBSTRING)
+
+            best = sorted(ranks, key=lambda s: (ranks[s], len(s), s))
+            return [self._entries[s] for s in best[:limit]]
+
+
+# Index over CACHE_ALLTICKERS, kept in sync by the tickers route
+TICKER_INDEX = TickerIndex()
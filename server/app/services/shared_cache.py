@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..config import SHARED_CACHE_CHECK_SECONDS, SHARED_CACHE_ENABLED
+from ..database import SessionLocal
+from ..models import CacheSnapshot
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _to_utc(timestamp: datetime) -> datetime:
+    """Cache timestamps are naive local time, store them as UTC."""
+    return timestamp.astimezone(timezone.utc)
+
+
+def _to_local(timestamp: datetime) -> datetime:
+    """Back to the naive local time the in-process caches compare with."""
+    if timestamp.tzinfo is None:
+        # SQLite drops the timezone, stored timestamps are UTC
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+class SharedSnapshot:
+    """
+    One cache value shared by every worker through the cache_snapshots table.
+
+    Workers keep serving their in-process copy and only read the table to
+    pick up a snapshot another worker published. Every publish bumps the
+    row's version, so a check is a single version lookup and the payload
+    is only fetched and parsed when the version changed.
+
+    The shared tier is best effort: database errors are logged and the
+    worker carries on with its own copy.
+
+    poll() and publish() block on the database and on (de)serializing the
+    payload; async code uses poll_async() and publish_async(), which run
+    them in a worker thread.
+
+    Args:
+        key: Row key (sp500, prices, all_tickers)
+        check_interval: Seconds between version checks
+        session_factory: Creates database sessions
+    """
+
+    def __init__(
+        self,
+        key: str,
+        check_interval: float = SHARED_CACHE_CHECK_SECONDS,
+        session_factory=SessionLocal,
+    ):
+        self.key = key
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        self.enabled = SHARED_CACHE_ENABLED
+
+        self.version = None  # version of the copy this worker holds
+        self.checked_at = None
+
+    def publish(self, data, timestamp: datetime) -> int | None:
+        """
+        Store a freshly fetched value for the other workers.
+
+        Returns:
+            The new version, None if the shared tier is unavailable
+        """
+        if not self.enabled:
+            return None
+
+        payload = json.dumps(data)
+        for _ in range(2):
+            db = self.session_factory()
+            try:
+                row = db.get(CacheSnapshot, self.key, with_for_update=True)
+                if row is None:
+                    row = CacheSnapshot(key=self.key, version=0)
+                    db.add(row)
+                row.version += 1
+                row.payload = payload
+                row.created_at = _to_utc(timestamp)
+                db.commit()
+
+                self.version = row.version
+                logger.info(f"Published {self.key} snapshot v{self.version}")
+                return self.version
+
+            except IntegrityError:
+                # Another worker inserted the row first, update it instead
+                db.rollback()
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.warning(f"Could not publish {self.key}: {str(e)}")
+                return None
+            finally:
+                db.close()
+        return None
+
+    def poll(self, force: bool = False):
+        """
+        Return a snapshot newer than this worker's copy.
+
+        Args:
+            force: Check now instead of waiting for check_interval
+
+        Returns:
+            (data, timestamp) if another worker published a new version,
+            else None
+        """
+        if not self._due(force):
+            return None
+        return self._load()
+
+    async def poll_async(self, force: bool = False):
+        """poll() off the event loop; the interval check stays inline."""
+        if not self._due(force):
+            return None
+        return await asyncio.to_thread(self._load)
+
+    async def publish_async(self, data, timestamp: datetime) -> int | None:
+        """publish() off the event loop."""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.publish, data, timestamp)
+
+    def _due(self, force: bool) -> bool:
+        """True if the shared tier should be checked now."""
+        if not self.enabled:
+            return False
+
+        now = time.monotonic()
+        if (
+            not force
+            and self.checked_at is not None
+            and now - self.checked_at < self.check_interval
+        ):
+            return False
+        self.checked_at = now
+        return True
+
+    def _load(self):
+        """Read the snapshot if its version changed, see poll()."""
+        db = self.session_factory()
+        try:
+            version = (
+                db.query(CacheSnapshot.version)
+                .filter(CacheSnapshot.key == self.key)
+                .scalar()
+            )
+            if version is None or version == self.version:
+                return None
+
+            row = db.get(CacheSnapshot, self.key)
+            data = json.loads(row.payload)
+            self.version = row.version
+            logger.info(f"Loaded {self.key} snapshot v{self.version}")
+            return data, _to_local(row.created_at)
+
+        except (SQLAlchemyError, ValueError) as e:
+            logger.warning(f"Could not read {self.key} snapshot: {str(e)}")
+            return None
+        finally:
+            db.close()
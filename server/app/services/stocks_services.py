@@ -2,21 +2,33 @@ import asyncio
 from fastapi import HTTPException
 import httpx
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import yfinance as yf
-from ..config import (
-    API_NINJAS_KEY,
-    NINJAS_BASE_URL,
-    SP500_ENDPOINT,
-    MASSIVE_API_KEY,
-    MASSIVE_BASE_URL,
-    MASSIVE_All_Tickers_ENDPOINT,
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .coalesce import coalesce, coalesce_async
+from .disk_snapshot import DiskSnapshot
+from .governor import (
+    REQUEST_ACQUIRE_TIMEOUT,
+    CircuitOpenError,
+    GovernorSaturated,
+    governed,
+    governed_async,
 )
+from .metrics import CACHE_REQUESTS
+from .shared_cache import SharedSnapshot
+from . import market_calendar, ticker_crawler
+from ..config import QUOTE_REFRESH_MINUTES
+from ..database import SessionLocal
+from ..models import ListedTicker
+from ..providers import get_provider
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 cache_lock = asyncio.Lock()
+tickers_lock = asyncio.Lock()
 
 # Global cache
 CACHE = {
@@ -27,15 +39,153 @@ CACHE = {
 }
 
 STATIC_CACHE_DURATION = timedelta(days=1)
-PRICE_CACHE_DURATION = timedelta(minutes=60)
-REQUEST_TIMEOUT = 30.0
+# Quote freshness during a session, snapshots taken after the close stay
+# fresh until the next open
+PRICE_CACHE_DURATION = timedelta(minutes=QUOTE_REFRESH_MINUTES)
+
+# Batched quote engine settings
+QUOTE_CHUNK_SIZE = 100
+SHARES_CONCURRENCY = 16
+
+# Shares outstanding barely move (issuance and buybacks show up in
+# quarterly filings), so they are kept for a week and snapshotted to disk
+# so a restart does not repeat the per-ticker fan-out. Only the prices are
+# re-downloaded during the session.
+SHARES_CACHE_DURATION = timedelta(days=7)
+SHARES_CACHE = {
+    "shares": {},
+    "timestamp": None,
+}
+
+# Per-ticker yf .info cache shared by the about, stats and summary pages
+INFO_CACHE_SIZE = 512
+INFO_CACHE_DURATION = timedelta(minutes=5)
+INFO_CACHE = TTLCache(
+    maxsize=INFO_CACHE_SIZE,
+    ttl=INFO_CACHE_DURATION,
+    name="info",
+    market_hours=True,
+)
+
+# Quotes of tickers outside the S&P 500 snapshot (portfolio tables)
+QUOTE_CACHE_SIZE = 2048
+QUOTE_CACHE = TTLCache(
+    maxsize=QUOTE_CACHE_SIZE,
+    ttl=PRICE_CACHE_DURATION,
+    name="quotes",
+    market_hours=True,
+)
+# Quote chunks downloaded at once by fetch_quotes
+QUOTE_FETCH_CONCURRENCY = 4
+
+# Background task rebuilding the price snapshot (stale-while-revalidate)
+PRICE_REFRESH = {"task": None}
+
+# CACHE entries shared with the other workers: cache key -> snapshot
+SHARED = {
+    "static_list": SharedSnapshot("sp500"),
+    "price_data": SharedSnapshot("prices"),
+}
+TIMESTAMP_KEYS = {
+    "static_list": "static_timestamp",
+    "price_data": "price_timestamp",
+}
+
+# CACHE entries written to disk for warm restarts: cache key -> snapshot
+DISK = {
+    "static_list": DiskSnapshot("sp500"),
+    "price_data": DiskSnapshot("prices"),
+}
+DISK_SHARES = DiskSnapshot("shares")
+
+# Timing and failure counts of the last batched quote refresh
+QUOTE_STATS = {
+    "last_run": None,
+    "duration": None,
+    "chunks": [],
+}
+
+
+def adopt_shared(key: str, force: bool = False) -> bool:
+    """
+    Swap in a newer CACHE[key] published by another worker.
+
+    Args:
+        key: static_list or price_data
+        force: Check the shared tier now instead of every few seconds
+
+    Returns:
+        True if the local copy was replaced
+    """
+    return _adopt(key, SHARED[key].poll(force=force))
+
+
+async def adopt_shared_async(key: str, force: bool = False) -> bool:
+    """adopt_shared() for async callers, reads the shared tier off the loop."""
+    return _adopt(key, await SHARED[key].poll_async(force=force))
+
+
+def _adopt(key: str, shared) -> bool:
+    """Swap a polled snapshot into CACHE[key] if it is newer."""
+    if shared is None:
+        return False
+
+    data, timestamp = shared
+    timestamp_key = TIMESTAMP_KEYS[key]
+    if CACHE[timestamp_key] is not None and timestamp <= CACHE[timestamp_key]:
+        return False
+
+    CACHE[key], CACHE[timestamp_key] = data, timestamp
+    logger.info(f"Adopted {key} from the shared cache")
+    return True
+
+
+async def store(key: str, data, timestamp: datetime):
+    """
+    Swap a freshly fetched CACHE[key] in and hand it to the other tiers.
+
+    The shared and disk writes serialize the whole value, they run in a
+    worker thread so the event loop keeps serving requests.
+
+    Args:
+        key: static_list or price_data
+        data: The new value
+        timestamp: When it was fetched
+    """
+    CACHE[key], CACHE[TIMESTAMP_KEYS[key]] = data, timestamp
+    await SHARED[key].publish_async(data, timestamp)
+    await asyncio.to_thread(DISK[key].save, data, timestamp)
+
+
+def restore_snapshots() -> list[str]:
+    """
+    Load the disk snapshots into an empty CACHE at boot.
+
+    Returns:
+        The cache keys that were restored
+    """
+    restored = []
+    for key, snapshot in DISK.items():
+        if CACHE[key] is not None:
+            continue
+        loaded = snapshot.load()
+        if loaded is not None:
+            CACHE[key], CACHE[TIMESTAMP_KEYS[key]] = loaded
+            restored.append(key)
+
+    loaded = DISK_SHARES.load()
+    if loaded is not None and SHARES_CACHE["timestamp"] is None:
+        SHARES_CACHE["shares"], SHARES_CACHE["timestamp"] = loaded
+        restored.append("shares")
+    return restored
 
 
 async def fetch_sp500_constituents():
     """
     Fetch and cache S&P 500 constituent list from API Ninjas.
 
-    Cache duration: 1 day. Returns stale data if API call fails.
+    Cache duration: 1 day, shared with the other workers. Returns stale
+    data if API call fails.
 
     Returns:
         List of dicts with ticker, name, sector
@@ -46,51 +196,57 @@ async def fetch_sp500_constituents():
     now = datetime.now()
 
     async with cache_lock:
+        await adopt_shared_async("static_list")
         if (
             CACHE["static_list"] is not None
             and CACHE["static_timestamp"] is not None
             and (now - CACHE["static_timestamp"]) <= STATIC_CACHE_DURATION
         ):
             logger.info("Returning cached S&P500 data")
+            CACHE_REQUESTS.inc(cache="sp500", result="hit")
+            return CACHE["static_list"]
+
+        # Another worker may have refreshed it since our last check
+        if await adopt_shared_async("static_list", force=True) and (
+            now - CACHE["static_timestamp"] <= STATIC_CACHE_DURATION
+        ):
+            CACHE_REQUESTS.inc(cache="sp500", result="hit")
             return CACHE["static_list"]
 
-        url = NINJAS_BASE_URL + SP500_ENDPOINT
-        headers = {"X-Api-Key": API_NINJAS_KEY}
+        CACHE_REQUESTS.inc(cache="sp500", result="miss")
 
         try:
-            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-                logger.info("Fetching S&P500 data from API Ninjas")
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-
-                # Filter out problematic tickers
-                excluded_tickers = {
-                    "WBA",
-                    "PARA",
-                    "IPG",
-                    "BRK.B",
-                    "BF.B",
-                    "k",
-                    "GOOG",
-                    "FOXA",
-                }
+            logger.info("Fetching S&P500 data from API Ninjas")
+            data = await governed_async(
+                "ninjas", get_provider().sp500_constituents
+            )
 
-                filtered_stocks = [
-                    {
-                        "ticker": stock["ticker"],
-                        "name": stock["company_name"],
-                        "sector": stock["sector"],
-                    }
-                    for stock in data
-                    if stock["ticker"] not in excluded_tickers
-                ]
+            # Filter out problematic tickers
+            excluded_tickers = {
+                "WBA",
+                "PARA",
+                "IPG",
+                "BRK.B",
+                "BF.B",
+                "k",
+                "GOOG",
+                "FOXA",
+            }
+
+            filtered_stocks = [
+                {
+                    "ticker": stock["ticker"],
+                    "name": stock["company_name"],
+                    "sector": stock["sector"],
+                }
+                for stock in data
+                if stock["ticker"] not in excluded_tickers
+            ]
 
-                CACHE["static_list"] = filtered_stocks
-                CACHE["static_timestamp"] = now
-                logger.info(f"Cached {len(filtered_stocks)} S&P500 stocks")
+            await store("static_list", filtered_stocks, now)
+            logger.info(f"Cached {len(filtered_stocks)} S&P500 stocks")
 
-                return filtered_stocks
+            return filtered_stocks
 
         except httpx.TimeoutException:
             logger.warning("API Ninjas request timed out")
@@ -112,7 +268,12 @@ async def fetch_sp500_constituents():
                 detail=f"API Error: {e.response.status_code}",
             )
 
-        except (httpx.RequestError, ValueError) as e:
+        except (
+            httpx.RequestError,
+            ValueError,
+            CircuitOpenError,
+            GovernorSaturated,
+        ) as e:
             logger.error(f"API Ninjas error: {str(e)}")
             if CACHE["static_list"] is not None:
                 logger.info("Returning stale cached data")
@@ -123,188 +284,427 @@ async def fetch_sp500_constituents():
             )
 
 
-async def fetch_single_ticker_async(ticker):
+def chunk_list(items, size):
+    """Split a list into consecutive chunks of at most size items."""
+    chunks = []
+    for start in range(0, len(items), size):
+        end = start + size
+        chunks.append(items[start:end])
+    return chunks
+
+
+def parse_quote_frame(frame, tickers, shares):
     """
-    Fetch current price and market data for a single ticker using yfinance.
+    Turn a yf.download daily frame into the price_data cache shape.
 
     Args:
-        ticker: Stock ticker symbol
+        frame: DataFrame returned by yf.download (columns: field, ticker)
+        tickers: Tickers requested in this chunk
+        shares: Dict of ticker -> shares outstanding
 
     Returns:
-        dict with market_cap, current_price, change_percent or None if failed
+        Dict of ticker -> market_cap, current_price, change_percent
     """
+    if frame is None or frame.empty or "Close" not in frame:
+        return {}
+
+    closes = frame["Close"]
+    if not hasattr(closes, "columns"):
+        # Single ticker downloads can come back without a ticker level
+        closes = closes.to_frame(name=tickers[0])
+
+    closes = closes.dropna(how="all").ffill()
+    if closes.empty:
+        return {}
+
+    current = closes.iloc[-1]
+    previous = closes.iloc[-2] if len(closes) > 1 else current * float("nan")
+    change = ((current - previous) / previous * 100).round(2)
+
+    quotes = {}
+    for ticker in closes.columns:
+        current_price = current[ticker]
+        if current_price != current_price:  # NaN, nothing downloaded
+            continue
+        change_percent = change[ticker]
+        quotes[ticker] = {
+            # None (N/A) rather than 0 when the share count is unknown
+            "market_cap": (
+                int(current_price * shares[ticker])
+                if shares.get(ticker)
+                else None
+            ),
+            "current_price": round(float(current_price), 2),
+            "change_percent": (
+                float(change_percent)
+                if change_percent == change_percent
+                else 0
+            ),
+        }
+    return quotes
 
-    def fetch_sync():
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            info = ticker_obj.info
 
-            current_price = info.get("currentPrice", 0)
-            previous_close = info.get("previousClose", 0)
+def fetch_quotes(tickers: list[str]) -> dict:
+    """
+    Current quotes for any tickers, with as few upstream calls as possible.
 
-            change_percent = (
-                round(
-                    (current_price - previous_close) / previous_close * 100, 2
-                )
-                if previous_close
-                else 0
+    S&P 500 names are read from the price snapshot while it is fresh, and
+    other tickers (or all of them once it expired, e.g. an old snapshot
+    restored at boot) from QUOTE_CACHE. Only the remaining ones are
+    downloaded, in
+    QUOTE_CHUNK_SIZE chunks with at most QUOTE_FETCH_CONCURRENCY running
+    at once, and cached for the next request.
+
+    Args:
+        tickers: Stock symbols
+
+    Returns:
+        Dict of ticker -> current_price, change_percent; tickers without
+        data are left out
+    """
+    symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    adopt_shared("price_data")
+    snapshot = {} if is_price_data_stale() else CACHE["price_data"]
+
+    quotes, missing = {}, []
+    for symbol in symbols:
+        quote = snapshot.get(symbol) or QUOTE_CACHE.get(symbol)
+        if quote is not None:
+            quotes[symbol] = quote
+        else:
+            missing.append(symbol)
+    if not missing:
+        return quotes
+
+    def download(chunk):
+        try:
+            frame = governed(
+                "yfinance",
+                get_provider().download,
+                chunk,
+                "5d",
+                "1d",
+                acquire_timeout=REQUEST_ACQUIRE_TIMEOUT,
             )
+            return parse_quote_frame(frame, chunk, {})
+        except Exception as e:
+            logger.warning(f"Quote download failed for {chunk}: {str(e)}")
+            return {}
 
-            market_cap = info.get("marketCap", 0)
+    chunks = chunk_list(missing, QUOTE_CHUNK_SIZE)
+    workers = min(QUOTE_FETCH_CONCURRENCY, len(chunks))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for fetched in pool.map(download, chunks):
+            for symbol, quote in fetched.items():
+                QUOTE_CACHE.set(symbol, quote)
+            quotes.update(fetched)
 
-            return {
-                "market_cap": market_cap,
-                "current_price": (
-                    round(current_price, 2) if current_price else 0
-                ),
-                "change_percent": change_percent,
-            }
+    logger.info(f"Downloaded quotes for {len(missing)} tickers")
+    return quotes
+
+
+def ticker_names(db: Session, tickers: list[str]) -> dict:
+    """
+    Company names from the constituents list and the listed tickers.
+
+    Tickers in neither are named from their info (INFO_CACHE), fetched
+    concurrently.
+
+    Returns:
+        Dict of ticker -> name, unknown tickers are left out
+    """
+    constituents = {
+        stock["ticker"]: stock["name"] for stock in CACHE["static_list"] or []
+    }
+    names = {t: constituents[t] for t in tickers if t in constituents}
+
+    others = [t for t in tickers if t not in names]
+    if others:
+        names.update(
+            db.query(ListedTicker.ticker, ListedTicker.name)
+            .filter(ListedTicker.ticker.in_(others))
+            .all()
+        )
+
+    def long_name(ticker):
+        try:
+            return ticker, fetch_info(ticker).get("longName")
+        except Exception as e:
+            logger.warning(f"No name for {ticker}: {str(e)}")
+            return ticker, None
+
+    unnamed = [t for t in tickers if not names.get(t)]
+    if unnamed:
+        workers = min(QUOTE_FETCH_CONCURRENCY, len(unnamed))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            names.update(pool.map(long_name, unnamed))
+    return {t: name for t, name in names.items() if name}
+
+
+async def fetch_shares_outstanding(tickers):
+    """
+    Fetch and cache shares outstanding, used to derive market caps.
+
+    Only tickers missing from the cache are fetched, and the whole cache is
+    dropped every SHARES_CACHE_DURATION. Tickers whose count is unknown
+    are left out (and retried on the next call) rather than stored as 0.
+    New counts are written to the disk snapshot.
+
+    Returns:
+        Dict of ticker -> shares outstanding
+    """
+    now = datetime.now()
+    if (
+        SHARES_CACHE["timestamp"] is None
+        or (now - SHARES_CACHE["timestamp"]) > SHARES_CACHE_DURATION
+    ):
+        SHARES_CACHE["shares"] = {}
+        SHARES_CACHE["timestamp"] = now
+
+    shares = SHARES_CACHE["shares"]
+    missing = [t for t in tickers if t not in shares]
+    if not missing:
+        return shares
+
+    logger.info(f"Fetching shares outstanding for {len(missing)} tickers")
+    semaphore = asyncio.Semaphore(SHARES_CONCURRENCY)
+    loop = asyncio.get_event_loop()
 
+    def fetch_sync(ticker):
+        try:
+            shares = governed(
+                "yfinance", get_provider().shares_outstanding, ticker
+            )
+            return shares or None
         except Exception as e:
-            logger.warning(f"Failed to fetch {ticker}: {e}")
+            logger.warning(f"Failed to fetch shares for {ticker}: {e}")
             return None
 
-    # Run blocking yfinance call in thread pool
+    async def fetch_one(ticker):
+        async with semaphore:
+            result = await loop.run_in_executor(None, fetch_sync, ticker)
+        if result is not None:
+            shares[ticker] = result
+
+    await asyncio.gather(*(fetch_one(t) for t in missing))
+    if any(t in shares for t in missing):
+        await asyncio.to_thread(
+            DISK_SHARES.save, dict(shares), SHARES_CACHE["timestamp"]
+        )
+    return shares
+
+
+async def fetch_quotes_batch(tickers):
+    """
+    Fetch last price, previous close and market cap for many tickers.
+
+    Prices come from chunked provider downloads (a handful of bulk requests
+    instead of one .info scrape per ticker). Per-chunk timing and failure
+    counts are recorded in QUOTE_STATS.
+
+    Args:
+        tickers: List of ticker symbols
+
+    Returns:
+        Dict of ticker -> market_cap, current_price, change_percent
+    """
+    shares = await fetch_shares_outstanding(tickers)
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, fetch_sync)
-    # None: use's the fastapi built thread pool
 
+    def download_sync(chunk):
+        return governed("yfinance", get_provider().download, chunk, "5d", "1d")
 
-async def fetch_price_data():
+    async def fetch_chunk(index, chunk):
+        started = time.perf_counter()
+        try:
+            frame = await loop.run_in_executor(None, download_sync, chunk)
+            quotes = parse_quote_frame(frame, chunk, shares)
+            error = None
+        except Exception as e:
+            logger.warning(f"Quote chunk {index} failed: {e}")
+            quotes = {}
+            error = str(e)
+
+        QUOTE_STATS["chunks"].append(
+            {
+                "chunk": index,
+                "tickers": len(chunk),
+                "failed": len(chunk) - len(quotes),
+                "seconds": round(time.perf_counter() - started, 3),
+                "error": error,
+            }
+        )
+        return quotes
+
+    started = time.perf_counter()
+    QUOTE_STATS["chunks"] = []
+    chunks = chunk_list(tickers, QUOTE_CHUNK_SIZE)
+    results = await asyncio.gather(
+        *(fetch_chunk(i, chunk) for i, chunk in enumerate(chunks))
+    )
+
+    price_data = {}
+    for quotes in results:
+        price_data.update(quotes)
+
+    QUOTE_STATS["last_run"] = datetime.now()
+    QUOTE_STATS["duration"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Batched quotes: {len(price_data)}/{len(tickers)} tickers in "
+        f"{len(chunks)} chunks, {QUOTE_STATS['duration']}s"
+    )
+    return price_data
+
+
+def price_data_age():
+    """Seconds since the cached price snapshot was taken, None if empty."""
+    timestamp = CACHE["price_timestamp"]
+    if CACHE["price_data"] is None or timestamp is None:
+        return None
+    return int((datetime.now() - timestamp).total_seconds())
+
+
+def is_price_data_stale():
+    """
+    True when the cached price snapshot expired.
+
+    Snapshots expire after PRICE_CACHE_DURATION during an NYSE session.
+    One taken while the market is closed holds the last close and stays
+    fresh until the next open.
+    """
+    timestamp = CACHE["price_timestamp"]
+    if CACHE["price_data"] is None or timestamp is None:
+        return True
+    return not market_calendar.is_fresh(timestamp, PRICE_CACHE_DURATION)
+
+
+async def refresh_price_data():
     """
-    Fetch and cache price data for all S&P 500 stocks.
+    Rebuild the price snapshot and swap it into CACHE.
 
-    Cache duration: 20 minutes. Returns stale cache if fetch fails.
+    The new snapshot is built off to the side and both cache keys are
+    replaced together, so readers never see a half-built snapshot. It is
+    then published to the shared cache and written to disk, and a fresh
+    snapshot published by another worker is adopted instead of fetching
+    again.
 
     Raises:
-        HTTPException: If constituents not loaded or fetch fails with no cache
+        HTTPException: If the constituents cannot be loaded
+        ValueError: If no quotes could be fetched
     """
-    now = datetime.now()
+    if CACHE["static_list"] is None:
+        # Cold start, the prices can be asked for before the constituents
+        await fetch_sp500_constituents()
 
-    async with cache_lock:
-        # Check if cache is still valid
-        if (
-            CACHE["price_data"] is not None
-            and CACHE["price_timestamp"] is not None
-            and (now - CACHE["price_timestamp"]) <= PRICE_CACHE_DURATION
-        ):
-            logger.info("Returning cached price data")
-            return CACHE["price_data"]
+    # Another worker may already have refreshed it
+    if (
+        await adopt_shared_async("price_data", force=True)
+        and not is_price_data_stale()
+    ):
+        return CACHE["price_data"]
 
-        # Check if we have static list
-        if CACHE["static_list"] is None:
-            raise HTTPException(
-                status_code=500, detail="S&P 500 constituents not loaded"
-            )
+    started = datetime.now()
+    tickers = [stock["ticker"] for stock in CACHE["static_list"]]
+    logger.info(f"Fetching price data for {len(tickers)} tickers")
+    price_data = await fetch_quotes_batch(tickers)
 
-        tickers = [stock["ticker"] for stock in CACHE["static_list"]]
+    if not price_data:
+        raise ValueError("No quotes returned")
 
-        try:
-            logger.info(f"Fetching price data for {len(tickers)} tickers")
-            price_data = {}
-
-            # Create all fetch tasks
-            tasks = [fetch_single_ticker_async(ticker) for ticker in tickers]
-
-            # Run all tasks concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            for ticker, result in zip(tickers, results):
-                if result and not isinstance(result, Exception):
-                    price_data[ticker] = (
-                        result  # Store as dict with ticker as key
-                    )
-
-            CACHE["price_data"] = price_data
-            CACHE["price_timestamp"] = now
-            logger.info(
-                f"Cached price data for {len(price_data)}/{len(tickers)} tickers"
-            )
-            return price_data
+    await store("price_data", price_data, started)
+    logger.info(
+        f"Cached price data for {len(price_data)}/{len(tickers)} tickers"
+    )
+    return price_data
 
-        except Exception as e:
-            logger.error(f"Error fetching price data: {str(e)}")
 
-            # Return stale cache if available
-            if CACHE["price_data"] is not None:
-                logger.info("Using stale price cache")
-                return CACHE["price_data"]
+def _log_refresh_result(task):
+    """Log the outcome of a background price refresh."""
+    if task.cancelled():
+        logger.warning("Price refresh cancelled")
+    elif task.exception() is not None:
+        logger.error(f"Price refresh failed: {str(task.exception())}")
 
-            raise HTTPException(
-                status_code=503,
-                detail="Unable to fetch price data and no cache available",
-            )
+
+def schedule_price_refresh():
+    """
+    Start a background price refresh unless one is already running.
+
+    Returns:
+        The running refresh task
+    """
+    task = PRICE_REFRESH["task"]
+    if task is None or task.done():
+        task = asyncio.create_task(refresh_price_data())
+        task.add_done_callback(_log_refresh_result)
+        PRICE_REFRESH["task"] = task
+    return task
 
 
-async def fetch_tickers(exchange: str):
+async def fetch_price_data():
+    """
+    Return price data for all S&P 500 stocks (stale-while-revalidate).
+
+    Cache duration: PRICE_CACHE_DURATION during a session, until the next
+    open after the close. Once it expires, the last snapshot is
+    returned immediately and a single background task rebuilds the next
+    one. Only a cold cache makes the caller wait for the fetch. Snapshots
+    published by other workers replace the local copy when newer.
+
+    Raises:
+        HTTPException: If the fetch fails with no cache
+    """
+    await adopt_shared_async("price_data")
+    if CACHE["price_data"] is not None:
+        if is_price_data_stale():
+            logger.info("Price cache stale, refreshing in background")
+            CACHE_REQUESTS.inc(cache="prices", result="stale")
+            schedule_price_refresh()
+        else:
+            logger.info("Returning cached price data")
+            CACHE_REQUESTS.inc(cache="prices", result="hit")
+        return CACHE["price_data"]
+
+    CACHE_REQUESTS.inc(cache="prices", result="miss")
+
+    # Cold cache: wait for the (shared) refresh task
+    try:
+        return await asyncio.shield(schedule_price_refresh())
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.error(f"Error fetching price data: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to fetch price data and no cache available",
+        )
+
+
+async def fetch_tickers(exchange: str, force: bool = False):
     """
     Fetch all tickers for a given exchange.
+
+    Concurrent calls for the same exchange share one crawl.
+
     Args:
         exchange: Exchange name (nasdaq or nyse)
+        force: Crawl even if the last completed crawl is still fresh
     Returns:
         List of dicts with ticker, name, exchange
     """
-    exchange_codes = {"nasdaq": "XNAS", "nyse": "XNYS"}
+    return await coalesce_async(
+        ("massive_tickers", exchange),
+        lambda: _fetch_tickers(exchange, force),
+    )
 
-    url = MASSIVE_BASE_URL + MASSIVE_All_Tickers_ENDPOINT
-    params = {
-        "market": "stocks",
-        "exchange": exchange_codes[exchange],
-        "limit": 1000,
-        "apiKey": MASSIVE_API_KEY,
-    }
 
-    tickers = []
+async def _fetch_tickers(exchange: str, force: bool = False):
+    """Run the resumable Massive crawl for one exchange."""
+    db = SessionLocal()
     try:
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-            # First request with params
-            response = await client.get(url, params=params)
-            logger.info(f"Fetching all the tickers on {exchange}")
-            response.raise_for_status()
-            data = response.json()
-
-            results = data.get("results", [])
-            for stock in results:
-                tickers.append(
-                    {
-                        "ticker": stock.get("ticker"),
-                        "name": stock.get("name"),
-                        "exchange": exchange.upper(),
-                    }
-                )
-
-            next_url = data.get("next_url")
-            logger.info(f"Next URL: {next_url}")
-
-            # Subsequent requests
-            while next_url:
-                # Api rate limit delay
-                await asyncio.sleep(30)
-
-                # Append API key to next_url
-                url_with_key = f"{next_url}&apiKey={MASSIVE_API_KEY}"
-
-                response = await client.get(url_with_key)
-                # No params on pagination
-                response.raise_for_status()
-                data = response.json()
-
-                results = data.get("results", [])
-                for stock in results:
-                    tickers.append(
-                        {
-                            "ticker": stock.get("ticker"),
-                            "name": stock.get("name"),
-                            "exchange": exchange.upper(),
-                        }
-                    )
-
-                next_url = data.get("next_url")
-                logger.info(f"Next URL: {next_url}")
-
-            logger.info(f"Fetched {len(tickers)} tickers from {exchange}")
-            return tickers
+        return await ticker_crawler.crawl_exchange(db, exchange, force)
 
     except httpx.TimeoutException:
         logger.error(f"Massive API request timeout for {exchange}.")
@@ -319,12 +719,20 @@ async def fetch_tickers(exchange: str):
             status_code=e.response.status_code,
             detail=f"API error fetching {exchange} tickers",
         )
-    except (httpx.RequestError, ValueError) as e:
+    except (
+        httpx.RequestError,
+        ValueError,
+        CircuitOpenError,
+        GovernorSaturated,
+    ) as e:
         logger.error(f"Error fetching {exchange} tickers: {str(e)}")
         raise HTTPException(
             status_code=503, detail=f"Unable to fetch {exchange} tickers"
         )
 
+    finally:
+        db.close()
+
 
 def truncate_summary(text, max_chars=700):
     """Truncate text to max_chars, ending at a sentence if possible."""
@@ -342,16 +750,105 @@ def truncate_summary(text, max_chars=700):
     return truncated.rstrip() + "..."
 
 
-# Helper to safely get values from yf
-def get(ticker, key, default="N/A"):
-    try:
-        stock = yf.Ticker(ticker.upper())
-        info = stock.info
+def fetch_info(ticker):
+    """
+    Return .info for a ticker through the per-ticker INFO_CACHE.
+
+    Concurrent misses for the same ticker share a single upstream fetch.
+    Empty responses are not cached.
+
+    Raises:
+        HTTPException: If the ticker is not found
+    """
+    symbol = ticker.upper()
+
+    def load():
+        info = governed(
+            "yfinance",
+            get_provider().info,
+            symbol,
+            acquire_timeout=REQUEST_ACQUIRE_TIMEOUT,
+        )
         if not info:
             logger.error("HTTP error occurred")
             raise HTTPException(
                 status_code=404, detail=f"Ticker '{ticker}' not found"
             )
+        return info
+
+    try:
+        return INFO_CACHE.get_or_load(symbol, load)
+
+    except (CircuitOpenError, GovernorSaturated) as e:
+        # Serve an expired entry rather than nothing while Yahoo is down
+        # or busy
+        stale = INFO_CACHE.peek(symbol)
+        if stale is None:
+            raise
+        logger.warning(f"Serving stale info for {symbol}: {str(e)}")
+        return stale
+
+
+def fetch_history(ticker, **params):
+    """
+    Fetch price history for a ticker from the market data provider.
+
+    Concurrent identical requests (same ticker and params) share one
+    upstream call. It is made on the request path, so it waits at most
+    REQUEST_ACQUIRE_TIMEOUT for a permit.
+
+    Args:
+        ticker: Stock symbol
+        **params: Keyword arguments like yf.Ticker.history (period, start,
+            end, interval)
+
+    Returns:
+        DataFrame with historical prices
+    """
+    symbol = ticker.upper()
+    key = ("history", symbol, tuple(sorted(params.items())))
+    return coalesce(
+        key,
+        lambda: governed(
+            "yfinance",
+            get_provider().history,
+            symbol,
+            acquire_timeout=REQUEST_ACQUIRE_TIMEOUT,
+            **params,
+        ),
+    )
+
+
+def fetch_history_many(tickers: list[str], **params) -> dict:
+    """
+    Fetch price history for many tickers in one batched provider request.
+
+    Args:
+        tickers: Stock symbols
+        **params: Keyword arguments like fetch_history (period or start,
+            interval)
+
+    Returns:
+        Dict of ticker -> DataFrame, tickers without data are left out
+    """
+    symbols = sorted({ticker.upper() for ticker in tickers})
+    key = ("history_many", tuple(symbols), tuple(sorted(params.items())))
+    return coalesce(
+        key,
+        lambda: governed(
+            "yfinance",
+            get_provider().history_many,
+            symbols,
+            acquire_timeout=REQUEST_ACQUIRE_TIMEOUT,
+            **params,
+        ),
+    )
+
+
+# Helper to safely get values from yf
+def get(ticker, key, default="N/A"):
+    try:
+        info = fetch_info(ticker)
         val = info.get(key)
         if val is None or val == "":
             return default
@@ -359,6 +856,16 @@ def get(ticker, key, default="N/A"):
 
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        logger.error(f"Market data provider unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=503, detail="Market data provider unavailable"
+        )
+    except GovernorSaturated as e:
+        logger.warning(f"Market data provider busy: {str(e)}")
+        raise HTTPException(
+            status_code=503, detail="Market data provider busy"
+        )
     except Exception as e:
         logger.error(f"An unexpected error occured: {str(e)}")
         raise HTTPException(
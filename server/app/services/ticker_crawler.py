@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy.orm import Session
+
+from ..config import MASSIVE_REQUESTS_PER_MINUTE
+from ..models import CrawlState, ListedTicker
+from ..providers import get_provider
+from .governor import governed_async
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+
+# A completed crawl is reused for this long before crawling again
+CRAWL_DURATION = timedelta(days=1)
+
+# Added and delisted tickers of the last completed crawl per exchange
+LAST_CRAWL = {}
+
+
+class SlidingWindowLimiter:
+    """
+    Async rate limiter: at most `limit` requests in any `window` seconds.
+
+    Unlike a token bucket that starts full, a burst at the start of a
+    crawl cannot be followed by a full refill within the same window.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._sent = deque()  # monotonic times of the requests in window
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request fits in the window and record it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._sent and self._sent[0] <= now - self.window:
+                    self._sent.popleft()
+                if len(self._sent) < self.limit:
+                    break
+                await asyncio.sleep(self._sent[0] + self.window - now)
+            self._sent.append(now)
+
+
+# Shared by both exchange crawls since they use the same API key
+MASSIVE_LIMITER = SlidingWindowLimiter(
+    limit=MASSIVE_REQUESTS_PER_MINUTE, window=60
+)
+
+
+def _aware(ts: datetime | None) -> datetime | None:
+    """SQLite drops the timezone, stored timestamps are UTC."""
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+async def _get_page(exchange: str, cursor: str | None):
+    """
+    Fetch one page within the rate limit, retrying 429s.
+
+    Args:
+        exchange: Exchange name (nasdaq or nyse)
+        cursor: None for the first page, else the previous next_url
+
+    Raises:
+        httpx.HTTPStatusError: If the page still fails after MAX_RETRIES
+        CircuitOpenError: If the Massive breaker is open
+        GovernorSaturated: If no Massive permit was freed in time
+    """
+    provider = get_provider()
+    for attempt in range(MAX_RETRIES + 1):
+        await MASSIVE_LIMITER.acquire()
+        try:
+            return await governed_async(
+                "massive", provider.ticker_page, exchange, cursor
+            )
+
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 429 or attempt == MAX_RETRIES:
+                raise
+            retry_after = float(e.response.headers.get("Retry-After", 60))
+            logger.warning(
+                f"Massive API rate limited, retrying in {retry_after}s"
+            )
+            await asyncio.sleep(retry_after)
+
+
+def upsert_page(
+    db: Session, exchange: str, results: list[dict], seen_at: datetime
+) -> int:
+    """
+    Insert or refresh one page of tickers.
+
+    Returns:
+        Number of tickers that were not stored yet
+    """
+    page = {
+        stock["ticker"]: stock.get("name")
+        for stock in results
+        if stock.get("ticker")
+    }
+    existing = {
+        row.ticker: row
+        for row in db.query(ListedTicker).filter(
+            ListedTicker.ticker.in_(list(page))
+        )
+    }
+
+    added = 0
+    for symbol, name in page.items():
+        row = existing.get(symbol)
+        if row is None:
+            db.add(
+                ListedTicker(
+                    ticker=symbol,
+                    exchange=exchange.upper(),
+                    name=name,
+                    active=True,
+                    first_seen_at=seen_at,
+                    last_seen_at=seen_at,
+                )
+            )
+            added += 1
+        else:
+            if not row.active:
+                added += 1
+            row.exchange = exchange.upper()
+            row.name = name
+            row.active = True
+            row.last_seen_at = seen_at
+    return added
+
+
+def stored_tickers(db: Session, exchange: str) -> list[dict]:
+    """Active tickers of an exchange in the cache's list-of-dicts shape."""
+    rows = (
+        db.query(ListedTicker)
+        .filter(
+            ListedTicker.exchange == exchange.upper(),
+            ListedTicker.active.is_(True),
+        )
+        .order_by(ListedTicker.ticker)
+        .all()
+    )
+    return [
+        {"ticker": row.ticker, "name": row.name, "exchange": row.exchange}
+        for row in rows
+    ]
+
+
+async def crawl_exchange(
+    db: Session, exchange: str, force: bool = False
+) -> list[dict]:
+    """
+    Crawl every ticker on an exchange, resuming an interrupted crawl.
+
+    Each page is upserted into listed_tickers and the pagination cursor
+    is committed with it, so a failure only loses the page in flight.
+    Once the last page is stored, tickers the crawl did not return are
+    marked delisted, and the added/delisted symbols are recorded in
+    LAST_CRAWL.
+
+    Args:
+        db: Database session
+        exchange: Exchange name (nasdaq or nyse)
+        force: Crawl even if the last completed crawl is still fresh
+
+    Returns:
+        List of dicts with ticker, name, exchange
+    """
+    now = datetime.now(timezone.utc)
+    state = db.get(CrawlState, exchange)
+    if state is None:
+        state = CrawlState(exchange=exchange, pages=0)
+        db.add(state)
+
+    completed_at = _aware(state.completed_at)
+    if (
+        not force
+        and state.next_url is None
+        and completed_at is not None
+        and now - completed_at < CRAWL_DURATION
+    ):
+        logger.info(f"Using stored {exchange} tickers")
+        return stored_tickers(db, exchange)
+
+    if state.next_url is None:
+        # Start a new crawl
+        state.started_at = now
+        state.pages = 0
+        logger.info(f"Starting ticker crawl for {exchange}")
+    else:
+        logger.info(
+            f"Resuming ticker crawl for {exchange} at page {state.pages + 1}"
+        )
+
+    started_at = _aware(state.started_at)
+    cursor = state.next_url
+    while True:
+        data = await _get_page(exchange, cursor)
+        new = upsert_page(db, exchange, data.get("results", []), started_at)
+
+        cursor = data.get("next_url")
+        state.next_url = cursor
+        state.pages += 1
+        state.updated_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(f"Stored {exchange} page {state.pages} (+{new} new)")
+        if cursor is None:
+            break
+
+    delisted_rows = (
+        db.query(ListedTicker)
+        .filter(
+            ListedTicker.exchange == exchange.upper(),
+            ListedTicker.active.is_(True),
+            ListedTicker.last_seen_at < started_at,
+        )
+        .all()
+    )
+    for row in delisted_rows:
+        row.active = False
+
+    added = [
+        row.ticker
+        for row in db.query(ListedTicker).filter(
+            ListedTicker.exchange == exchange.upper(),
+            ListedTicker.first_seen_at >= started_at,
+        )
+    ]
+    delisted = [row.ticker for row in delisted_rows]
+
+    state.completed_at = datetime.now(timezone.utc)
+    db.commit()
+
+    LAST_CRAWL[exchange] = {
+        "added": added,
+        "delisted": delisted,
+        "pages": state.pages,
+        "completed_at": state.completed_at,
+    }
+    logger.info(
+        f"Crawled {exchange}: {state.pages} pages, "
+        f"{len(added)} added, {len(delisted)} delisted"
+    )
+    return stored_tickers(db, exchange)
+
+
+def has_changes(exchanges: list[str]) -> bool:
+    """True unless the last crawl of every exchange found no changes."""
+    for exchange in exchanges:
+        crawl = LAST_CRAWL.get(exchange)
+        if crawl is None or crawl["added"] or crawl["delisted"]:
+            return True
+    return False
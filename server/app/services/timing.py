@@ -0,0 +1,115 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Timings of the request being handled, set by TimingMiddleware. Starlette
+# copies the context into threadpool workers, so sync routes record into
+# the same object.
+CURRENT = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Spans and counters collected while handling one request.
+
+    Spans with the same name accumulate: three history fetches show up as
+    one upstream_history span with a count of 3.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}  # name -> [seconds, count]
+        self.cache = {}  # cache name -> [hits, misses]
+        self.handler_done = None
+        self.profile = False  # sampled for profiling
+        self.profiler = None
+
+    def add(self, name: str, seconds: float):
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += 1
+
+    def cache_lookup(self, name: str, hit: bool):
+        counts = self.cache.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self, total: float) -> str:
+        """Server-Timing header value (durations in ms)."""
+        metrics = [
+            f'{name};dur={seconds * 1000:.1f};desc="{count}x"'
+            for name, (seconds, count) in self.spans.items()
+        ]
+        metrics += [
+            f'cache_{name};desc="{hits} hit {misses} miss"'
+            for name, (hits, misses) in self.cache.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> dict:
+        """Spans and cache counters for the structured log line."""
+        return {
+            "spans": {
+                name: {"ms": round(seconds * 1000, 1), "count": count}
+                for name, (seconds, count) in self.spans.items()
+            },
+            "cache": {
+                name: {"hits": hits, "misses": misses}
+                for name, (hits, misses) in self.cache.items()
+            },
+        }
+
+
+def current() -> RequestTimings | None:
+    """Timings of the request being handled, None outside a request."""
+    return CURRENT.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current request's span `name`."""
+    timings = CURRENT.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def record_cache(name: str, hit: bool):
+    """Count a cache lookup against the current request."""
+    timings = CURRENT.get()
+    if timings is not None:
+        timings.cache_lookup(name, hit)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, params, context, many):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, params, context, many):
+    started = conn.info["query_started"].pop()
+    timings = CURRENT.get()
+    if timings is not None:
+        timings.add("db", time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute never runs for a failed query
+    if context.connection is not None:
+        stack = context.connection.info.get("query_started")
+        if stack:
+            stack.pop()
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -7,9 +9,15 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Tests run in one process, shared cache and snapshot tests opt in
+# explicitly
+os.environ.setdefault("SHARED_CACHE_ENABLED", "false")
+os.environ.setdefault("SNAPSHOT_ENABLED", "false")
+
 from ..main import app
 from ..database import Base, get_db
 from ..models import User
+from ..services import portfolio_cache
 
 
 # Create in-memory SQLite database for testing
@@ -44,6 +52,8 @@ def db():
         db.close()
         # Drop all tables after test
         Base.metadata.drop_all(bind=engine)
+        # Cached portfolio results are keyed by ids of the dropped tables
+        portfolio_cache.RESULT_CACHE.clear()
 
 
 @pytest.fixture
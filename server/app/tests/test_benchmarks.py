@@ -0,0 +1,36 @@
+from benchmarks.report import compare, percentile, summarize
+
+
+def test_summarize_percentiles_and_throughput():
+    """Test that latencies are reported in ms with nearest-rank percentiles"""
+    latencies = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    result = summarize(latencies, elapsed=2.0, errors=1)
+
+    assert result["p50_ms"] == 50
+    assert result["p99_ms"] == 99
+    assert result["max_ms"] == 100
+    assert result["throughput_rps"] == 50
+    assert percentile([5.0], 99) == 5.0
+
+
+def test_compare_flags_regressions_over_threshold():
+    """Test that only cases slower than the threshold are regressions"""
+    baseline = {
+        "results": {
+            "fast": {"p50_ms": 10, "p99_ms": 20},
+            "slow": {"p50_ms": 10, "p99_ms": 20},
+        }
+    }
+    current = {
+        "results": {
+            "fast": {"p50_ms": 10.5, "p99_ms": 21},
+            "slow": {"p50_ms": 10, "p99_ms": 30},
+            "new": {"p50_ms": 1, "p99_ms": 1},
+        }
+    }
+    rows = {row["case"]: row for row in compare(baseline, current, 0.1)}
+
+    assert set(rows) == {"fast", "slow"}
+    assert not rows["fast"]["regression"]
+    assert rows["slow"]["regression"]
+    assert rows["slow"]["p99_ratio"] == 1.5
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from ..services.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted first"""
+    cache = TTLCache(maxsize=2, ttl=timedelta(minutes=1))
+    cache.set("AAPL", 1)
+    cache.set("MSFT", 2)
+
+    # Touch AAPL so MSFT becomes the least recently used entry
+    assert cache.get("AAPL") == 1
+    cache.set("NVDA", 3)
+
+    assert cache.get("MSFT") is None
+    assert cache.get("AAPL") == 1
+    assert cache.get("NVDA") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    """Test that entries older than the TTL are treated as misses"""
+    cache = TTLCache(maxsize=10, ttl=timedelta(seconds=0))
+    cache.set("AAPL", 1)
+    time.sleep(0.01)
+
+    assert cache.get("AAPL") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_get_or_load_is_single_flight():
+    """Test that concurrent misses on one key run the loader once"""
+    cache = TTLCache(maxsize=10, ttl=timedelta(minutes=1))
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"currentPrice": 180.5}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_load("AAPL", loader))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"currentPrice": 180.5}] * 8
+
+
+def test_ttl_cache_does_not_cache_loader_errors():
+    """Test that a failed load is re-raised and retried on the next call"""
+    cache = TTLCache(maxsize=10, ttl=timedelta(minutes=1))
+
+    def failing_loader():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("AAPL", failing_loader)
+
+    assert cache.get_or_load("AAPL", lambda: 42) == 42
+
+
+def test_ttl_cache_entries_can_have_their_own_ttl():
+    """Test that a per-entry TTL overrides the cache's default"""
+    cache = TTLCache(maxsize=10, ttl=timedelta(minutes=1))
+    cache.set("AAPL", 1, ttl=timedelta(seconds=0))
+    cache.get_or_load("MSFT", lambda: 2, ttl=timedelta(seconds=0))
+    cache.set("NVDA", 3)
+    time.sleep(0.01)
+
+    assert cache.get("AAPL") is None
+    assert cache.get("MSFT") is None
+    assert cache.get("NVDA") == 3
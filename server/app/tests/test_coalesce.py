@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..services.coalesce import SingleFlight
+
+
+def test_single_flight_coalesces_threads():
+    """Test that concurrent sync calls with one key share one call"""
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return "history"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                flight.do(("history", "AAPL", "1d"), fetch)
+            )
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["history"] * 10
+    assert flight.stats()["shared"] == 9
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_coroutines():
+    """Test that concurrent async calls share one call per key"""
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(exchange):
+        calls.append(exchange)
+        await asyncio.sleep(0.01)
+        return exchange.upper()
+
+    results = await asyncio.gather(
+        *(
+            flight.do_async(("tickers", exchange), lambda e=exchange: fetch(e))
+            for exchange in ["nyse", "nyse", "nasdaq", "nyse", "nasdaq"]
+        )
+    )
+
+    assert sorted(calls) == ["nasdaq", "nyse"]
+    assert results == ["NYSE", "NYSE", "NASDAQ", "NYSE", "NASDAQ"]
+
+    # Nothing is cached once the calls complete
+    await flight.do_async(("tickers", "nyse"), lambda: fetch("nyse"))
+    assert len(calls) == 3
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ..routes import stocks
+from ..services import stocks_services
+from ..services.disk_snapshot import DiskSnapshot
+
+
+def snapshot(tmp_path, key):
+    disk = DiskSnapshot(key, directory=str(tmp_path))
+    disk.enabled = True
+    return disk
+
+
+def test_disk_snapshot_round_trip(tmp_path):
+    """Test that a saved value loads back with its timestamp"""
+    disk = snapshot(tmp_path, "prices")
+    taken = datetime(2025, 3, 14, 16, 5)
+    assert disk.load() is None
+
+    assert disk.save({"AAPL": {"current_price": 110.0}}, taken)
+    assert disk.load() == ({"AAPL": {"current_price": 110.0}}, taken)
+
+    # A torn or foreign file is ignored instead of crashing the boot
+    with open(disk.path, "wb") as f:
+        f.write(b"not gzip")
+    assert disk.load() is None
+
+
+@pytest.mark.asyncio
+async def test_restore_caches_serves_snapshots_and_refreshes(tmp_path, mocker):
+    """Test that a restart serves the disk snapshots and then refreshes"""
+    taken = datetime.now() - timedelta(days=7)
+    disks = {
+        "static_list": snapshot(tmp_path, "sp500"),
+        "price_data": snapshot(tmp_path, "prices"),
+    }
+    disks["static_list"].save([{"ticker": "AAPL"}], taken)
+    disks["price_data"].save({"AAPL": {"current_price": 100.0}}, taken)
+    tickers = snapshot(tmp_path, "all_tickers")
+    tickers.save([{"ticker": "AAPL", "name": "Apple Inc."}], taken)
+
+    temp_cache = dict.fromkeys(stocks_services.CACHE)
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+    mocker.patch.dict(stocks_services.DISK, disks)
+    mocker.patch("app.routes.stocks.DISK_ALLTICKERS", tickers)
+    mocker.patch.dict(stocks.CACHE_ALLTICKERS, {"list": None})
+    mocker.patch("app.routes.stocks.TICKER_INDEX")
+    refresh = mocker.patch("app.routes.stocks.refresh_restored", AsyncMock())
+
+    await stocks.restore_caches()
+
+    assert temp_cache["static_list"] == [{"ticker": "AAPL"}]
+    assert temp_cache["price_data"] == {"AAPL": {"current_price": 100.0}}
+    assert temp_cache["price_timestamp"] == taken
+    assert stocks.CACHE_ALLTICKERS["list"][0]["ticker"] == "AAPL"
+    refresh.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cold_price_refresh_loads_constituents_first(mocker):
+    """Test that prices asked for before the constituents still load"""
+    temp_cache = dict.fromkeys(stocks_services.CACHE)
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+
+    async def load_constituents():
+        temp_cache["static_list"] = [{"ticker": "AAPL"}]
+
+    mocker.patch(
+        "app.services.stocks_services.fetch_sp500_constituents",
+        side_effect=load_constituents,
+    )
+    mocker.patch(
+        "app.services.stocks_services.fetch_quotes_batch",
+        AsyncMock(return_value={"AAPL": {"current_price": 110.0}}),
+    )
+
+    result = await stocks_services.refresh_price_data()
+    assert result == {"AAPL": {"current_price": 110.0}}
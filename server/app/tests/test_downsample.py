@@ -0,0 +1,36 @@
+import numpy as np
+
+from ..services.downsample import downsample, lttb_indices
+
+
+def test_lttb_keeps_endpoints_and_point_count():
+    """Test that LTTB returns exactly max_points, first and last included"""
+    values = np.sin(np.linspace(0, 20, 5000))
+
+    indices = lttb_indices(values, 200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0
+    assert indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_spikes():
+    """Test that a single spike survives downsampling"""
+    values = np.zeros(1000)
+    values[637] = 50.0
+
+    indices = lttb_indices(values, 20)
+
+    assert 637 in indices
+
+
+def test_downsample_leaves_short_series_alone():
+    """Test that series shorter than max_points are returned untouched"""
+    points = [
+        {"date": "Jan 01", "price": 1.0},
+        {"date": "Jan 02", "price": 2.0},
+    ]
+
+    assert downsample(points, [1.0, 2.0], 10) is points
+    assert downsample(points, [1.0, 2.0], None) is points
@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ..services.governor import (
+    CircuitOpenError,
+    Governor,
+    GovernorSaturated,
+    classify_error,
+    THROTTLED,
+    FAILED,
+)
+
+
+def rate_limited():
+    request = httpx.Request("GET", "https://query1.finance.yahoo.com")
+    return httpx.HTTPStatusError(
+        "429", request=request, response=httpx.Response(429, request=request)
+    )
+
+
+def test_classify_error():
+    """Test that 429s and timeouts count as throttling"""
+    assert classify_error(rate_limited()) == THROTTLED
+    assert classify_error(httpx.ReadTimeout("timed out")) == THROTTLED
+    assert classify_error(Exception("Too Many Requests. Rate limited")) == (
+        THROTTLED
+    )
+    assert classify_error(KeyError("currentPrice")) == FAILED
+
+
+def test_limit_shrinks_on_throttle_and_grows_on_success():
+    """Test AIMD: halve on 429, additive increase on success"""
+    governor = Governor("test", initial_limit=8, failure_threshold=100)
+
+    def throttled():
+        raise rate_limited()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        governor.call(throttled)
+    assert governor.limit == 4
+
+    for _ in range(4):
+        governor.call(lambda: "ok")
+    assert 4.9 < governor.limit < 5.1
+    assert governor.stats()["permits"] == 5
+
+
+def test_breaker_opens_fails_fast_and_recovers(mocker):
+    """Test that the breaker opens, rejects, then closes after a trial"""
+    clock = mocker.patch("app.services.governor.time.monotonic")
+    clock.return_value = 1000.0
+    governor = Governor("test", failure_threshold=2, reset_timeout=30)
+
+    def broken():
+        raise ConnectionError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            governor.call(broken)
+    assert governor.state == "open"
+
+    upstream = mocker.Mock(return_value="ok")
+    with pytest.raises(CircuitOpenError):
+        governor.call(upstream)
+    upstream.assert_not_called()
+    assert governor.stats()["rejections"] == 1
+
+    # After the reset timeout one trial call goes through and closes it
+    clock.return_value = 1031.0
+    assert governor.call(upstream) == "ok"
+    assert governor.state == "closed"
+
+
+def test_full_limit_is_saturation_not_an_open_breaker():
+    """Test that a busy pool times out with its own error and count"""
+    governor = Governor("test", initial_limit=1, acquire_timeout=30)
+    governor.acquire()
+
+    with pytest.raises(GovernorSaturated):
+        governor.call(lambda: "ok", acquire_timeout=0.01)
+    stats = governor.stats()
+    assert (stats["saturations"], stats["rejections"]) == (1, 0)
+    assert governor.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_return_their_permits(mocker):
+    """Test that cancellation frees permits and the half-open trial"""
+    clock = mocker.patch("app.services.governor.time.monotonic")
+    clock.return_value = 1000.0
+    governor = Governor("test", initial_limit=2, reset_timeout=30)
+    hang = asyncio.Event()
+
+    calls = [
+        asyncio.create_task(governor.call_async(hang.wait)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    assert governor.in_flight == 2
+    for call in calls:
+        call.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+    assert governor.in_flight == 0
+    assert governor.stats()["failures"] == 0
+
+    # A cancelled trial lets the next call try again
+    governor.state, governor.opened_at = "open", 900.0
+    trial = asyncio.create_task(governor.call_async(hang.wait))
+    await asyncio.sleep(0)
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    async def ok():
+        return "ok"
+
+    assert await governor.call_async(ok) == "ok"
+    assert governor.state == "closed"
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from ..models import PriceBar, PriceSeries
+from ..services import history_store
+
+
+def make_hist(start, periods):
+    """Build a small yfinance style daily frame"""
+    index = pd.date_range(
+        start, periods=periods, freq="D", tz="America/New_York"
+    )
+    closes = [100.0 + i for i in range(periods)]
+    return pd.DataFrame(
+        {
+            "Open": closes,
+            "High": closes,
+            "Low": closes,
+            "Close": closes,
+            "Volume": [1000] * periods,
+        },
+        index=index,
+    )
+
+
+def test_get_history_bootstraps_then_reads_from_store(db, mocker):
+    """Test that a stored series is served without another download"""
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist("2024-01-01", 5),
+    )
+
+    first = history_store.get_history(db, "aapl", "1d")
+    second = history_store.get_history(db, "AAPL", "1d")
+
+    assert fetch.call_count == 1
+    assert fetch.call_args.kwargs["period"] == "max"
+    assert first["Close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert second["Close"].tolist() == first["Close"].tolist()
+    assert str(second.index.tz) == "America/New_York"
+
+
+def test_refresh_history_appends_only_new_bars(db, mocker):
+    """Test that a refresh downloads from the last stored bar onwards"""
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist("2024-01-01", 3),
+    )
+    history_store.refresh_history(db, "AAPL", "1d")
+
+    # The last bar (Jan 3) is re-fetched because it may have been partial
+    fetch.return_value = make_hist("2024-01-03", 3)
+    written = history_store.refresh_history(db, "AAPL", "1d", force=True)
+
+    assert written == 3
+    assert fetch.call_args.kwargs["start"].day == 3
+    assert db.query(PriceBar).count() == 5
+
+    hist = history_store.load_history(db, "AAPL", "1d")
+    assert hist["Close"].tolist() == [100.0, 101.0, 100.0, 101.0, 102.0]
+
+
+def test_daily_ranges_are_cut_from_one_download(db, mocker):
+    """Test that every daily range reuses the same stored daily series"""
+    from ..services import ranges
+
+    ranges.DAILY_CACHE.clear()
+    today = pd.Timestamp.now(tz="America/New_York").normalize()
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist(today - pd.Timedelta(days=2199), 2200),
+    )
+
+    one_month = ranges.build_range(db, "AAPL", "1M")
+    five_years = ranges.build_range(db, "AAPL", "5Y")
+    everything = ranges.build_range(db, "AAPL", "MAX")
+
+    assert fetch.call_count == 1
+    assert 28 <= len(one_month) <= 32
+    # 5Y is weekly and MAX is monthly
+    assert 255 <= len(five_years) <= 265
+    assert 70 <= len(everything) <= 75
+    assert ranges.format_labels(everything.index, "MAX")[0].isdigit()
+    ranges.DAILY_CACHE.clear()
+
+
+def test_get_histories_batches_downloads(db, mocker):
+    """Test that many tickers are bootstrapped and topped up in batches"""
+    fetch_many = mocker.patch(
+        "app.services.history_store.fetch_history_many",
+        return_value={
+            "AAPL": make_hist("2024-01-01", 3),
+            "MSFT": make_hist("2024-01-01", 3),
+        },
+    )
+    fetch = mocker.patch("app.services.history_store.fetch_history")
+
+    histories = history_store.get_histories(db, ["aapl", "MSFT", "NVDA"], "1d")
+
+    assert fetch_many.call_count == 1
+    assert fetch_many.call_args.args[0] == ["AAPL", "MSFT", "NVDA"]
+    assert histories["AAPL"]["Close"].tolist() == [100.0, 101.0, 102.0]
+    assert histories["NVDA"].empty
+
+    # Stored series are topped up together from their oldest last bar
+    fetch_many.return_value = {"AAPL": make_hist("2024-01-03", 2)}
+    history_store.refresh_many(db, ["AAPL", "MSFT"], "1d", force=True)
+
+    assert fetch_many.call_count == 2
+    assert fetch_many.call_args.kwargs["start"].day == 3
+    histories = history_store.load_histories(db, ["AAPL", "MSFT"], "1d")
+    assert histories["AAPL"]["Close"].tolist() == [100.0, 101.0, 100.0, 101.0]
+    assert len(histories["MSFT"]) == 3
+    fetch.assert_not_called()
+
+
+def test_refresh_many_refreshes_series_older_than_since(db, mocker):
+    """Test that series downloaded before a close are refreshed after it"""
+    fetch_many = mocker.patch(
+        "app.services.history_store.fetch_history_many",
+        return_value={"AAPL": make_hist("2024-01-01", 3)},
+    )
+    history_store.refresh_many(db, ["AAPL"], "1d")
+    refreshed = datetime.now(timezone.utc)
+
+    history_store.refresh_many(db, ["AAPL"], "1d", since=refreshed)
+
+    assert fetch_many.call_count == 2
+    history_store.refresh_many(db, ["AAPL"], "1d", since=refreshed)
+    assert fetch_many.call_count == 2
+
+
+def test_intraday_refresh_is_clamped_and_empty_results_stay_stale(db, mocker):
+    """Test an old 5m series is topped up from the limit, not its last bar"""
+    old = (pd.Timestamp.now() - pd.Timedelta(days=90)).strftime("%Y-%m-%d")
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist(old, 1),
+    )
+    history_store.refresh_history(db, "AAPL", "5m")
+    refreshed = db.get(PriceSeries, ("AAPL", "5m")).refreshed_at
+
+    fetch.return_value = make_hist(old, 0)
+    written = history_store.refresh_history(db, "AAPL", "5m", force=True)
+
+    assert written == 0
+    start = fetch.call_args.kwargs["start"]
+    assert start > datetime.now(timezone.utc) - timedelta(days=60)
+    # Nothing came back, the series is not marked refreshed
+    assert db.get(PriceSeries, ("AAPL", "5m")).refreshed_at == refreshed
+
+
+def test_refresh_many_batches_stored_series_by_last_bar(db, mocker):
+    """Test one stale series neither widens nor freezes the others"""
+    today = pd.Timestamp.now().strftime("%Y-%m-%d")
+    old = (pd.Timestamp.now() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+    fetch_many = mocker.patch(
+        "app.services.history_store.fetch_history_many",
+        side_effect=[
+            {"AAPL": make_hist(today, 1), "MSFT": make_hist(old, 1)},
+            {"MSFT": make_hist(old, 0)},
+            {"AAPL": make_hist(today, 1)},
+        ],
+    )
+    history_store.refresh_many(db, ["AAPL", "MSFT"], "1d")
+    refreshed = db.get(PriceSeries, ("MSFT", "1d")).refreshed_at
+
+    history_store.refresh_many(db, ["AAPL", "MSFT"], "1d", force=True)
+
+    old_batch, new_batch = fetch_many.call_args_list[1:]
+    assert old_batch.args[0] == ["MSFT"]
+    assert new_batch.args[0] == ["AAPL"]
+    assert new_batch.kwargs["start"].strftime("%Y-%m-%d") == today
+    # MSFT got no bars and stays stale
+    assert db.get(PriceSeries, ("MSFT", "1d")).refreshed_at == refreshed
+
+
+def test_empty_daily_series_are_not_cached(db, mocker):
+    """Test a failed bootstrap is retried on the next chart request"""
+    from ..services import ranges
+
+    ranges.DAILY_CACHE.clear()
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist("2024-01-01", 0),
+    )
+    assert ranges.get_daily_closes(db, "AAPL").empty
+
+    fetch.return_value = make_hist("2024-01-01", 3)
+    assert len(ranges.get_daily_closes(db, "AAPL")) == 3
+    ranges.DAILY_CACHE.clear()
+
+
+def test_old_intraday_bars_are_pruned(db, mocker):
+    """Test intraday bars older than Yahoo's window are not kept"""
+    old = (pd.Timestamp.now() - pd.Timedelta(days=90)).strftime("%Y-%m-%d")
+    recent = (pd.Timestamp.now() - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    fetch = mocker.patch(
+        "app.services.history_store.fetch_history",
+        return_value=make_hist(old, 3),
+    )
+    history_store.refresh_history(db, "AAPL", "5m")
+    history_store.refresh_history(db, "AAPL", "1d")
+
+    fetch.return_value = make_hist(recent, 1)
+    history_store.refresh_history(db, "AAPL", "5m", force=True)
+
+    assert db.query(PriceBar).filter(PriceBar.interval == "5m").count() == 1
+    # Daily bars are kept
+    assert db.query(PriceBar).filter(PriceBar.interval == "1d").count() == 3
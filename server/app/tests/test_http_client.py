@@ -0,0 +1,58 @@
+import httpx
+import pytest
+
+from ..services import http_client
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_and_closed(mocker):
+    """Test that every caller gets one pooled client until shutdown"""
+    mocker.patch.dict(http_client.CLIENT, {"client": None})
+
+    await http_client.init_http_client()
+    client = http_client.get_http_client()
+
+    assert http_client.get_http_client() is client
+    assert http_client.pool_stats()["open"] is True
+    assert http_client.pool_stats()["in_flight"] == 0
+
+    await http_client.close_http_client()
+    assert client.is_closed
+    assert http_client.CLIENT["client"] is None
+
+
+def test_host_timeout_uses_per_host_settings(mocker):
+    """Test that known hosts get their own timeout"""
+    mocker.patch.dict(
+        http_client.HTTP_HOST_TIMEOUTS, {"api.massive.com": 60.0}
+    )
+
+    assert http_client.host_timeout("https://api.massive.com/v3/x") == 60.0
+    assert (
+        http_client.host_timeout("https://example.com")
+        == http_client.HTTP_DEFAULT_TIMEOUT
+    )
+
+
+@pytest.mark.asyncio
+async def test_in_flight_counts_requests_until_the_body_is_closed(mocker):
+    """Test that requests are tracked without reading httpx internals"""
+    mocker.patch.dict(http_client.HTTP_STATS, {"in_flight": 0})
+
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, content=b"ok")
+
+    transport = http_client.TrackingTransport(httpx.MockTransport(handler))
+    async with httpx.AsyncClient(transport=transport) as client:
+        request = client.build_request("GET", "https://example.com/")
+        response = await client.send(request, stream=True)
+        assert http_client.pool_stats()["in_flight"] == 1
+        assert await response.aread() == b"ok"
+        await response.aclose()
+        assert http_client.pool_stats()["in_flight"] == 0
+
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://example.com/down")
+        assert http_client.pool_stats()["in_flight"] == 0
@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+
+from ..services import market_calendar
+from ..services.market_calendar import EXCHANGE_TZ
+
+
+def et(*args):
+    return datetime(*args, tzinfo=EXCHANGE_TZ)
+
+
+def test_holidays_follow_the_observance_rules():
+    """Test a full year of holidays and the weekend observance rules"""
+    assert sorted(market_calendar.holidays(2025)) == [
+        date(2025, 1, 1),
+        date(2025, 1, 20),
+        date(2025, 2, 17),
+        date(2025, 4, 18),  # Good Friday
+        date(2025, 5, 26),
+        date(2025, 6, 19),
+        date(2025, 7, 4),
+        date(2025, 9, 1),
+        date(2025, 11, 27),
+        date(2025, 12, 25),
+    ]
+    # Saturday New Year's Day is not observed, Sunday holidays are
+    # moved to the Monday
+    holidays_2022 = market_calendar.holidays(2022)
+    assert date(2021, 12, 31) not in market_calendar.holidays(2021)
+    assert date(2022, 6, 20) in holidays_2022
+    assert date(2022, 12, 26) in holidays_2022
+
+
+def test_sessions_and_early_closes():
+    """Test regular hours, early closes, weekends and holidays"""
+    assert market_calendar.session(date(2025, 3, 14)) == (
+        et(2025, 3, 14, 9, 30),
+        et(2025, 3, 14, 16, 0),
+    )
+    assert market_calendar.session(date(2025, 11, 28))[1] == et(
+        2025, 11, 28, 13, 0
+    )
+    assert market_calendar.session(date(2025, 3, 15)) is None
+    assert market_calendar.session(date(2025, 4, 18)) is None
+
+    assert market_calendar.is_open(et(2025, 3, 14, 10, 0))
+    assert not market_calendar.is_open(et(2025, 3, 14, 16, 0))
+    assert not market_calendar.is_open(et(2025, 11, 28, 14, 0))
+
+
+def test_next_open_skips_weekends_and_holidays():
+    """Test that the next open after Thursday's close is Monday's"""
+    assert market_calendar.next_open(et(2025, 4, 17, 17, 0)) == et(
+        2025, 4, 21, 9, 30
+    )
+    assert market_calendar.next_open(et(2025, 3, 14, 8, 0)) == et(
+        2025, 3, 14, 9, 30
+    )
+
+
+def test_ttl_applies_during_sessions_and_freezes_after_close():
+    """Test that data fetched after the close stays fresh until the open"""
+    ttl = timedelta(minutes=5)
+    taken = et(2025, 3, 14, 10, 0)
+    assert market_calendar.is_fresh(taken, ttl, et(2025, 3, 14, 10, 4))
+    assert not market_calendar.is_fresh(taken, ttl, et(2025, 3, 14, 10, 6))
+
+    closed = et(2025, 3, 14, 16, 30)
+    assert market_calendar.is_fresh(closed, ttl, et(2025, 3, 16, 12, 0))
+    assert not market_calendar.is_fresh(closed, ttl, et(2025, 3, 17, 9, 30))
+
+
+def test_data_taken_right_after_the_close_keeps_the_session_ttl():
+    """Test that a 16:01 capture is re-fetched once the prints settle"""
+    ttl = timedelta(minutes=5)
+    taken = et(2025, 3, 14, 16, 1)
+    assert market_calendar.is_fresh(taken, ttl, et(2025, 3, 14, 16, 5))
+    assert not market_calendar.is_fresh(taken, ttl, et(2025, 3, 14, 16, 7))
+
+    # Taken after the settle window, frozen over the weekend
+    settled = et(2025, 3, 14, 16, 20)
+    assert market_calendar.is_fresh(settled, ttl, et(2025, 3, 16, 12, 0))
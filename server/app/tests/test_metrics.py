@@ -0,0 +1,38 @@
+from ..services.metrics import Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that observations land in every bucket at or above them"""
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    lines = histogram.lines()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    """Test that quotes in label values stay valid exposition text"""
+    counter = Counter("errors_total", "Errors")
+    counter.inc(provider='say "hi"')
+    counter.inc(provider='say "hi"')
+
+    assert r'errors_total{provider="say \"hi\""} 2' in counter.lines()
+
+
+def test_metrics_endpoint_exposes_requests_and_pools(client):
+    """Test that /metrics reports routes, caches and concurrency"""
+    client.get("/live")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'markviz_request_duration_seconds_count{method="GET"' in body
+    assert 'markviz_cache_entries{cache="info"}' in body
+    assert 'markviz_upstream_circuit_state{provider="yfinance"' in body
+    assert "markviz_threadpool_max_threads" in body
@@ -0,0 +1,35 @@
+import os
+
+
+def test_server_timing_header_breaks_down_request(client, registered_user):
+    """Test that a DB-backed route reports db, handler and total spans"""
+    response = client.post(
+        "/auth/login",
+        json={"email": "zaki@markviz.com", "password": "zaki1212"},
+    )
+
+    assert response.status_code == 200
+    metrics = {
+        metric.split(";")[0]: metric
+        for metric in response.headers["Server-Timing"].split(", ")
+    }
+    assert "dur=" in metrics["db"]
+    assert metrics["handler"].endswith('desc="1x"')
+    assert "serialize" in metrics
+    assert "total" in metrics
+
+
+def test_slow_requests_are_profiled(client, registered_user, mocker, tmp_path):
+    """Test that sampled requests over the threshold save a profile"""
+    mocker.patch("app.middleware.PROFILE_SLOW_MS", 0.001)
+    mocker.patch("app.middleware.PROFILE_SAMPLE_RATE", 1.0)
+    mocker.patch("app.middleware.PROFILE_DIR", str(tmp_path))
+
+    client.post(
+        "/auth/login",
+        json={"email": "zaki@markviz.com", "password": "zaki1212"},
+    )
+
+    profiles = os.listdir(tmp_path)
+    assert len(profiles) == 1
+    assert profiles[0].endswith(".prof") and "auth_login" in profiles[0]
@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import Holding, ListedTicker
+from ..services import stocks_services
+
+
+@pytest.fixture
+def auth_headers(client, registered_user):
+    login_data = {"email": "zaki@markviz.com", "password": "zaki1212"}
+    token = client.post("/auth/login", json=login_data).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_lots(client, headers, lots):
+    for ticker, shares, buy_price in lots:
+        response = client.post(
+            "/portfolio/holdings",
+            json={"ticker": ticker, "shares": shares, "buy_price": buy_price},
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+
+def quote_frame(closes):
+    """yf.download style frame (columns: field, ticker) of daily closes"""
+    index = pd.date_range("2024-01-01", periods=2, freq="D")
+    return pd.concat({"Close": pd.DataFrame(closes, index=index)}, axis=1)
+
+
+def test_portfolio_table_reads_caches_then_batches_the_rest(
+    client, db, auth_headers, mocker
+):
+    """Test that S&P quotes come from the snapshot, the rest in one batch"""
+    add_lots(
+        client,
+        auth_headers,
+        [("AAPL", 1, 100), ("aapl", 3, 200), ("ARM", 2, 50), ("XYZ", 1, 1)],
+    )
+    now = datetime.now(timezone.utc)
+    db.add(
+        ListedTicker(
+            ticker="ARM",
+            exchange="nasdaq",
+            name="Arm Holdings",
+            first_seen_at=now,
+            last_seen_at=now,
+        )
+    )
+    db.commit()
+
+    temp_cache = dict.fromkeys(stocks_services.CACHE)
+    temp_cache["static_list"] = [{"ticker": "AAPL", "name": "Apple Inc."}]
+    temp_cache["price_data"] = {
+        "AAPL": {"current_price": 150.0, "change_percent": 25.0}
+    }
+    temp_cache["price_timestamp"] = datetime.now()
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+    stocks_services.QUOTE_CACHE.clear()
+    provider = mocker.patch("app.services.stocks_services.get_provider")
+    provider.return_value.download.return_value = quote_frame(
+        {"ARM": [40.0, 60.0], "XYZ": [float("nan")] * 2}
+    )
+    fetch_info = mocker.patch("app.services.stocks_services.fetch_info")
+
+    lots = client.get("/portfolio/table", headers=auth_headers).json()["data"]
+
+    # One batched download for the tickers outside the snapshot
+    assert provider.return_value.download.call_count == 1
+    assert provider.return_value.download.call_args.args[0] == ["ARM", "XYZ"]
+    fetch_info.assert_not_called()
+    assert [row["ticker"] for row in lots] == ["AAPL", "AAPL", "ARM"]
+    assert lots[0]["name"] == "Apple Inc."
+    assert lots[0]["allTimeReturn"] == 50.0
+    assert lots[1]["allTimeReturnAmount"] == -150.0
+    assert lots[2] == {
+        "ticker": "ARM",
+        "name": "Arm Holdings",
+        "shares": 2.0,
+        "currentPrice": 60.0,
+        "totalValue": 120.0,
+        "todayChangePercent": 50.0,
+        "allTimeReturn": 20.0,
+        "allTimeReturnAmount": 20.0,
+    }
+
+    # The next request is served from the quote cache
+    tickers = client.get(
+        "/portfolio/table", params={"byTicker": True}, headers=auth_headers
+    ).json()["data"]
+
+    assert provider.return_value.download.call_count == 2  # XYZ only
+    aapl = tickers[0]
+    assert len(tickers) == 2
+    assert aapl["lots"] == 2 and aapl["shares"] == 4.0
+    assert aapl["averageCost"] == 175.0
+    assert aapl["totalValue"] == 600.0
+    assert aapl["allTimeReturnAmount"] == -100.0
+    stocks_services.QUOTE_CACHE.clear()
+
+
+def test_portfolio_results_are_cached_per_holdings_version(
+    client, db, auth_headers, mocker
+):
+    """Test repeat views skip the recompute until the holdings change"""
+    add_lots(client, auth_headers, [("AAPL", 1, 100)])
+    fetch_quotes = mocker.patch(
+        "app.services.stocks_services.fetch_quotes",
+        return_value={"AAPL": {"current_price": 150.0, "change_percent": 1}},
+    )
+    mocker.patch("app.services.stocks_services.ticker_names", return_value={})
+    graph = mocker.patch(
+        "app.routes.portfolio.portfolio_graph",
+        side_effect=[
+            {"data": [], "holdings_count": 0},
+            {
+                "data": [{"date": "2024-01-01", "value": 0}],
+                "holdings_count": 1,
+            },
+            {
+                "data": [{"date": "2024-01-01", "value": 5}],
+                "holdings_count": 2,
+            },
+        ],
+    )
+
+    def view(path, **params):
+        response = client.get(path, params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    table = view("/portfolio/table")
+    assert view("/portfolio/table") == table
+    assert fetch_quotes.call_count == 1
+
+    # Empty graphs are not cached, a failed fetch is retried
+    assert view("/portfolio/graph", timeRange="1M")["data"] == []
+    assert view("/portfolio/graph", timeRange="1M")["holdings_count"] == 1
+    assert view("/portfolio/graph", timeRange="1M")["holdings_count"] == 1
+    assert graph.call_count == 2
+
+    add_lots(client, auth_headers, [("AAPL", 1, 120)])
+
+    assert len(view("/portfolio/table")["data"]) == 2
+    assert fetch_quotes.call_count == 2
+    assert view("/portfolio/graph", timeRange="1M")["holdings_count"] == 2
+    assert graph.call_count == 3
+
+
+def test_add_holding_is_one_transaction(client, db, auth_headers, mocker):
+    """Test a failed version bump does not leave the lot stored"""
+    mocker.patch(
+        "app.services.portfolio_cache.bump_holdings_version",
+        side_effect=SQLAlchemyError("down"),
+    )
+
+    response = client.post(
+        "/portfolio/holdings",
+        json={"ticker": "AAPL", "shares": 1, "buy_price": 100},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 500
+    assert db.query(Holding).count() == 0
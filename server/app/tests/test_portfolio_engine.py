@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..services.portfolio_engine import (
+    close_matrix,
+    holdings_table,
+    portfolio_returns,
+)
+
+
+def closes(start, values, freq="D"):
+    index = pd.date_range(
+        start, periods=len(values), freq=freq, tz="America/New_York"
+    )
+    return pd.Series(values, index=index, dtype=float)
+
+
+def holding(series, shares, baseline_price):
+    return {
+        "closes": series,
+        "shares": shares,
+        "baseline_value": baseline_price * shares,
+    }
+
+
+def test_close_matrix_aligns_on_union_and_forward_fills():
+    """Test that gaps are forward-filled and late series start as NaN"""
+    a = closes("2024-01-01", [10.0, 11.0, 12.0, 13.0])
+    b = closes("2024-01-02", [20.0, 22.0]).drop(
+        pd.Timestamp("2024-01-03", tz="America/New_York")
+    )
+
+    matrix = close_matrix([a, b])
+
+    assert len(matrix) == 4
+    assert np.isnan(matrix.iloc[0, 1])
+    assert matrix[1].tolist()[1:] == [20.0, 20.0, 20.0]
+
+
+def test_portfolio_returns_weights_holdings_from_their_first_bar():
+    """Test that a holding joins value and baseline at its first bar"""
+    a = closes("2024-01-01", [100.0, 110.0, 120.0])
+    b = closes("2024-01-02", [50.0, 40.0])
+
+    result = portfolio_returns(
+        [holding(a, 1, 100.0), holding(b, 2, 50.0)], "1d"
+    )
+
+    assert result == [
+        {"date": "2024-01-01", "value": 0.0},
+        # (110 + 100 - 200) / 200
+        {"date": "2024-01-02", "value": 5.0},
+        # (120 + 80 - 200) / 200
+        {"date": "2024-01-03", "value": 0.0},
+    ]
+    assert portfolio_returns([], "1d") == []
+
+
+def test_portfolio_returns_scales_to_large_portfolios():
+    """Test hundreds of holdings times thousands of bars stay fast"""
+    rng = np.random.default_rng(0)
+    data = [
+        holding(
+            closes("2015-01-01", 100 + rng.standard_normal(2500).cumsum()),
+            10,
+            100.0,
+        )
+        for _ in range(300)
+    ]
+
+    started = time.perf_counter()
+    result = portfolio_returns(data, "1d")
+    elapsed = time.perf_counter() - started
+
+    assert len(result) == 2500
+    assert elapsed < 1.0
+
+
+def test_intraday_points_are_labelled_in_exchange_time():
+    """Test that 5m bars are labelled HH:MM in New York time"""
+    bars = closes("2024-01-02 09:30", [100.0, 101.0], freq="5min")
+
+    result = portfolio_returns([holding(bars, 1, 100.0)], "5m")
+
+    assert [point["date"] for point in result] == ["09:30", "09:35"]
+    assert result[1]["value"] == 1.0
+
+
+def test_holdings_table_skips_unquoted_and_guards_zero_prices():
+    """Test that missing quotes drop their lots and zero prices report 0"""
+    lots = pd.DataFrame(
+        {
+            "ticker": ["AAPL", "MSFT", "NVDA"],
+            "shares": [2.0, 1.0, 1.0],
+            "buy_price": [100.0, 0.0, 10.0],
+        }
+    )
+    quotes = {
+        "AAPL": {"name": "Apple", "current_price": 0, "change_percent": 1},
+        "MSFT": {"name": "MSFT", "current_price": 50, "change_percent": 2},
+    }
+
+    rows = holdings_table(lots, quotes)
+
+    assert [row["ticker"] for row in rows] == ["AAPL", "MSFT"]
+    assert rows[0]["totalValue"] == 0.0 and rows[0]["allTimeReturn"] == 0.0
+    assert rows[1]["totalValue"] == 50.0
+    assert rows[0]["todayChangePercent"] == 0.0
+    assert rows[1]["todayChangePercent"] == 2.0
+    assert rows[1]["allTimeReturn"] == 0.0
@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from ..models import Holding, PortfolioSnapshot, User
+from ..services import portfolio_snapshots
+from .conftest import TestingSessionLocal
+
+# Monday to Friday, 2025-03-03 to 2025-03-07
+BARS = pd.date_range("2025-03-03", periods=5, freq="D", tz="America/New_York")
+CLOSES = {
+    "AAA": [10.0, 11.0, 12.0, 13.0, 14.0],
+    "BBB": [20.0, 20.0, 22.0, 24.0, 25.0],
+}
+# Friday 10:00 ET, the session is running
+NOW = datetime(2025, 3, 7, 15, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def user_id(db):
+    user = User(
+        first_name="Zaki",
+        last_name="Ayoubi",
+        email="zaki@markviz.com",
+        hashed_password="x",
+    )
+    db.add(user)
+    db.commit()
+    db.add_all(
+        [
+            Holding(
+                user_id=user.id,
+                ticker="AAA",
+                shares=10,
+                buy_price=10,
+                created_at=datetime(2025, 3, 3, 1, tzinfo=timezone.utc),
+            ),
+            # Counts from the Thursday bar, the first one after the purchase
+            Holding(
+                user_id=user.id,
+                ticker="BBB",
+                shares=5,
+                buy_price=20,
+                created_at=datetime(2025, 3, 5, 12, tzinfo=timezone.utc),
+            ),
+        ]
+    )
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def histories(mocker):
+    return mocker.patch(
+        "app.services.portfolio_snapshots.history_store.get_histories",
+        side_effect=lambda db, tickers, interval, start, since: {
+            t: pd.DataFrame({"Close": CLOSES[t]}, index=BARS) for t in tickers
+        },
+    )
+
+
+def snapshots(db, user_id):
+    return (
+        db.query(PortfolioSnapshot)
+        .filter(PortfolioSnapshot.user_id == user_id)
+        .order_by(PortfolioSnapshot.date)
+        .all()
+    )
+
+
+def test_update_snapshots_stores_closed_sessions_incrementally(
+    db, user_id, histories
+):
+    """Test the backfill stops at the last close and updates append"""
+    assert portfolio_snapshots.update_snapshots(db, user_id, NOW) == 4
+    rows = snapshots(db, user_id)
+    assert [row.date.day for row in rows] == [3, 4, 5, 6]
+    assert [row.total_value for row in rows] == [100, 110, 120, 250]
+    assert [row.cost_basis for row in rows] == [100, 100, 100, 200]
+    assert [row.return_pct for row in rows] == [0, 10, 20, 25]
+    assert [row.holdings for row in rows] == [1, 1, 1, 2]
+
+    # Up to date until the session closes
+    assert portfolio_snapshots.update_snapshots(db, user_id, NOW) == 0
+
+    # Thursday is re-written with Friday, from bars refreshed after the
+    # Friday close
+    CLOSES["AAA"][3] = 13.5
+    monday = datetime(2025, 3, 10, 15, 0, tzinfo=timezone.utc)
+    try:
+        assert portfolio_snapshots.update_snapshots(db, user_id, monday) == 2
+    finally:
+        CLOSES["AAA"][3] = 13.0
+    rows = snapshots(db, user_id)
+    assert [row.total_value for row in rows[-2:]] == [255, 265]
+    assert histories.call_args.kwargs == {
+        "start": datetime(2025, 2, 24, tzinfo=timezone.utc),
+        "since": datetime(2025, 3, 7, 21, tzinfo=timezone.utc),
+    }
+
+
+def test_snapshot_graph_adds_a_live_point_and_rebases_1y(
+    db, user_id, histories, mocker
+):
+    """Test ALL returns on cost and 1Y on the value at its first day"""
+    mocker.patch(
+        "app.services.portfolio_snapshots.fetch_quotes",
+        return_value={
+            "AAA": {"current_price": 15.0},
+            "BBB": {"current_price": 26.0},
+        },
+    )
+    holdings = db.query(Holding).all()
+
+    points, count = portfolio_snapshots.snapshot_graph(
+        db, user_id, holdings, "ALL", NOW
+    )
+    assert count == 2
+    assert points == [
+        {"date": "2025-03-03", "value": 0.0},
+        {"date": "2025-03-04", "value": 10.0},
+        {"date": "2025-03-05", "value": 20.0},
+        {"date": "2025-03-06", "value": 25.0},
+        {"date": "2025-03-07", "value": 40.0},
+    ]
+
+    # A two day "year" starts on Thursday, valued at 250
+    mocker.patch.dict(portfolio_snapshots.RANGE_DAYS, {"1Y": 2})
+    points, _ = portfolio_snapshots.snapshot_graph(
+        db, user_id, holdings, "1Y", NOW
+    )
+    assert points == [
+        {"date": "2025-03-06", "value": 0.0},
+        {"date": "2025-03-07", "value": 12.0},
+    ]
+    assert histories.call_count == 1
+
+
+def test_invalidate_snapshots_drops_from_the_purchase_day(
+    db, user_id, histories
+):
+    """Test a new lot invalidates the snapshots it changes"""
+    portfolio_snapshots.update_snapshots(db, user_id, NOW)
+
+    portfolio_snapshots.invalidate_snapshots(
+        db, user_id, datetime(2025, 3, 5, 12, tzinfo=timezone.utc)
+    )
+
+    assert [row.date.day for row in snapshots(db, user_id)] == [3, 4]
+
+
+def test_update_snapshots_yields_to_a_concurrent_update(
+    db, user_id, histories, mocker
+):
+    """Test that sessions a racing update stored first are not an error"""
+    valuation = portfolio_snapshots.valuation
+
+    def racing_valuation(*args, **kwargs):
+        # Another worker commits its rows while this one values the lots
+        racing.side_effect = valuation
+        other = TestingSessionLocal()
+        portfolio_snapshots.update_snapshots(other, user_id, NOW)
+        other.close()
+        return valuation(*args, **kwargs)
+
+    racing = mocker.patch(
+        "app.services.portfolio_snapshots.valuation",
+        side_effect=racing_valuation,
+    )
+
+    assert portfolio_snapshots.update_snapshots(db, user_id, NOW) == 0
+    assert len(snapshots(db, user_id)) == 4
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from ..providers.synthetic import SyntheticProvider
+
+
+def test_synthetic_history_is_deterministic():
+    """Test that the same seed always produces the same bars"""
+    first = SyntheticProvider(tickers=10, seed=1).history("AAPL", period="1y")
+    second = SyntheticProvider(tickers=10, seed=1).history("AAPL", period="1y")
+    other = SyntheticProvider(tickers=10, seed=2).history("AAPL", period="1y")
+
+    assert first.equals(second)
+    assert not first["Close"].equals(other["Close"])
+    assert list(first.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert (first["High"] >= first["Low"]).all()
+
+
+def test_synthetic_history_extends_when_the_day_rolls(mocker):
+    """Test that cached daily bars are rebuilt on the next day"""
+    today = mocker.patch(
+        "app.providers.synthetic.market_today",
+        return_value=pd.Timestamp("2025-03-13"),
+    )
+    provider = SyntheticProvider(tickers=10)
+    first = provider.history("AAPL", period="1mo")
+
+    today.return_value = pd.Timestamp("2025-03-14")
+    second = provider.history("AAPL", period="1mo")
+
+    assert second.index[-1] - first.index[-1] == pd.Timedelta(days=1)
+    # Same seed, same walk: the shared days keep their prices
+    assert second.loc[first.index[-1], "Close"] == first["Close"].iloc[-1]
+
+
+def test_synthetic_download_and_info_shapes():
+    """Test that download and info match the shapes the services expect"""
+    provider = SyntheticProvider(tickers=10)
+
+    frame = provider.download(["AAAA", "AAAB"], "5d", "1d")
+    assert list(frame["Close"].columns) == ["AAAA", "AAAB"]
+
+    info = provider.info("aaaa")
+    assert info["currentPrice"] == round(frame["Close"]["AAAA"].iloc[-1], 2)
+    assert info["marketCap"] > 0
+
+    intraday = provider.history("AAAA", period="1d", interval="5m")
+    assert intraday.index.tz is not None
+
+
+@pytest.mark.asyncio
+async def test_synthetic_ticker_pages(mocker):
+    """Test that the exchange lists page through the whole universe"""
+    mocker.patch("app.providers.synthetic.PAGE_SIZE", 3)
+    provider = SyntheticProvider(tickers=10)
+
+    symbols, cursor = [], None
+    for exchange in ("nyse", "nasdaq"):
+        while True:
+            page = await provider.ticker_page(exchange, cursor)
+            symbols += [t["ticker"] for t in page["results"]]
+            cursor = page["next_url"]
+            if cursor is None:
+                break
+
+    assert sorted(symbols) == provider.symbols
+    assert len(await provider.sp500_constituents()) == 10
+
+
+def test_synthetic_history_many_matches_history():
+    """Test that the batched history returns each ticker's own bars"""
+    provider = SyntheticProvider(tickers=10)
+    symbols = provider.symbols[:3]
+
+    histories = provider.history_many(symbols, period="1mo", interval="1d")
+
+    assert list(histories) == symbols
+    single = provider.history(symbols[1], period="1mo", interval="1d")
+    assert histories[symbols[1]]["Close"].equals(single["Close"])
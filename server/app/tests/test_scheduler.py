@@ -0,0 +1,127 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from .. import scheduler
+from ..models import JobRun
+from ..routes import stocks
+from ..services.leader import LeaderLock
+from .conftest import TestingSessionLocal
+
+
+def test_only_one_leader_until_it_releases(tmp_path):
+    """Test that a follower takes over once the leader gives up the lock"""
+    engine = create_engine("sqlite://")
+    lock_path = str(tmp_path / "scheduler.lock")
+    leader = LeaderLock(engine, 1, lock_path)
+    follower = LeaderLock(engine, 1, lock_path)
+
+    assert leader.elect()
+    assert not follower.elect()
+    assert leader.elect()  # re-election keeps the lock
+
+    leader.release()
+    assert follower.elect()
+    assert not leader.elect()
+    follower.release()
+
+
+@pytest.mark.asyncio
+async def test_run_job_records_runs_on_leader_only(db, mocker, tmp_path):
+    """Test that followers skip jobs and the leader records each run"""
+    mocker.patch("app.scheduler.SessionLocal", TestingSessionLocal)
+    mocker.patch.dict(scheduler.LAST_RUN, clear=True)
+    lock = LeaderLock(create_engine("sqlite://"), 1, str(tmp_path / "lock"))
+    mocker.patch("app.scheduler.LEADER", lock)
+    calls = []
+
+    async def job():
+        calls.append(1)
+
+    async def failing_job():
+        raise ValueError("upstream down")
+
+    await scheduler.run_job("refresh", job)
+    assert calls == [] and db.query(JobRun).count() == 0
+
+    lock.elect()
+    await scheduler.run_job("refresh", job)
+    await scheduler.run_job("refresh", failing_job)
+    lock.release()
+
+    runs = db.query(JobRun).order_by(JobRun.id).all()
+    assert [run.status for run in runs] == ["success", "failed"]
+    assert runs[1].error == "upstream down"
+    assert runs[0].duration is not None
+    assert scheduler.LAST_RUN["refresh"]["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_quotes_refresh_only_in_session_or_when_stale(mocker):
+    """Test that quote ticks outside a session skip a fresh snapshot"""
+    run_job = mocker.patch("app.scheduler.run_job")
+    is_open = mocker.patch(
+        "app.scheduler.market_calendar.is_open", return_value=False
+    )
+    stale = mocker.patch(
+        "app.services.stocks_services.is_price_data_stale",
+        return_value=False,
+    )
+
+    await scheduler.refresh_quotes_if_due()
+    run_job.assert_not_called()
+
+    stale.return_value = True
+    await scheduler.refresh_quotes_if_due()
+    is_open.return_value = True
+    stale.return_value = False
+    await scheduler.refresh_quotes_if_due()
+
+    assert run_job.await_count == 2
+    assert run_job.await_args.args[0] == "refresh_quotes"
+
+
+@pytest.mark.asyncio
+async def test_daily_refresh_forces_the_ticker_crawl(mocker):
+    """Test yesterday's crawl is redone and reaches search and followers"""
+    mocker.patch(
+        "app.services.stocks_services.fetch_sp500_constituents",
+        mocker.AsyncMock(),
+    )
+    fetch_tickers = mocker.patch(
+        "app.services.stocks_services.fetch_tickers",
+        mocker.AsyncMock(
+            side_effect=lambda exchange, force: [
+                {"ticker": "NEWCO" if exchange == "nyse" else "AAPL"}
+            ]
+        ),
+    )
+    # A fresh list that predates the listing of NEWCO
+    mocker.patch.dict(
+        stocks.CACHE_ALLTICKERS,
+        {"list": [{"ticker": "AAPL"}], "timestamp": datetime.now()},
+    )
+    publish = mocker.patch.object(
+        stocks.SHARED_ALLTICKERS, "publish_async", mocker.AsyncMock()
+    )
+    mocker.patch.object(stocks.DISK_ALLTICKERS, "save")
+    mocker.patch(
+        "app.routes.stocks.adopt_shared_tickers",
+        mocker.AsyncMock(return_value=False),
+    )
+    mocker.patch(
+        "app.routes.stocks.ticker_crawler.has_changes", return_value=True
+    )
+    index = mocker.patch("app.routes.stocks.TICKER_INDEX")
+
+    await scheduler.refresh_stock_data()
+
+    assert fetch_tickers.await_args_list == [
+        mocker.call("nyse", force=True),
+        mocker.call("nasdaq", force=True),
+    ]
+    tickers = [{"ticker": "NEWCO"}, {"ticker": "AAPL"}]
+    assert stocks.CACHE_ALLTICKERS["list"] == tickers
+    index.update.assert_called_once_with(tickers)
+    assert publish.await_args.args[0] == tickers
@@ -0,0 +1,49 @@
+from ..services.search import TickerIndex
+
+TICKERS = [
+    {"ticker": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"},
+    {"ticker": "AA", "name": "Alcoa Corporation", "exchange": "NYSE"},
+    {"ticker": "AAL", "name": "American Airlines Group", "exchange": "NASDAQ"},
+    {"ticker": "APLE", "name": "Apple Hospitality REIT", "exchange": "NYSE"},
+    {"ticker": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ"},
+]
+
+
+def symbols(results):
+    return [r["ticker"] for r in results]
+
+
+def test_search_ranks_exact_symbol_then_prefixes():
+    """Test that exact symbol beats symbol prefixes, then name matches"""
+    index = TickerIndex()
+    index.update(TICKERS)
+
+    assert symbols(index.search("aa")) == ["AA", "AAL", "AAPL"]
+    assert symbols(index.search("apple")) == ["AAPL", "APLE"]
+    assert symbols(index.search("AAPL", limit=1)) == ["AAPL"]
+
+
+def test_search_matches_name_words_and_substrings():
+    """Test multi-word name prefixes and substrings inside names"""
+    index = TickerIndex()
+    index.update(TICKERS)
+
+    assert symbols(index.search("american air")) == ["AAL"]
+    assert symbols(index.search("soft")) == ["MSFT"]
+    assert index.search("zzz") == []
+
+
+def test_update_only_applies_changes():
+    """Test that a refresh adds new and drops delisted tickers"""
+    index = TickerIndex()
+    index.update(TICKERS)
+
+    refreshed = TICKERS[1:] + [
+        {"ticker": "NVDA", "name": "NVIDIA Corporation", "exchange": "NASDAQ"}
+    ]
+    added, removed = index.update(refreshed)
+
+    assert (added, removed) == (1, 1)
+    assert len(index) == 5
+    assert index.search("AAPL") == []
+    assert symbols(index.search("nvidia")) == ["NVDA"]
@@ -0,0 +1,85 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from ..services import stocks_services
+from ..services.shared_cache import SharedSnapshot
+from .conftest import TestingSessionLocal
+
+
+def snapshot(key):
+    """A shared snapshot on the test database, checked on every poll"""
+    shared = SharedSnapshot(
+        key, check_interval=0, session_factory=TestingSessionLocal
+    )
+    shared.enabled = True
+    return shared
+
+
+def test_snapshot_versions_skip_unchanged_payloads(db):
+    """Test that a worker only loads snapshots it has not seen"""
+    writer, reader = snapshot("prices"), snapshot("prices")
+    fetched_at = datetime.now().replace(microsecond=0)
+
+    assert writer.publish({"AAPL": {"current_price": 1.0}}, fetched_at) == 1
+    data, timestamp = reader.poll()
+    assert data == {"AAPL": {"current_price": 1.0}}
+    assert timestamp == fetched_at
+
+    # Same version: nothing to parse
+    assert reader.poll() is None
+
+    writer.publish({"AAPL": {"current_price": 2.0}}, fetched_at)
+    assert reader.poll()[0]["AAPL"]["current_price"] == 2.0
+    assert reader.version == 2
+
+    # A worker never re-adopts its own publish
+    assert writer.poll() is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_price_data_adopts_peer_snapshot(db, mocker):
+    """Test that a stale worker serves a peer's fresh prices, no refresh"""
+    fresh = {"AAPL": {"current_price": 110.0}}
+    temp_cache = {
+        "static_list": [{"ticker": "AAPL"}],
+        "static_timestamp": datetime.now(),
+        "price_data": {"AAPL": {"current_price": 100.0}},
+        "price_timestamp": datetime.now() - timedelta(days=7),
+    }
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+    mocker.patch.dict(
+        stocks_services.SHARED, {"price_data": snapshot("prices")}
+    )
+    refresh = mocker.patch(
+        "app.services.stocks_services.schedule_price_refresh"
+    )
+
+    snapshot("prices").publish(fresh, datetime.now())
+    result = await stocks_services.fetch_price_data()
+
+    assert result == fresh
+    assert temp_cache["price_data"] == fresh
+    refresh.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_poll_and_publish_run_off_the_event_loop(db, mocker):
+    """Test the database and JSON work is done in a worker thread"""
+    writer, reader = snapshot("prices"), snapshot("prices")
+    loop_thread = threading.get_ident()
+    threads = []
+    load = reader._load
+
+    def record_load():
+        threads.append(threading.get_ident())
+        return load()
+
+    mocker.patch.object(reader, "_load", side_effect=record_load)
+
+    assert await writer.publish_async({"AAPL": 1.0}, datetime.now()) == 1
+    data, _ = await reader.poll_async()
+
+    assert data == {"AAPL": 1.0}
+    assert threads and loop_thread not in threads
@@ -56,4 +56,26 @@ async def test_get_sp500_success(client, mocker):
     assert msft["change_percent"] == 1.8
 
 
+def test_search_tickers(client, mocker):
+    """
+    Test that /stocks/search returns ranked matches from the ticker index
+    """
+    from ..services.search import TickerIndex
+
+    index = TickerIndex()
+    index.update(
+        [
+            {"ticker": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"},
+            {"ticker": "MSFT", "name": "Microsoft", "exchange": "NASDAQ"},
+        ]
+    )
+    mocker.patch("app.routes.stocks.TICKER_INDEX", index)
+
+    response = client.get("/stocks/search", params={"q": "app", "limit": 5})
+    assert response.status_code == 200
+    assert response.json()["data"] == [
+        {"ticker": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"}
+    ]
+
+
 # I need to Write more tests below ...
@@ -1,10 +1,21 @@
+import asyncio
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock
+import pandas as pd
 import pytest
 
 # AsyncMock is a fake class. You can set its properties and methods to return
 # specific values
 
-from ..services.stocks_services import fetch_sp500_constituents
+from ..services import stocks_services
+from ..services.disk_snapshot import DiskSnapshot
+from ..services.stocks_services import (
+    fetch_sp500_constituents,
+    fetch_quotes_batch,
+    fetch_price_data,
+    get,
+    INFO_CACHE,
+)
 
 
 @pytest.mark.asyncio
@@ -43,11 +54,12 @@ async def test_fetch_sp500_constituents_success(mocker):
     # Step 3. Create a fake HTTP client
     mock_client = AsyncMock()
     mock_client.get.return_value = mock_response
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
 
-    # Step 4. Replace the real client with our fake client
-    mocker.patch("httpx.AsyncClient", return_value=mock_client)
+    # Step 4. Replace the shared client with our fake client
+    mocker.patch(
+        "app.providers.live.get_http_client",
+        return_value=mock_client,
+    )
 
     # Step 5. Replace the actual cache with our fake cache (FIXED!)
     mocker.patch(
@@ -70,4 +82,142 @@ async def test_fetch_sp500_constituents_success(mocker):
     assert "MSFT" in tickers
 
 
+@pytest.mark.asyncio
+async def test_fetch_quotes_batch_chunks_and_parses(mocker):
+    """Test that quotes are downloaded in chunks and parsed per ticker"""
+
+    def fake_download(chunk, **kwargs):
+        columns = pd.MultiIndex.from_product([["Close"], chunk])
+        return pd.DataFrame(
+            [[100.0] * len(chunk), [110.0] * len(chunk)],
+            columns=columns,
+        )
+
+    download = mocker.patch(
+        "app.providers.live.yf.download", side_effect=fake_download
+    )
+    mocker.patch(
+        "app.services.stocks_services.fetch_shares_outstanding",
+        AsyncMock(return_value={"AAPL": 10, "MSFT": 20, "NVDA": 30}),
+    )
+    mocker.patch("app.services.stocks_services.QUOTE_CHUNK_SIZE", 2)
+
+    result = await fetch_quotes_batch(["AAPL", "MSFT", "NVDA"])
+
+    # 3 tickers with a chunk size of 2 means 2 bulk requests
+    assert download.call_count == 2
+    assert result["AAPL"] == {
+        "market_cap": 1100,
+        "current_price": 110.0,
+        "change_percent": 10.0,
+    }
+    assert result["NVDA"]["market_cap"] == 3300
+
+
+@pytest.mark.asyncio
+async def test_fetch_price_data_serves_stale_and_refreshes_once(mocker):
+    """Test that an expired snapshot is served while one refresh runs"""
+    stale_prices = {"AAPL": {"current_price": 100.0}}
+    fresh_prices = {"AAPL": {"current_price": 110.0}}
+    temp_cache = {
+        "static_list": [{"ticker": "AAPL"}],
+        "static_timestamp": datetime.now(),
+        "price_data": stale_prices,
+        "price_timestamp": datetime.now() - timedelta(days=7),
+    }
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+    refresh = {"task": None}
+    mocker.patch("app.services.stocks_services.PRICE_REFRESH", refresh)
+    batch = mocker.patch(
+        "app.services.stocks_services.fetch_quotes_batch",
+        AsyncMock(return_value=fresh_prices),
+    )
+
+    # Concurrent readers all get the stale snapshot right away
+    results = await asyncio.gather(*(fetch_price_data() for _ in range(5)))
+    assert all(result is stale_prices for result in results)
+
+    # Let the background refresh finish, it only ran once
+    await refresh["task"]
+    assert batch.await_count == 1
+    assert temp_cache["price_data"] is fresh_prices
+
+
+def test_get_shares_one_info_fetch_per_ticker(mocker):
+    """Test that repeated get() calls reuse one cached .info fetch"""
+    INFO_CACHE.clear()
+    mock_ticker = mocker.Mock()
+    mock_ticker.info = {"marketCap": 3000000000000, "trailingPE": 30.1}
+    yf_ticker = mocker.patch(
+        "app.providers.live.yf.Ticker", return_value=mock_ticker
+    )
+
+    assert get("aapl", "marketCap") == 3000000000000
+    assert get("AAPL", "trailingPE") == 30.1
+    assert get("AAPL", "forwardPE") == "N/A"
+
+    assert yf_ticker.call_count == 1
+    assert INFO_CACHE.stats()["hits"] == 2
+    INFO_CACHE.clear()
+
+
+def test_fetch_quotes_skips_an_expired_snapshot(db, mocker):
+    """Test an old snapshot is re-quoted and unknown names come from info"""
+    temp_cache = dict.fromkeys(stocks_services.CACHE)
+    temp_cache["price_data"] = {
+        "AAPL": {"current_price": 1.0, "change_percent": 0.0}
+    }
+    temp_cache["price_timestamp"] = datetime.now() - timedelta(days=7)
+    mocker.patch("app.services.stocks_services.CACHE", temp_cache)
+    stocks_services.QUOTE_CACHE.clear()
+    provider = mocker.patch("app.services.stocks_services.get_provider")
+    provider.return_value.download.return_value = pd.concat(
+        {
+            "Close": pd.DataFrame(
+                {"AAPL": [100.0, 150.0]},
+                index=pd.date_range("2024-01-01", periods=2, freq="D"),
+            )
+        },
+        axis=1,
+    )
+    mocker.patch(
+        "app.services.stocks_services.fetch_info",
+        return_value={"longName": "Apple Inc."},
+    )
+
+    quotes = stocks_services.fetch_quotes(["AAPL"])
+
+    assert quotes["AAPL"]["current_price"] == 150.0
+    assert stocks_services.ticker_names(db, ["AAPL"]) == {"AAPL": "Apple Inc."}
+    stocks_services.QUOTE_CACHE.clear()
+
+
 # Write more tests below ...
+
+
+@pytest.mark.asyncio
+async def test_shares_outstanding_restore_from_disk(tmp_path, mocker):
+    """Test restored counts skip the fetch and unknown ones are not 0"""
+    disk = DiskSnapshot("shares", directory=str(tmp_path))
+    disk.enabled = True
+    disk.save({"AAPL": 10}, datetime.now() - timedelta(days=2))
+    mocker.patch("app.services.stocks_services.DISK_SHARES", disk)
+    mocker.patch.dict(stocks_services.DISK, clear=True)
+    mocker.patch.dict(
+        stocks_services.SHARES_CACHE, {"shares": {}, "timestamp": None}
+    )
+    provider = mocker.patch("app.services.stocks_services.get_provider")
+    provider.return_value.shares_outstanding.return_value = None
+
+    assert stocks_services.restore_snapshots() == ["shares"]
+    shares = await stocks_services.fetch_shares_outstanding(["AAPL", "MSFT"])
+
+    # Only MSFT goes upstream, and its unknown count is retried next time
+    provider.return_value.shares_outstanding.assert_called_once_with("MSFT")
+    assert shares == {"AAPL": 10}
+    frame = pd.DataFrame(
+        {("Close", "AAPL"): [100.0, 110.0], ("Close", "MSFT"): [50.0, 55.0]}
+    )
+    quotes = stocks_services.parse_quote_frame(frame, ["AAPL", "MSFT"], shares)
+    assert quotes["AAPL"]["market_cap"] == 1100
+    assert quotes["MSFT"]["market_cap"] is None
@@ -0,0 +1,93 @@
+import time
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from ..models import CrawlState, ListedTicker
+from ..services import ticker_crawler
+
+
+def page(tickers, next_url=None):
+    """Fake Massive API response for one page"""
+    response = httpx.Response(
+        200,
+        json={
+            "results": [{"ticker": t, "name": f"{t} Inc."} for t in tickers],
+            "next_url": next_url,
+        },
+        request=httpx.Request("GET", "https://api.massive.com"),
+    )
+    return response
+
+
+def failing_page():
+    return httpx.Response(
+        500, request=httpx.Request("GET", "https://api.massive.com")
+    )
+
+
+@pytest.fixture
+def massive(mocker):
+    """Fake HTTP client with no rate limit delay"""
+    mocker.patch(
+        "app.services.ticker_crawler.MASSIVE_LIMITER",
+        ticker_crawler.SlidingWindowLimiter(limit=100, window=0.01),
+    )
+    mocker.patch.dict(ticker_crawler.LAST_CRAWL, clear=True)
+    client = AsyncMock()
+    mocker.patch("app.providers.live.get_http_client", return_value=client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_crawl_resumes_from_persisted_cursor(db, massive):
+    """Test that a failed crawl resumes at the failed page, not page 1"""
+    massive.get.side_effect = [
+        page(["AAPL", "MSFT"], next_url="https://api.massive.com/p2"),
+        failing_page(),
+    ]
+    with pytest.raises(httpx.HTTPStatusError):
+        await ticker_crawler.crawl_exchange(db, "nasdaq")
+
+    # Page 1 is stored along with the cursor to page 2
+    state = db.get(CrawlState, "nasdaq")
+    assert state.next_url == "https://api.massive.com/p2"
+    assert db.query(ListedTicker).count() == 2
+
+    massive.get.side_effect = [page(["NVDA"])]
+    tickers = await ticker_crawler.crawl_exchange(db, "nasdaq")
+
+    assert massive.get.call_args.args[0] == "https://api.massive.com/p2"
+    assert [t["ticker"] for t in tickers] == ["AAPL", "MSFT", "NVDA"]
+    assert db.get(CrawlState, "nasdaq").next_url is None
+
+
+@pytest.mark.asyncio
+async def test_crawl_detects_added_and_delisted(db, massive):
+    """Test that a second crawl reports only the changed tickers"""
+    massive.get.side_effect = [page(["AAPL", "MSFT"])]
+    await ticker_crawler.crawl_exchange(db, "nasdaq")
+
+    massive.get.side_effect = [page(["AAPL", "NVDA"])]
+    tickers = await ticker_crawler.crawl_exchange(db, "nasdaq", force=True)
+
+    assert [t["ticker"] for t in tickers] == ["AAPL", "NVDA"]
+    assert ticker_crawler.LAST_CRAWL["nasdaq"]["added"] == ["NVDA"]
+    assert ticker_crawler.LAST_CRAWL["nasdaq"]["delisted"] == ["MSFT"]
+
+    # A fresh completed crawl is served from the database
+    tickers = await ticker_crawler.crawl_exchange(db, "nasdaq")
+    assert massive.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_never_exceeds_limit_per_window():
+    """Test a burst waits for the window instead of doubling the quota"""
+    limiter = ticker_crawler.SlidingWindowLimiter(limit=2, window=0.2)
+    started = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+
+    # Requests 3 and 5 each wait for a window to pass
+    assert time.monotonic() - started >= 0.4
@@ -0,0 +1,73 @@
+import json
+import math
+import statistics
+
+# Relative slowdown of p50 or p99 that counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    """
+    Latency percentiles (ms) and throughput for one benchmark case.
+
+    Args:
+        latencies: Per-request latencies in seconds
+        elapsed: Wall time of the whole measured run in seconds
+        errors: Number of non-2xx responses
+    """
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "min_ms": round(min(ms), 3),
+        "max_ms": round(max(ms), 3),
+        "throughput_rps": round(len(ms) / elapsed, 2) if elapsed else None,
+    }
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[dict]:
+    """
+    Compare two reports case by case.
+
+    Returns:
+        One row per case present in both reports with the p50/p99 ratios
+        (current / baseline) and whether either exceeds 1 + threshold
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+
+        p50 = result["p50_ms"] / base["p50_ms"] if base["p50_ms"] else None
+        p99 = result["p99_ms"] / base["p99_ms"] if base["p99_ms"] else None
+        rows.append(
+            {
+                "case": name,
+                "p50_ratio": round(p50, 3) if p50 else None,
+                "p99_ratio": round(p99, 3) if p99 else None,
+                "regression": any(
+                    ratio is not None and ratio > 1 + threshold
+                    for ratio in (p50, p99)
+                ),
+            }
+        )
+    return rows
@@ -0,0 +1,290 @@
+"""
+Benchmark the hot API endpoints against the synthetic market data provider.
+
+Runs the app in-process with a throwaway SQLite database, so results only
+depend on the code and the seed, never on Yahoo or the network.
+
+Usage (from server/):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from .report import DEFAULT_THRESHOLD, compare, load_report, summarize
+
+HOLDINGS_COUNTS = [1, 10, 50]
+CHART_RANGES = ["1D", "1Y", "MAX"]
+CHART_TICKER = "AAAA"
+PORTFOLIO_RANGE = "1Y"
+# Holdings are backdated so every range has history to chart
+HOLDING_AGE = timedelta(days=730)
+PASSWORD = "benchmark-password"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="Baseline report to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative p50/p99 slowdown that fails --compare",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--cold-iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--only", help="Only run cases containing this")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, database_path):
+    """
+    Point the app at the synthetic provider and a scratch database.
+
+    Disk snapshots and the shared cache are turned off, so a run neither
+    starts from the developer's snapshots nor leaves synthetic data in
+    them for the next live boot.
+    """
+    os.environ["MARKET_DATA_PROVIDER"] = "synthetic"
+    os.environ["SYNTHETIC_SEED"] = str(args.seed)
+    os.environ["SYNTHETIC_TICKERS"] = str(args.tickers)
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["SNAPSHOT_ENABLED"] = "false"
+    os.environ["SHARED_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def git_revision():
+    """Short commit hash of the tree under test, with a dirty marker."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def measure(client, case, iterations, warmup, concurrency):
+    """
+    Time one case.
+
+    Cases with a reset hook (cold caches) always run one request at a
+    time, since the reset would race with concurrent requests.
+    """
+    method, path, kwargs = case["method"], case["path"], case["kwargs"]
+    reset = case.get("reset")
+
+    for _ in range(warmup):
+        client.request(method, path, **kwargs)
+
+    def send(_):
+        if reset is not None:
+            reset()
+        started = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        return time.perf_counter() - started, response.status_code
+
+    workers = 1 if reset is not None else concurrency
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(send, range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    return summarize(latencies, elapsed, errors)
+
+
+def create_user(client, email, tickers):
+    """Register a user holding the given tickers and return auth headers."""
+    user = {
+        "first_name": "Bench",
+        "last_name": "Mark",
+        "email": email,
+        "password": PASSWORD,
+    }
+    client.post("/auth/register", json=user)
+    token = client.post(
+        "/auth/login", json={"email": email, "password": PASSWORD}
+    ).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for ticker in tickers:
+        client.post(
+            "/portfolio/holdings",
+            json={"ticker": ticker, "shares": 10, "buy_price": 100},
+            headers=headers,
+        )
+
+    from app.database import SessionLocal
+    from app.models import Holding, User
+
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == email).scalar()
+        db.query(Holding).filter(Holding.user_id == user_id).update(
+            {"created_at": datetime.now(timezone.utc) - HOLDING_AGE}
+        )
+        db.commit()
+    finally:
+        db.close()
+    return headers
+
+
+def build_cases(client, symbols):
+    """Every benchmark case: name -> method, path, kwargs, optional reset."""
+    from app.services import portfolio_cache, stocks_services
+
+    def reset_sp500():
+        for key in stocks_services.CACHE:
+            stocks_services.CACHE[key] = None
+        stocks_services.SHARES_CACHE["shares"] = {}
+        stocks_services.SHARES_CACHE["timestamp"] = None
+
+    def reset_portfolio():
+        portfolio_cache.RESULT_CACHE.clear()
+
+    def get(path, **kwargs):
+        return {"method": "GET", "path": path, "kwargs": kwargs}
+
+    cases = {
+        "sp500_cold": {**get("/stocks/sp500"), "reset": reset_sp500},
+        "sp500_warm": get("/stocks/sp500"),
+    }
+    for time_range in CHART_RANGES:
+        cases[f"stock_chart_{time_range}"] = get(
+            f"/stocks/{CHART_TICKER}", params={"timeRange": time_range}
+        )
+    cases["stock_stats"] = get(f"/stocks/stats/{CHART_TICKER}")
+
+    for count in HOLDINGS_COUNTS:
+        headers = create_user(
+            client, f"bench{count}@example.com", symbols[:count]
+        )
+        graph = get(
+            "/portfolio/graph",
+            params={"timeRange": PORTFOLIO_RANGE},
+            headers=headers,
+        )
+        table = get("/portfolio/table", headers=headers)
+        # Cold cases recompute every request, warm ones are repeat views
+        cases[f"portfolio_graph_{count}_cold"] = {
+            **graph,
+            "reset": reset_portfolio,
+        }
+        cases[f"portfolio_graph_{count}"] = graph
+        cases[f"portfolio_table_{count}_cold"] = {
+            **table,
+            "reset": reset_portfolio,
+        }
+        cases[f"portfolio_table_{count}"] = table
+
+    cases["auth_login"] = {
+        "method": "POST",
+        "path": "/auth/login",
+        "kwargs": {
+            "json": {"email": "bench1@example.com", "password": PASSWORD}
+        },
+    }
+    return cases
+
+
+def run(args) -> dict:
+    """Run every (selected) case and return the report."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.providers import get_provider
+
+    # Request logging would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    provider = get_provider()
+    results = {}
+    with TestClient(app) as client:
+        cases = build_cases(client, provider.symbols)
+        for name, case in cases.items():
+            if args.only and args.only not in name:
+                continue
+            iterations = (
+                args.cold_iterations if "reset" in case else args.iterations
+            )
+            results[name] = measure(
+                client, case, iterations, args.warmup, args.concurrency
+            )
+            print(
+                f"{name:<24} p50 {results[name]['p50_ms']:>9.2f} ms  "
+                f"p99 {results[name]['p99_ms']:>9.2f} ms  "
+                f"{results[name]['throughput_rps']:>8.1f} req/s"
+            )
+
+    return {
+        "meta": {
+            "commit": git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "provider": provider.name,
+            "seed": args.seed,
+            "tickers": args.tickers,
+            "iterations": args.iterations,
+            "cold_iterations": args.cold_iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    baseline = load_report(args.compare) if args.compare else None
+
+    with tempfile.TemporaryDirectory() as scratch:
+        configure_environment(args, os.path.join(scratch, "bench.db"))
+        report = run(args)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if baseline is None:
+        return 0
+
+    rows = compare(baseline, report, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<24} p50 x{row['p50_ratio']}  "
+            f"p99 x{row['p99_ratio']}  {flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
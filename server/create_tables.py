@@ -1,5 +1,16 @@
 from app.database import engine, Base
-from app.models import User, Holding
+from app.models import (
+    User,
+    Holding,
+    PriceSeries,
+    PriceBar,
+    ListedTicker,
+    CrawlState,
+    CacheSnapshot,
+    JobRun,
+    PortfolioSnapshot,
+    HoldingsVersion,
+)
 
 print("Creating tables...")
 
@@ -8,3 +19,11 @@ Base.metadata.create_all(bind=engine)
 print("Tables created successfully!")
 print("- users")
 print("- holdings")
+print("- price_series")
+print("- price_bars")
+print("- listed_tickers")
+print("- crawl_state")
+print("- cache_snapshots")
+print("- job_runs")
+print("- portfolio_snapshots")
+print("- holdings_versions")